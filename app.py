@@ -1,15 +1,21 @@
 import asyncio
+import functools
 import os
 import tempfile
 import logging
 import traceback
 import re
+import secrets
 import sys
 import platform
 import time
 import html
+import threading
+import weakref
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from typing import NamedTuple, Optional
 from dotenv import load_dotenv
 
@@ -504,6 +510,39 @@ AZURE_OPENAI_API_KEY = os.environ.get("AZURE_OPENAI_API_KEY", "").strip()
 AZURE_OPENAI_DEPLOYMENT = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1-mini").strip()
 AZURE_OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-10-21").strip()
 LLM_OCR_MAX_PDF_PAGES = int(os.environ.get("LLM_OCR_MAX_PDF_PAGES", "10"))
+# Born-digital PDF pages are read from their embedded text layer instead of
+# Azure Read (see _pdf_text_layer); only scanned / image-only pages are billed.
+PDF_TEXT_LAYER = os.environ.get("PDF_TEXT_LAYER", "on").strip().lower()  # on (default) | off
+# Blank scanned PDF pages are dropped before Azure Read (see _prescreen_pages);
+# "dupes" drops repeated pages too.
+PDF_PRESCREEN = os.environ.get("PDF_PRESCREEN", "on").strip().lower()  # on (default) | dupes | off
+# Scanned pages Azure Read has already read are reused when another document
+# contains them (see _page_cache).
+PAGE_CACHE = os.environ.get("PAGE_CACHE", "on").strip().lower()  # on (default) | off
+# Running headers, footers and page numbers repeated across a document's pages
+# are left out of the text before synthesis (see _boilerplate_lines).
+STRIP_BOILERPLATE = os.environ.get("STRIP_BOILERPLATE", "on").strip().lower()  # on (default) | off
+# PDF pages per LLM OCR request (0 = the whole document in one request) and how
+# many requests may be in flight at once. One page per request keeps each reply
+# well under max_tokens and lets a long PDF be read in parallel.
+LLM_OCR_PAGES_PER_REQUEST = max(0, int(os.environ.get("LLM_OCR_PAGES_PER_REQUEST", "1")))
+LLM_OCR_CONCURRENCY = max(1, int(os.environ.get("LLM_OCR_CONCURRENCY", "4")))
+# Pinned Georgian/Armenian files are voiced while the model is still reading
+# them: the reply is streamed and sent as several voice messages, the first one
+# as soon as a sentence is in. "off" waits for the full reply and sends one.
+LLM_OCR_STREAM = os.environ.get("LLM_OCR_STREAM", "on").strip().lower()  # on (default) | off
+# Vision calls are slow (tens of seconds on a multi-page PDF), but a hung
+# connection shouldn't hold a job forever; the SDK retries 429/5xx with backoff.
+AZURE_OPENAI_TIMEOUT_S = float(os.environ.get("AZURE_OPENAI_TIMEOUT_S", "120"))
+AZURE_OPENAI_CONNECT_TIMEOUT_S = float(os.environ.get("AZURE_OPENAI_CONNECT_TIMEOUT_S", "10"))
+AZURE_OPENAI_MAX_RETRIES = int(os.environ.get("AZURE_OPENAI_MAX_RETRIES", "2"))
+AZURE_OPENAI_KEEPALIVE_S = float(os.environ.get("AZURE_OPENAI_KEEPALIVE_S", "120"))
+# Cheapest-first deployment cascade for LLM OCR, e.g. "gpt-4.1-nano,gpt-4.1-mini":
+# every request goes to the first tier and only a reply that fails the check
+# (_llm_reply_accepted) is re-asked of the next. Empty = AZURE_OPENAI_DEPLOYMENT
+# alone. A tier may carry its USD price per 1M input/output tokens for the cost
+# log: "gpt-4.1-nano@0.10/0.40,gpt-4.1-mini@0.40/1.60".
+AZURE_OPENAI_CASCADE = os.environ.get("AZURE_OPENAI_CASCADE", "").strip()
 SUPPORT_PAYMENT_MODE = os.environ.get("SUPPORT_PAYMENT_MODE", "admin_stub").strip().lower()  # instant | admin_stub
 
 
@@ -554,7 +593,8 @@ async def _dedupe_update(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 def log_usage(user_id: int, status: str, reason: str = None, language: str = None,
               ocr_pages: int = None, tts_chars: int = None, file_type: str = None,
               file_size_kb: int = None, duration_ms: int = None,
-              cost_credits: int = None) -> None:
+              cost_credits: int = None, ocr_pages_saved: int = None,
+              boilerplate_chars: int = None, tts_chars_saved: int = None) -> None:
     """Emit a structured usage record to App Insights (lands in the traces table).
 
     Every record carries `status` (success|failure); failures also carry `reason`.
@@ -575,6 +615,9 @@ def log_usage(user_id: int, status: str, reason: str = None, language: str = Non
         "file_size_kb": file_size_kb,
         "duration_ms": duration_ms,
         "cost_credits": cost_credits,
+        "ocr_pages_saved": ocr_pages_saved,
+        "boilerplate_chars": boilerplate_chars,
+        "tts_chars_saved": tts_chars_saved,
     }
     dims.update({k: v for k, v in optional.items() if v is not None})
     logger.info("UsageMetrics", extra={"custom_dimensions": dims})
@@ -630,6 +673,11 @@ FREE_DAILY_LIMIT = max(1, int(os.environ.get("FREE_DAILY_LIMIT", "10")))
 # How long a pending /feedback prompt stays "armed" (survives scale-to-zero / replica
 # switch via storage). Beyond this, a stray text message won't be captured as feedback.
 FEEDBACK_WAIT_WINDOW_SEC = 3600
+# The rescue rate changes with every file, so it's held in memory and written
+# for all users at once at most this often (and at shutdown). A lost update
+# only slows the moving average down.
+RESCUE_RATE_FLUSH_S = float(os.environ.get("RESCUE_RATE_FLUSH_S", "60"))
+_TABLE_BATCH_MAX = 100  # entities per Table transaction (one partition)
 
 
 class _MemoryStore:
@@ -670,6 +718,12 @@ class _MemoryStore:
         recent = [locale2] + [x for x in recent if x != locale2]
         u["recent"] = ",".join(recent[:MAX_RECENT_LANGS])
 
+    def set_rescue_rate(self, user_id, rate):
+        self._d.setdefault(user_id, {})["rescue_rate"] = f"{rate:.3f}"
+
+    def flush(self):
+        pass
+
     def set_awaiting_feedback(self, user_id, on):
         u = self._d.setdefault(user_id, {})
         if on:
@@ -694,8 +748,19 @@ class _TableStore:
         svc.create_table_if_not_exists(FEEDBACK_TABLE_NAME)
         self._client = svc.get_table_client(USER_TABLE_NAME)
         self._fb_client = svc.get_table_client(FEEDBACK_TABLE_NAME)
+        self._rates = {}  # user_id -> rescue_rate not yet written
+        self._rates_lock = threading.Lock()
+        self._rates_flushed = time.monotonic()
 
     def get_user(self, user_id):
+        prefs = self._get_user(user_id)
+        with self._rates_lock:
+            rate = self._rates.get(str(user_id))
+        if rate is not None:
+            prefs["rescue_rate"] = rate
+        return prefs
+
+    def _get_user(self, user_id):
         from azure.core.exceptions import ResourceNotFoundError
         try:
             e = self._client.get_entity(STORE_PARTITION, str(user_id))
@@ -705,7 +770,8 @@ class _TableStore:
                     "daily_used": e.get("daily_used") or "0",
                     "bonus_credits": e.get("bonus_credits") or "0",
                     "bonus_until": e.get("bonus_until") or "",
-                    "unlimited": e.get("unlimited") or ""}
+                    "unlimited": e.get("unlimited") or "",
+                    "rescue_rate": e.get("rescue_rate") or ""}
         except ResourceNotFoundError:
             return {}
         except Exception as ex:
@@ -729,6 +795,28 @@ class _TableStore:
         recent = [locale2] + [x for x in recent if x != locale2]
         self._upsert(user_id, recent=",".join(recent[:MAX_RECENT_LANGS]))
 
+    def set_rescue_rate(self, user_id, rate):
+        """Held until the next batch (see RESCUE_RATE_FLUSH_S); get_user sees it."""
+        with self._rates_lock:
+            self._rates[str(user_id)] = f"{rate:.3f}"
+            if time.monotonic() - self._rates_flushed < RESCUE_RATE_FLUSH_S:
+                return
+        self.flush()
+
+    def flush(self):
+        """Write the held rescue rates, one transaction per _TABLE_BATCH_MAX users."""
+        with self._rates_lock:
+            rates, self._rates = self._rates, {}
+            self._rates_flushed = time.monotonic()
+        ops = [("upsert", {"PartitionKey": STORE_PARTITION, "RowKey": uid, "rescue_rate": rate})
+               for uid, rate in rates.items()]
+        for i in range(0, len(ops), _TABLE_BATCH_MAX):
+            try:
+                self._client.submit_transaction(ops[i:i + _TABLE_BATCH_MAX])
+            except Exception as ex:
+                logger.warning(f"user_store.flush failed for {len(ops[i:i + _TABLE_BATCH_MAX])} "
+                               f"rescue rates: {ex!r}")
+
     def set_quota_state(self, user_id, quota_day, daily_used, bonus_credits, bonus_until):
         self._upsert(
             user_id,
@@ -867,7 +955,23 @@ OCR_LOCALE_HINT_LANGS = {"en", "uk", "ru", "es", "de", "fr", "pl", "pt", "it", "
 # the dominant language covers at least this fraction of the text; else we ask.
 AUTO_DETECT_MIN_CONFIDENCE = 0.6
 AUTO_DETECT_MIN_COVERAGE = 0.6
+
+# Hedged LLM OCR: on a photo that will probably need the LLM rescue, start the
+# LLM read alongside Azure Read instead of after it and the ink scan; whichever
+# the rescue decision doesn't use is cancelled. The likelihood is learned per
+# user — a moving average of how often their files needed the rescue — starting
+# from a prior for a pinned language Azure Read gets no locale hint for.
+# A threshold above 1 turns speculation off.
+LLM_SPECULATE_MIN_LIKELIHOOD = float(os.environ.get("LLM_SPECULATE_MIN_LIKELIHOOD", "0.5"))
+_RESCUE_RATE_ALPHA = 0.3
+_RESCUE_PRIOR_UNHINTED = 0.5
 PRECOST_CONFIRM_MIN_COST = max(2, int(os.environ.get("PRECOST_CONFIRM_MIN_COST", "2")))
+# Files are processed concurrently in two lanes: a document with more than
+# FAST_LANE_MAX_LOAD weighted pages (see _doc_load) waits for one of the
+# SLOW_LANE_CONCURRENCY slots, so a long scan never holds up a photo.
+FAST_LANE_MAX_LOAD = float(os.environ.get("FAST_LANE_MAX_LOAD", "5"))
+FAST_LANE_CONCURRENCY = max(1, int(os.environ.get("FAST_LANE_CONCURRENCY", "4")))
+SLOW_LANE_CONCURRENCY = max(1, int(os.environ.get("SLOW_LANE_CONCURRENCY", "1")))
 
 # Dev support packages (mock accrual now; real billing via Telegram Stars next).
 SUPPORT_PACKS = {
@@ -983,24 +1087,15 @@ def _segment_script_matches(locale2, text):
 MULTI_LANG_MIN_SHARE = 0.15
 
 
-def build_language_segments(result, dominant):
-    """Turn Azure's per-span language detection into ordered (locale2, text)
-    segments so a multilingual page (e.g. Russian prose with French quotes) can be
-    read with the right voice per span instead of one voice for everything.
-
-    Returns None for the common monolingual page — the caller then uses the
-    single-voice path unchanged. Only languages with a TTS voice are honored;
-    untagged gaps inherit the surrounding language so a block isn't split by a
-    separator. Every character of result.content is preserved.
-    """
-    content = getattr(result, "content", None) or ""
-    langs = getattr(result, "languages", None) or []
-    n = len(content)
-    if not n or not dominant:
-        return None
+def _span_owners(result, dominant):
+    """Language of every character of result.content, from Azure's per-span
+    detection: (owner list, {locale2: tagged char count}). Only languages with
+    a TTS voice are honored; untagged chars (whitespace/punctuation between
+    runs) inherit the preceding language, and a leading gap takes `dominant`."""
+    n = len(getattr(result, "content", None) or "")
     owner = [None] * n
     share = defaultdict(int)
-    for lang in langs:
+    for lang in (getattr(result, "languages", None) or []):
         loc = ((getattr(lang, "locale", "") or "")[:2]).lower()
         if loc not in VOICE_MAP:
             continue
@@ -1011,14 +1106,30 @@ def build_language_segments(result, dominant):
                 if owner[i] is None:
                     owner[i] = loc
                     share[loc] += 1
-    # Untagged chars (whitespace/punctuation between runs) inherit the preceding
-    # language; a leading gap takes the dominant one.
     last = dominant
     for i in range(n):
         if owner[i] is None:
             owner[i] = last
         else:
             last = owner[i]
+    return owner, share
+
+
+def build_language_segments(result, dominant):
+    """Turn Azure's per-span language detection into ordered (locale2, text)
+    segments so a multilingual page (e.g. Russian prose with French quotes) can be
+    read with the right voice per span instead of one voice for everything.
+
+    Returns None for the common monolingual page — the caller then uses the
+    single-voice path unchanged. Only languages with a TTS voice are honored;
+    untagged gaps inherit the surrounding language so a block isn't split by a
+    separator. Every character of result.content is preserved.
+    """
+    content = getattr(result, "content", None) or ""
+    n = len(content)
+    if not n or not dominant:
+        return None
+    owner, share = _span_owners(result, dominant)
     if len({*owner}) < 2:
         return None
     if not any(loc != dominant and share.get(loc, 0) >= MULTI_LANG_MIN_SHARE * n
@@ -1056,19 +1167,257 @@ def _img_mime(data: bytes) -> str:
     return "image/png"
 
 
-def _pdf_to_png_bytes(file_path, max_pages):
-    """Rasterize a PDF to PNG page images via PyMuPDF (no poppler dependency)."""
-    import fitz  # PyMuPDF
-    zoom = 200 / 72  # ~200 DPI is plenty for OCR
-    mat = fitz.Matrix(zoom, zoom)
-    out = []
-    doc = fitz.open(file_path)
+def _crop(img, box):
+    """A PIL image cropped to box=(x0, y0, x1, y1) given as fractions."""
+    import math
+    W, H = img.size
+    return img.crop((int(box[0] * W), int(box[1] * H),
+                     math.ceil(box[2] * W), math.ceil(box[3] * H)))
+
+
+# --- Vision upload preparation ---
+# gpt-4.1-mini shrinks any image past ~1536 32-px patches server-side, so pixels
+# beyond VISION_MAX_PIXELS cost upload time and are never seen. Large type needs
+# even fewer: a page is scaled down until a text line is ~_VISION_TARGET_LINE_PX
+# tall. Near-gray pages go up as grayscale, and everything is re-encoded lossy
+# at a quality picked with qa/tune_vision_image.py (CER vs the qa/ corpus).
+VISION_MAX_PIXELS = int(os.environ.get("VISION_MAX_PIXELS", str(1536 * 32 * 32)))
+VISION_IMAGE_FORMAT = os.environ.get("VISION_IMAGE_FORMAT", "webp").strip().lower()  # webp | jpeg | png
+VISION_IMAGE_QUALITY = int(os.environ.get("VISION_IMAGE_QUALITY", "80"))
+_VISION_TARGET_LINE_PX = 32      # text line height (ink run, px) worth keeping
+_VISION_GRAY_CHROMA = 24         # channel spread below which a pixel reads as gray
+_VISION_GRAY_MAX_COLOR = 0.01    # share of colored pixels still safe to drop color
+_VISION_MIMES = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+
+def _text_line_height(gray):
+    """Median height (px) of the runs of ink-bearing rows in a grayscale
+    image — the text line height for ordinary upright text — or None when
+    there aren't enough lines to tell."""
+    import numpy as np
+    a = np.asarray(gray) < INK_DARK_THRESHOLD
+    rows = np.count_nonzero(a, axis=1) > max(1, a.shape[1] // 500)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], rows.astype(np.int8), [0]))))
+    runs = edges[1::2] - edges[0::2]
+    runs = runs[runs >= 3]
+    return float(np.median(runs)) if len(runs) >= 3 else None
+
+
+def _is_near_gray(img):
+    """True when dropping color can't hide text: almost no pixel of a
+    thumbnail has a noticeable spread between its RGB channels."""
+    import numpy as np
+    thumb = img.convert("RGB")
+    thumb.thumbnail((256, 256))
+    a = np.asarray(thumb, dtype=np.int16)
+    chroma = a.max(axis=2) - a.min(axis=2)
+    return float(np.mean(chroma > _VISION_GRAY_CHROMA)) <= _VISION_GRAY_MAX_COLOR
+
+
+def _vision_image(img, original=None):
+    """Prepare a page (or crop) for the vision request: flatten transparency,
+    cap the resolution by VISION_MAX_PIXELS and text size, drop color when
+    it's safe, and encode as VISION_IMAGE_FORMAT. `original` is the source
+    file's bytes, sent as-is instead when re-encoding wouldn't shrink it.
+    Returns (bytes, mime)."""
+    import io
+    import math
+    from PIL import Image
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, "white")
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    gray = img.convert("L")
+    if img.mode != "L" and _is_near_gray(img):
+        img = gray
+    elif img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    W, H = img.size
+    scale = min(1.0, math.sqrt(VISION_MAX_PIXELS / (W * H)))
+    line = _text_line_height(gray)
+    if line:
+        scale = min(scale, _VISION_TARGET_LINE_PX / line)
+    if scale < 1.0:
+        img = img.resize((max(1, int(W * scale)), max(1, int(H * scale))),
+                         Image.LANCZOS)
+    fmt = VISION_IMAGE_FORMAT if VISION_IMAGE_FORMAT in _VISION_MIMES else "webp"
+    buf = io.BytesIO()
+    if fmt == "png":
+        img.save(buf, format="PNG")
+    elif fmt == "webp":
+        img.save(buf, format="WEBP", quality=VISION_IMAGE_QUALITY, method=4)
+    else:
+        img.save(buf, format="JPEG", quality=VISION_IMAGE_QUALITY, optimize=True)
+    out = buf.getvalue()
+    if original is not None and scale >= 1.0 and len(original) <= len(out):
+        mime = _img_mime(original)  # falls back to image/png for formats the API can't take
+        if mime != "image/png" or original[:8] == b"\x89PNG\r\n\x1a\n":
+            return original, mime
+    return out, _VISION_MIMES[fmt]
+
+
+_LLM_OCR_DPI = 200                   # ~200 DPI is plenty for OCR
+_RENDER_CACHE_MAX_BYTES = 48 << 20   # full-DPI renders kept from the scan for a rescue
+
+
+def _image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+class _PdfRenders:
+    """One PyMuPDF document handle per job, shared by the pre-screen, the
+    unread-ink scan and the LLM OCR so a rescued PDF is opened once.
+
+    The pre-screen gets small grayscale renders made straight at its own DPI,
+    never kept. The ink scan renders each page once at `dpi`, the resolution
+    the vision call needs, and gets a view downsampled from it; the render is
+    kept for a rescue, so a rescued page is rasterized once. A render is held
+    in grayscale when dropping color can't hide text (as _vision_image would
+    send it anyway), up to _RENDER_CACHE_MAX_BYTES with the oldest evicted
+    and re-rendered if asked for again; the job closes the cache as soon as
+    no rescue follows. Thread-safe: the scan runs on the ink-prep pool, and
+    PyMuPDF documents must not be used from two threads at once."""
+
+    def __init__(self, file_path, dpi=_LLM_OCR_DPI):
+        self._path = file_path
+        self.dpi = dpi
+        self._doc = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._pages = {}  # page index -> full-DPI PIL image, oldest first
+        self._held = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self):
+        if self._closed:
+            raise ValueError("render cache is closed")
+        if self._doc is None:
+            import fitz  # PyMuPDF
+            self._doc = fitz.open(self._path)
+        return self._doc
+
+    @property
+    def page_count(self):
+        with self._lock:
+            return self._open().page_count
+
+    def _render(self, i, keep):
+        """Page i at the render DPI as a PIL image, from the cache or freshly
+        rendered (caller holds the lock)."""
+        from PIL import Image
+        img = self._pages.pop(i, None)
+        if img is not None:
+            self._held -= _image_bytes(img)
+        else:
+            import fitz
+            page = self._open().load_page(i)
+            # Color is judged on a thumbnail-sized render, as _vision_image does.
+            probe = page.get_pixmap(dpi=max(1, int(256 * 72 / max(page.rect.width,
+                                                                   page.rect.height, 1))))
+            gray = _is_near_gray(Image.frombytes("RGB", (probe.width, probe.height),
+                                                 probe.samples))
+            pm = page.get_pixmap(dpi=self.dpi, colorspace=fitz.csGRAY if gray else fitz.csRGB)
+            img = Image.frombytes("L" if gray else "RGB", (pm.width, pm.height), pm.samples)
+        if keep:
+            size = _image_bytes(img)
+            while self._pages and self._held + size > _RENDER_CACHE_MAX_BYTES:
+                self._held -= _image_bytes(self._pages.pop(next(iter(self._pages))))
+            if size <= _RENDER_CACHE_MAX_BYTES:
+                self._pages[i] = img
+                self._held += size
+        return img
+
+    def gray(self, i, dpi, max_dim=None):
+        """Page i rendered straight at `dpi` as a grayscale PIL image, lowered
+        so its longest side is at most `max_dim`. Not cached."""
+        import fitz
+        from PIL import Image
+        with self._lock:
+            page = self._open().load_page(i)
+            if max_dim:
+                dpi = min(dpi, max_dim * 72 / max(page.rect.width, page.rect.height, 1))
+            pm = page.get_pixmap(dpi=max(1, int(dpi)), colorspace=fitz.csGRAY)
+        return Image.frombytes("L", (pm.width, pm.height), pm.samples)
+
+    def scan(self, i, dpi, max_dim=None):
+        """Page i as a grayscale PIL image at `dpi`, its longest side at most
+        `max_dim`, downsampled from the render, which stays cached."""
+        from PIL import Image
+        with self._lock:
+            img = self._render(i, keep=True)
+        scale = min(1.0, dpi / self.dpi)
+        if max_dim:
+            scale = min(scale, max_dim / max(img.size))
+        gray = img.convert("L")
+        if scale < 1.0:
+            gray = gray.resize((max(1, int(img.width * scale)),
+                                max(1, int(img.height * scale))), Image.BOX)
+        return gray
+
+    def image(self, i):
+        """Page i as a PIL image at the render DPI; drops the cached render."""
+        with self._lock:
+            return self._render(i, keep=False)
+
+    def crop(self, i, box):
+        """Part of page i (box as page fractions) as a PIL image at the render
+        DPI. The render stays cached for the page's other crops."""
+        with self._lock:
+            img = self._render(i, keep=True)
+        return _crop(img, box)
+
+    def text_layer(self):
+        """Every page's embedded text, as _pdf_text_layer returns it."""
+        with self._lock:
+            doc = self._open()
+            if not doc.is_pdf:
+                return [None] * doc.page_count  # a TIFF's frames have no text layer
+            return [_text_layer_page(page) for page in doc]
+
+    def digests(self, indices):
+        """_page_digest of each page in `indices`."""
+        with self._lock:
+            doc = self._open()
+            return [_page_digest(doc, i) for i in indices]
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._pages.clear()
+            self._held = 0
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+
+
+def _multipage_tiff(img) -> bool:
+    """Whether an open PIL image is a multi-page TIFF — the only multi-frame
+    image read page by page. An MPO camera JPEG's second frame is a preview
+    and an animated GIF/WebP's frames are one picture; both read as frame 0."""
+    return img.format == "TIFF" and getattr(img, "n_frames", 1) > 1
+
+
+def _paged_type(file_path, file_type):
+    """The type the OCR pipeline reads a file as: a multi-page TIFF goes the
+    PDF way ("pdf") — PyMuPDF opens it one page per frame, decoding frames only
+    as they're rendered into the job's bounded _PdfRenders, and Azure Read
+    takes a `pages` spec for it just as for a PDF. So its frames are
+    pre-screened, ink-scanned and LLM-read in concurrent page windows instead
+    of everything past frame 0 being lost. Other files, other multi-frame
+    images included, keep their type."""
+    if file_type != "image":
+        return file_type
+    from PIL import Image
     try:
-        for page in doc[:max_pages]:
-            out.append(page.get_pixmap(matrix=mat).tobytes("png"))
-    finally:
-        doc.close()
-    return out
+        with Image.open(file_path) as img:
+            return "pdf" if _multipage_tiff(img) else file_type
+    except Exception:
+        return file_type
 
 
 # --- Detecting text Azure Read silently dropped (unreadable scripts) ---
@@ -1091,65 +1440,470 @@ def _ink_scan_eligible(file_type, ocr_pages):
     return bool(ocr_pages) and ocr_pages <= LLM_OCR_MAX_PDF_PAGES
 
 
-def _ink_scan_pages(file_path, file_type):
-    """Yield (grayscale PIL image, page_index) for each page to scan."""
+def _ink_scan_pages(file_path, file_type, renders=None):
+    """Yield (grayscale PIL image, page_index) for each page to scan. PDF pages
+    come from `renders` (the job's _PdfRenders, whose renders a rescue then
+    reuses) when given, else from a document opened just for the scan."""
     from PIL import Image
     if file_type == "pdf":
-        import fitz
-        doc = fitz.open(file_path)
-        try:
-            for i in range(doc.page_count):
-                pm = doc.load_page(i).get_pixmap(dpi=_INK_SCAN_DPI)
-                img = Image.frombytes(
-                    "RGB" if pm.n >= 3 else "L", (pm.width, pm.height), pm.samples)
-                yield img.convert("L"), i
-        finally:
-            doc.close()
+        if renders is None:
+            with _PdfRenders(file_path, dpi=_INK_SCAN_DPI) as own:
+                yield from _ink_scan_pages(file_path, file_type, own)
+            return
+        for i in range(renders.page_count):
+            yield renders.scan(i, _INK_SCAN_DPI, _INK_SCAN_MAX_DIM), i
     else:
         yield Image.open(file_path).convert("L"), 0
 
 
-def _unread_ink_fraction(file_path, file_type, result):
+def _ink_array(img):
+    """Downscale a grayscale page for the scan and threshold it into a boolean
+    (H, W) ink array."""
+    import numpy as np
+    scale = min(1.0, _INK_SCAN_MAX_DIM / max(img.size))
+    if scale < 1.0:
+        img = img.resize((max(1, int(img.size[0] * scale)),
+                          max(1, int(img.size[1] * scale))))
+    return np.asarray(img) < INK_DARK_THRESHOLD
+
+
+def _prepare_ink_pages(file_path, file_type, stop=None, renders=None):
+    """Rasterize and threshold every page the scan would look at — the part of
+    the scan that doesn't need the OCR result. Returns [(ink, page_index)], or
+    None for a PDF too long to be eligible (see _ink_scan_eligible). `stop`
+    (threading.Event) abandons the work between pages once it's not needed;
+    `renders` is the job's shared _PdfRenders, if any."""
+    if file_type == "pdf":
+        if renders is None:
+            with _PdfRenders(file_path, dpi=_INK_SCAN_DPI) as own:
+                return _prepare_ink_pages(file_path, file_type, stop, own)
+        if renders.page_count > LLM_OCR_MAX_PDF_PAGES:
+            return None
+    out = []
+    for img, idx in _ink_scan_pages(file_path, file_type, renders):
+        if stop is not None and stop.is_set():
+            return None
+        out.append((_ink_array(img), idx))
+    return out
+
+
+# The ink-scan rasterization runs here while Azure Read works on the same file,
+# so by the time the OCR result is back only the word-box masking is left.
+_ink_prep_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ink-prep")
+
+
+class _InkPrep:
+    """Handle on a background _prepare_ink_pages run started alongside the OCR."""
+
+    def __init__(self, file_path, file_type, renders=None):
+        self._stop = threading.Event()
+        self._future = _ink_prep_pool.submit(
+            _prepare_ink_pages, file_path, file_type, self._stop, renders)
+
+    def pages(self):
+        """Block until the pages are ready; re-raises any rasterization error."""
+        return self._future.result()
+
+    def cancel(self):
+        """The scan won't be needed: stop rasterizing at the next page."""
+        self._stop.set()
+        self._future.cancel()
+
+
+def _word_geometry(page, shape):
+    """Scale a page's word polygons onto an (H, W) raster. Returns (boxes, others):
+    `boxes` is an (N, 4) int array of [x0, x1) x [y0, y1) bounds for upright
+    words (axis-aligned quads — the vast majority); `others` lists the rotated
+    or non-quad polygons as (list of (x, y) point lists, (M, 4) float array of
+    their [xmin, xmax, ymin, ymax] bounds)."""
+    import numpy as np
+    H, W = shape
+    sx = W / (page.width or W)
+    sy = H / (page.height or H)
+    quads, polys = [], []
+    for w in (getattr(page, "words", None) or []):
+        poly = w.polygon or []
+        if len(poly) == 8:
+            quads.append(poly)
+        elif len(poly) >= 6:
+            polys.append(poly)
+    boxes = np.zeros((0, 4), dtype=np.intp)
+    if quads:
+        q = np.asarray(quads, dtype=np.float64).reshape(-1, 4, 2) * (sx, sy)
+        xs, ys = q[:, :, 0], q[:, :, 1]
+        xmin, xmax = xs.min(axis=1), xs.max(axis=1)
+        ymin, ymax = ys.min(axis=1), ys.max(axis=1)
+        # Axis-aligned: every vertex sits on the bbox's left/right and top/bottom edge.
+        upright = (
+            (np.minimum(np.abs(xs - xmin[:, None]), np.abs(xs - xmax[:, None])) <= 0.5).all(axis=1)
+            & (np.minimum(np.abs(ys - ymin[:, None]), np.abs(ys - ymax[:, None])) <= 0.5).all(axis=1))
+        boxes = np.stack([
+            np.clip(np.floor(xmin[upright]), 0, W),
+            np.clip(np.floor(xmax[upright]) + 1, 0, W),
+            np.clip(np.floor(ymin[upright]), 0, H),
+            np.clip(np.floor(ymax[upright]) + 1, 0, H),
+        ], axis=1).astype(np.intp)
+        boxes = boxes[(boxes[:, 1] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 2])]
+        polys.extend(p for p, up in zip(quads, upright) if not up)
+    pts = [[(poly[i] * sx, poly[i + 1] * sy) for i in range(0, len(poly) - 1, 2)]
+           for poly in polys]
+    bounds = np.array([(min(x for x, _ in p), max(x for x, _ in p),
+                        min(y for _, y in p), max(y for _, y in p)) for p in pts],
+                      dtype=np.float64).reshape(-1, 4)
+    return boxes, (pts, bounds)
+
+
+def _fill_word_mask(geometry, window):
+    """Boolean mask of the word polygons over window=(y0, y1, x0, x1).
+
+    Upright boxes are filled all at once with a 2-D difference array and two
+    cumulative sums; only rotated/non-quad polygons are drawn one by one."""
+    import numpy as np
+    boxes, others = geometry
+    wy0, wy1, wx0, wx1 = window
+    h, w = wy1 - wy0, wx1 - wx0
+    mask = np.zeros((h, w), dtype=bool)
+    sel = boxes[(boxes[:, 0] < wx1) & (boxes[:, 1] > wx0)
+                & (boxes[:, 2] < wy1) & (boxes[:, 3] > wy0)]
+    if len(sel):
+        x0 = np.clip(sel[:, 0] - wx0, 0, w)
+        x1 = np.clip(sel[:, 1] - wx0, 0, w)
+        y0 = np.clip(sel[:, 2] - wy0, 0, h)
+        y1 = np.clip(sel[:, 3] - wy0, 0, h)
+        diff = np.zeros((h + 1, w + 1), dtype=np.int32)
+        np.add.at(diff, (y0, x0), 1)
+        np.add.at(diff, (y0, x1), -1)
+        np.add.at(diff, (y1, x0), -1)
+        np.add.at(diff, (y1, x1), 1)
+        # In place: cumsum would otherwise upcast to int64 and copy twice.
+        np.cumsum(diff, axis=0, out=diff)
+        np.cumsum(diff, axis=1, out=diff)
+        mask = diff[:h, :w] > 0
+    pts, bounds = others
+    hits = np.flatnonzero((bounds[:, 0] <= wx1) & (bounds[:, 1] >= wx0 - 1)
+                          & (bounds[:, 2] <= wy1) & (bounds[:, 3] >= wy0 - 1))
+    if len(hits):
+        from PIL import Image, ImageDraw
+        poly_img = Image.new("L", (w, h), 0)
+        draw = ImageDraw.Draw(poly_img)
+        for i in hits:
+            draw.polygon([(x - wx0, y - wy0) for x, y in pts[i]], fill=255)
+        mask |= np.asarray(poly_img) > 0
+    return mask
+
+
+def _word_box_mask(page, shape):
+    """Boolean (H, W) mask of every word polygon Azure Read recognized on a page."""
+    H, W = shape
+    return _fill_word_mask(_word_geometry(page, shape), (0, H, 0, W))
+
+
+def _dilate(mask, size):
+    """Square max-filter of a boolean mask (same window as PIL's MaxFilter(size)),
+    done as two separable 1-D passes of shifted ORs."""
+    r = size // 2
+    for axis in (0, 1):
+        out = mask.copy()
+        for d in range(1, r + 1):
+            if axis == 0:
+                out[d:] |= mask[:-d]
+                out[:-d] |= mask[d:]
+            else:
+                out[:, d:] |= mask[:, :-d]
+                out[:, :-d] |= mask[:, d:]
+        mask = out
+    return mask
+
+
+def _unread_ink_in(ink, geometry, window):
+    """Ink pixels inside window=(y0, y1, x0, x1) not covered by a (dilated) word
+    box. The mask is built over the window plus the dilation margin, so boxes
+    just outside it still count."""
+    import numpy as np
+    H, W = ink.shape
+    y0, y1, x0, x1 = window
+    r = _INK_MASK_DILATE // 2
+    ey0, ey1, ex0, ex1 = max(0, y0 - r), min(H, y1 + r), max(0, x0 - r), min(W, x1 + r)
+    mask = _dilate(_fill_word_mask(geometry, (ey0, ey1, ex0, ex1)), _INK_MASK_DILATE)
+    mask = mask[y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0]
+    return int(np.count_nonzero(ink[y0:y1, x0:x1] & ~mask))
+
+
+def _page_unread_fraction(ink, page, geometry=None):
+    """Share of a page's ink pixels outside every (dilated) recognized word box."""
+    import numpy as np
+    total_ink = int(np.count_nonzero(ink))
+    if not total_ink:
+        return 0.0
+    if geometry is None:
+        geometry = _word_geometry(page, ink.shape)
+    H, W = ink.shape
+    return _unread_ink_in(ink, geometry, (0, H, 0, W)) / total_ink
+
+
+# Tiled sampling: the scan only feeds a threshold check, so a page whose
+# estimate is clearly over UNREAD_INK_MIN_FRACTION skips the rest of the mask.
+# Tiles are full-width row bands (a dropped column shows up in every band, so
+# the estimate is tight exactly where it matters), one picked at random from
+# each of _INK_SAMPLE_BANDS equal strata. Only the "rescue" side exits early:
+# a dropped block of rows can fall between every sampled band and look like a
+# clean page, so a page the sample calls clean, or whose bands all agree (zero
+# variance, no bound at all), gets the exact scan. That scan counts only the
+# rows between the sampled bands, so it costs no more than a plain full scan.
+# The bound is z ~ 4 (99.9% two-sided for 11 d.o.f.).
+_INK_BAND = 32
+_INK_SAMPLE_BANDS = 12
+_INK_SAMPLE_Z = 4.0
+
+
+class _InkSample(NamedTuple):
+    ratio: float        # unread share of the sampled bands' ink
+    half_width: float   # confidence bound on ratio
+    bands: list         # sampled band indices, ascending
+    unread: int         # unread ink pixels counted in those bands
+    total_ink: int      # ink pixels on the whole page
+
+
+def _sampled_unread_fraction(ink, geometry):
+    """Estimate a page's unread-ink fraction from a stratified, deterministic
+    sample of row bands. Returns an _InkSample, or None when the page is too
+    short (or too empty) for sampling to save anything."""
+    import numpy as np
+    H, W = ink.shape
+    N, n = H // _INK_BAND, _INK_SAMPLE_BANDS
+    if N < 3 * n:
+        return None
+    total_ink = int(np.count_nonzero(ink))
+    if not total_ink:
+        return None
+    rng = np.random.default_rng(0)
+    edges = np.linspace(0, N, n + 1).astype(int)
+    bands = [int(rng.integers(lo, hi)) for lo, hi in zip(edges[:-1], edges[1:])]
+    t = np.empty(n)
+    u = np.empty(n)
+    for k, b in enumerate(bands):
+        y0, y1 = b * _INK_BAND, (b + 1) * _INK_BAND
+        t[k] = np.count_nonzero(ink[y0:y1])
+        u[k] = _unread_ink_in(ink, geometry, (y0, y1, 0, W))
+    ratio = u.sum() / t.sum() if t.sum() else 0.0
+    mean_ink = total_ink / N
+    var = (1 - n / N) * (u - ratio * t).var(ddof=1) / (n * mean_ink ** 2)
+    return _InkSample(float(ratio), _INK_SAMPLE_Z * float(np.sqrt(var)),
+                      bands, int(u.sum()), total_ink)
+
+
+def _page_unread_decision(ink, page, threshold):
+    """Page fraction for a threshold decision: the sampled estimate when its
+    confidence bound is clearly over `threshold`, else exact."""
+    geometry = _word_geometry(page, ink.shape)
+    est = _sampled_unread_fraction(ink, geometry)
+    if est is None:
+        return _page_unread_fraction(ink, page, geometry)
+    if est.unread and est.half_width > 0 and est.ratio - est.half_width >= threshold:
+        return est.ratio
+    # Exact: the sampled bands are already counted, scan the rows between them.
+    H, W = ink.shape
+    unread, y = est.unread, 0
+    for b in est.bands:
+        if b * _INK_BAND > y:
+            unread += _unread_ink_in(ink, geometry, (y, b * _INK_BAND, 0, W))
+        y = (b + 1) * _INK_BAND
+    if y < H:
+        unread += _unread_ink_in(ink, geometry, (y, H, 0, W))
+    return unread / est.total_ink
+
+
+def _unread_ink_fraction(file_path, file_type, result, threshold=None, prep=None):
     """Fraction of dark, text-like pixels that fall outside every word box Azure
     Read recognized — across pages, the worst page wins. High only when Azure
     silently dropped a chunk of the page (a script it can't read). Returns 0.0 on
-    any error so a scan failure can never break the OCR flow."""
+    any error so a scan failure can never break the OCR flow.
+
+    With `threshold`, the result only has to be right about `>= threshold`:
+    scanning stops at the first page that crosses it, and pages are judged by
+    tiled sampling unless the estimate is too close to call. `prep` is an
+    _InkPrep already rasterizing the file; without it pages are rendered here."""
     try:
-        from PIL import Image, ImageDraw, ImageFilter, ImageChops
         pages = list(result.pages or [])
+        if prep is not None:
+            inks = prep.pages() or []
+        else:
+            inks = ((_ink_array(img), idx) for img, idx in _ink_scan_pages(file_path, file_type))
         worst = 0.0
-        for img, idx in _ink_scan_pages(file_path, file_type):
+        for ink, idx in inks:
             if idx >= len(pages):
                 break
-            page = pages[idx]
-            scale = min(1.0, _INK_SCAN_MAX_DIM / max(img.size))
-            if scale < 1.0:
-                img = img.resize((max(1, int(img.size[0] * scale)),
-                                  max(1, int(img.size[1] * scale))))
-            W, H = img.size
-            sx = W / (page.width or W)
-            sy = H / (page.height or H)
-            ink = img.point(lambda p: 255 if p < INK_DARK_THRESHOLD else 0, mode="L")
-            total_ink = ink.histogram()[255]
-            if not total_ink:
+            if threshold is None:
+                worst = max(worst, _page_unread_fraction(ink, pages[idx]))
                 continue
-            mask = Image.new("L", (W, H), 0)
-            draw = ImageDraw.Draw(mask)
-            for w in (getattr(page, "words", None) or []):
-                poly = w.polygon or []
-                if len(poly) < 6:
-                    continue
-                draw.polygon([(poly[i] * sx, poly[i + 1] * sy)
-                              for i in range(0, len(poly), 2)], fill=255)
-            mask = mask.filter(ImageFilter.MaxFilter(_INK_MASK_DILATE))
-            inside_ink = ImageChops.multiply(ink, mask).histogram()[255]
-            worst = max(worst, (total_ink - inside_ink) / total_ink)
+            worst = max(worst, _page_unread_decision(ink, pages[idx], threshold))
+            if worst >= threshold:
+                break
         return worst
     except Exception as ex:
         logger.warning(f"unread-ink scan failed: {ex!r}")
         return 0.0
 
 
+# Region-targeted rescue: when the ink scan is the ONLY reason to distrust
+# Azure (its text is fine, it just dropped a column), the LLM re-reads only the
+# clusters of uncovered ink and its text is slotted in among Azure's lines —
+# instead of re-reading whole pages and throwing Azure's good text away.
+# Clusters are found on a grid of _REGION_CELL-px cells over the scan raster.
+_REGION_CELL = 16            # scan-raster px per grid cell
+_REGION_CELL_MIN_INK = 8     # unread ink px that make a cell part of a cluster
+_REGION_GAP = 2              # cells bridged between parts of one cluster
+_REGION_MIN_SHARE = 0.01     # of the page's ink; smaller clusters are specks
+_REGION_MAX_COUNT = 6        # clusters per page; more -> read whole pages
+_REGION_MAX_AREA = 0.6       # of the page; more -> read whole pages
+
+
+class _RegionPlan(NamedTuple):
+    """What a region-targeted rescue sends to the LLM and what it keeps."""
+    regions: list  # [(page_index, (x0, y0, x1, y1))] crops, as page fractions
+    lines: dict    # page_index -> [((x0, y0, x1, y1), locale2, text)] Azure lines kept
+
+
+def _label_cells(grid):
+    """4-connected component labels of a small boolean grid: (labels, count)."""
+    import numpy as np
+    labels = np.zeros(grid.shape, dtype=np.int32)
+    gh, gw = grid.shape
+    count = 0
+    for y, x in zip(*np.nonzero(grid)):
+        if labels[y, x]:
+            continue
+        count += 1
+        labels[y, x] = count
+        stack = [(y, x)]
+        while stack:
+            cy, cx = stack.pop()
+            for ny, nx in ((cy - 1, cx), (cy + 1, cx), (cy, cx - 1), (cy, cx + 1)):
+                if 0 <= ny < gh and 0 <= nx < gw and grid[ny, nx] and not labels[ny, nx]:
+                    labels[ny, nx] = count
+                    stack.append((ny, nx))
+    return labels, count
+
+
+def _unread_regions(ink, page):
+    """Boxes (x0, y0, x1, y1, as page fractions) around the clusters of ink no
+    recognized word box covers. Returns None when the page is too fragmented
+    or too much of it is unread for crops to beat reading the whole page."""
+    import numpy as np
+    H, W = ink.shape
+    total_ink = int(np.count_nonzero(ink))
+    if not total_ink:
+        return []
+    mask = _dilate(_fill_word_mask(_word_geometry(page, ink.shape), (0, H, 0, W)),
+                   _INK_MASK_DILATE)
+    c = _REGION_CELL
+    gh, gw = -(-H // c), -(-W // c)
+    unread = np.zeros((gh * c, gw * c), dtype=bool)
+    unread[:H, :W] = ink & ~mask
+    counts = unread.reshape(gh, c, gw, c).sum(axis=(1, 3))
+    active = counts >= _REGION_CELL_MIN_INK
+    labels, n = _label_cells(_dilate(active, 2 * _REGION_GAP + 1))
+    boxes = []
+    area = 0.0
+    for lab in range(1, n + 1):
+        cells = (labels == lab) & active
+        if counts[cells].sum() < _REGION_MIN_SHARE * total_ink:
+            continue
+        ys, xs = np.nonzero(cells)
+        x0, x1 = max(0, xs.min() - 1) * c, min(gw, xs.max() + 2) * c
+        y0, y1 = max(0, ys.min() - 1) * c, min(gh, ys.max() + 2) * c
+        box = (float(x0 / W), float(y0 / H), float(min(x1, W) / W), float(min(y1, H) / H))
+        boxes.append(box)
+        area += (box[2] - box[0]) * (box[3] - box[1])
+    if len(boxes) > _REGION_MAX_COUNT or area > _REGION_MAX_AREA:
+        return None
+    return boxes
+
+
+def _region_plan(result, inks, dominant):
+    """A _RegionPlan from the scan's (ink, page_index) pages and Azure's
+    result, or None when a whole-page rescue is the better call (a page too
+    fragmented, lines without geometry, nothing to crop). Azure lines whose
+    center falls inside a crop are dropped — the LLM re-reads that area."""
+    pages = list(result.pages or [])
+    owner, _ = _span_owners(result, dominant)
+    regions, lines = [], {}
+    for ink, idx in inks:
+        if idx >= len(pages):
+            break
+        page = pages[idx]
+        boxes = _unread_regions(ink, page)
+        if boxes is None or not (page.width and page.height):
+            return None
+        regions.extend((idx, b) for b in boxes)
+        kept = []
+        for line in page.lines:
+            poly = getattr(line, "polygon", None) or []
+            if len(poly) < 6:
+                return None
+            xs = [v / page.width for v in poly[0::2]]
+            ys = [v / page.height for v in poly[1::2]]
+            box = (min(xs), min(ys), max(xs), max(ys))
+            cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            if any(b[0] <= cx <= b[2] and b[1] <= cy <= b[3] for b in boxes):
+                continue
+            spans = getattr(line, "spans", None) or []
+            off = spans[0].offset if spans else None
+            loc = owner[off] if off is not None and off < len(owner) else dominant
+            kept.append((box, loc, line.content))
+        lines[idx] = kept
+    return _RegionPlan(regions, lines) if regions else None
+
+
+def _reading_order(blocks):
+    """Order (box, item) blocks the way LLM_OCR_PROMPT asks the model to read:
+    blocks whose x-ranges overlap form a column, columns run left to right,
+    and each column is read top to bottom. A block spanning columns (a title,
+    a footer) would join them into one, so those are cut out first (an X-Y
+    cut): they split the page into bands, read in turn top to bottom with the
+    spanning blocks between them, and each band is ordered the same way."""
+    def overlap(a, b):
+        return a[0][0] < b[0][2] and b[0][0] < a[0][2]
+
+    wide = [b for b in blocks
+            if any(not overlap(c, d) for c in blocks if c is not b and overlap(b, c)
+                   for d in blocks if d is not b and d is not c and overlap(b, d))]
+    if wide:
+        wide.sort(key=lambda b: (b[0][1] + b[0][3]) / 2)
+        cuts = [(b[0][1] + b[0][3]) / 2 for b in wide]
+        bands = [[] for _ in range(len(wide) + 1)]
+        for b in blocks:
+            if not any(b is w for w in wide):
+                cy = (b[0][1] + b[0][3]) / 2
+                bands[sum(cy > c for c in cuts)].append(b)
+        out = _reading_order(bands[0])
+        for w, band in zip(wide, bands[1:]):
+            out += [w] + _reading_order(band)
+        return out
+    columns, right = [], None
+    for b in sorted(blocks, key=lambda b: b[0][0]):
+        if columns and b[0][0] < right:
+            columns[-1].append(b)
+            right = max(right, b[0][2])
+        else:
+            columns.append([b])
+            right = b[0][2]
+    return [b for col in columns for b in sorted(col, key=lambda b: b[0][1])]
+
+
+def _merge_region_segments(plan, region_segs):
+    """Merge the LLM's segments for each crop (aligned with plan.regions) with
+    the kept Azure lines: page by page, in reading order, adjacent spans in
+    the same language joined."""
+    by_page = defaultdict(list)
+    for (idx, box), segs in zip(plan.regions, region_segs):
+        by_page[idx].append((box, segs))
+    for idx, kept in plan.lines.items():
+        by_page[idx].extend((box, [(loc, text)]) for box, loc, text in kept)
+    return _merge_page_segments(
+        segs for idx in sorted(by_page) for _, segs in _reading_order(by_page[idx]))
+
+
 LLM_OCR_PROMPT = (
     "You are a precise OCR engine. Transcribe ALL text in the image(s) exactly as "
     "written. Do not translate, summarize, correct, or add any commentary. "
@@ -1182,45 +1936,541 @@ def _parse_llm_segments(raw):
     return segs
 
 
-def run_llm_ocr(file_path, file_type, locale2):
+# Streaming LLM OCR hands a segment's text on in pieces while the model is still
+# writing it: at least _STREAM_PIECE_MIN_CHARS, cut after a sentence end (or a
+# paragraph break), so the first voice message is a whole sentence rather than a
+# word. A run with no sentence end is cut at a space once it passes the max.
+_STREAM_PIECE_MIN_CHARS = 80
+_STREAM_PIECE_MAX_CHARS = 2000
+_STREAM_PIECE_BREAK = re.compile(r'[.!?…][)"»”]*\s+|\n\s*\n')
+_JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "", "f": ""}
+
+
+class _SegmentStream:
+    """Incremental parser for the LLM OCR reply ({"segments":[{"lang":..,
+    "text":..}]}) fed as completion-stream deltas. feed() returns the
+    (locale2, text) pieces completed so far; joined per segment they give
+    the text _parse_llm_segments would. Like it, tolerant of prose or
+    code fences around the object and drops spans with no language; a reply
+    cut off mid-segment still yields what was read (see finish). `sep` is put
+    before the first piece of every segment after the first, so pieces can be
+    joined into text the way run_llm_ocr joins segments."""
+
+    def __init__(self, sep=""):
+        self._sep = sep
+        self._opened = False    # the open segment has handed on a piece
+        self._any = False       # some segment has
+        self._stack = []        # open containers, "{" / "["
+        self._in_str = False
+        self._esc = None        # None, "" right after a backslash, "u.." mid \\uXXXX
+        self._is_key = False
+        self._expect_key = False
+        self._key = None        # last key read
+        self._buf = []          # the string being read, unless it's segment text
+        self._lang = None       # the open segment's language, once read
+        self._text = []         # the open segment's text not yet handed on
+        self._out = []
+
+    def _in_segment(self):
+        return self._stack == ["{", "[", "{"]
+
+    def feed(self, chunk):
+        for ch in chunk:
+            self._char(ch)
+        self._flush(final=False)
+        out, self._out = self._out, []
+        return out
+
+    def finish(self):
+        """Flush a segment left open by a truncated reply."""
+        if self._in_segment():
+            self._flush(final=True)
+        out, self._out = self._out, []
+        return out
+
+    def _char(self, ch):
+        if self._in_str:
+            if self._esc is not None:
+                self._esc += ch
+                if self._esc[0] == "u":
+                    if len(self._esc) < 5:
+                        return
+                    try:
+                        ch = chr(int(self._esc[1:], 16))
+                    except ValueError:
+                        ch = ""
+                else:
+                    ch = _JSON_ESCAPES.get(ch, ch)
+                self._esc = None
+            elif ch == "\\":
+                self._esc = ""
+                return
+            elif ch == '"':
+                self._in_str = False
+                self._end_string()
+                return
+            if not self._is_key and self._key == "text" and self._in_segment():
+                self._text.append(ch)
+            else:
+                self._buf.append(ch)
+            return
+        if not self._stack and ch != "{":
+            return  # prose / fences around the object
+        if ch == '"':
+            self._in_str, self._is_key, self._buf = True, self._expect_key, []
+        elif ch in "{[":
+            self._stack.append(ch)
+            self._expect_key = ch == "{"
+            if self._in_segment():
+                self._lang, self._text, self._key = None, [], None
+                self._opened = False
+        elif ch in "}]":
+            if ch == "}" and self._in_segment():
+                self._flush(final=True)
+            self._stack.pop()
+            self._expect_key = False
+        elif ch == ":":
+            self._expect_key = False
+        elif ch == ",":
+            self._expect_key = self._stack[-1] == "{"
+
+    def _end_string(self):
+        s = "".join(self._buf)
+        if self._is_key:
+            self._key = s
+        elif self._key == "lang" and self._in_segment():
+            self._lang = s.strip().lower()[:2]
+
+    def _flush(self, final):
+        if not self._text or (self._lang is None and not final):
+            return
+        text = "".join(self._text)
+        cut = len(text)
+        if not final:
+            cut = 0
+            if len(text) >= _STREAM_PIECE_MIN_CHARS:
+                for m in _STREAM_PIECE_BREAK.finditer(text, _STREAM_PIECE_MIN_CHARS - 1):
+                    cut = m.end()
+            if not cut and len(text) > _STREAM_PIECE_MAX_CHARS:
+                cut = text.rfind(" ") + 1 or len(text)
+            if not cut:
+                return
+        piece, rest = text[:cut], text[cut:]
+        self._text = [rest] if rest else []
+        # A \\uXXXX surrogate pair arrives as two chars; rejoin it.
+        piece = piece.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+        if self._lang and piece.strip():
+            if not self._opened and self._any:
+                piece = self._sep + piece
+            self._opened = self._any = True
+            self._out.append((self._lang, piece))
+
+
+# One Azure OpenAI client per event loop, built on first use, so every rescue
+# after the first reuses a pooled keep-alive connection instead of paying a new
+# TCP + TLS handshake. httpx async pools are bound to the loop that opened them:
+# a different loop (asyncio.run in the QA scripts) gets its own client, and a
+# client goes away with its loop.
+_llm_clients = weakref.WeakKeyDictionary()
+
+
+def _llm_client():
+    """The running loop's AsyncAzureOpenAI client (created lazily)."""
+    loop = asyncio.get_running_loop()
+    client = _llm_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+        client = AsyncAzureOpenAI(
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_key=AZURE_OPENAI_API_KEY,
+            api_version=AZURE_OPENAI_API_VERSION,
+            timeout=httpx.Timeout(AZURE_OPENAI_TIMEOUT_S,
+                                  connect=AZURE_OPENAI_CONNECT_TIMEOUT_S),
+            max_retries=AZURE_OPENAI_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=20, max_keepalive_connections=10,
+                keepalive_expiry=AZURE_OPENAI_KEEPALIVE_S)),
+        )
+        _llm_clients[loop] = client
+    return client
+
+
+# Bytes of image input each vision request sent, for a caller that sets a list
+# here before starting the OCR task (tasks inherit it): a cancelled speculative
+# read still paid for what it uploaded.
+_llm_meter = contextvars.ContextVar("_llm_meter", default=None)
+
+# Pages each Azure Read call was sent, recorded before the call, for a caller
+# that sets a list here before starting the OCR task (see _PrecostRead).
+_azure_page_meter = contextvars.ContextVar("_azure_page_meter", default=None)
+
+
+def _meter_azure_pages(pages: int):
+    meter = _azure_page_meter.get()
+    if meter is not None:
+        meter.append(pages)
+
+
+# Per-loop cap on vision requests in flight across all jobs, so a burst of
+# multi-page rescues can't trip the deployment's rate limit (see _llm_client
+# for why it's per loop).
+_llm_semaphores = weakref.WeakKeyDictionary()
+
+
+def _llm_semaphore():
+    loop = asyncio.get_running_loop()
+    sem = _llm_semaphores.get(loop)
+    if sem is None:
+        sem = _llm_semaphores[loop] = asyncio.Semaphore(LLM_OCR_CONCURRENCY)
+    return sem
+
+
+class _LlmTier(NamedTuple):
+    deployment: str
+    usd_in: float = 0.0     # per 1M prompt tokens
+    usd_out: float = 0.0    # per 1M completion tokens
+
+
+def _llm_tiers():
+    """AZURE_OPENAI_CASCADE as [_LlmTier], cheapest first."""
+    tiers = []
+    for item in AZURE_OPENAI_CASCADE.split(","):
+        name, _, price = item.strip().partition("@")
+        if not name:
+            continue
+        try:
+            usd_in, usd_out = (float(p) for p in price.split("/")) if price else (0.0, 0.0)
+        except ValueError:
+            logger.warning(f"AZURE_OPENAI_CASCADE: bad price for {name!r}, ignoring it")
+            usd_in = usd_out = 0.0
+        tiers.append(_LlmTier(name, usd_in, usd_out))
+    return tiers or [_LlmTier(AZURE_OPENAI_DEPLOYMENT)]
+
+
+# A cheaper tier's reply is accepted when every segment's script agrees with
+# its language tag (see _llm_reply_accepted) and it is not much shorter than the
+# ink on the images suggests. Printed text comes to ~0.12-0.23 line-height²
+# of ink pixels per letter (regular to bold, Latin and Georgian alike), so the
+# ink estimate is a loose lower bound.
+_CASCADE_INK_PER_CHAR = 0.17        # ink px per letter, in units of line height²
+_CASCADE_MIN_LENGTH_RATIO = 0.5     # reply letters / ink-estimated letters
+_CASCADE_MIN_SCRIPT_SHARE = 0.6     # own-script share of a distinct-script segment
+_CASCADE_MAX_FOREIGN_SHARE = 0.4    # distinct-script share of a Latin/Cyrillic segment
+
+# Per-deployment totals since start, logged with every tier decision.
+_llm_tier_stats = defaultdict(lambda: {"requests": 0, "accepted": 0, "failed": 0,
+                                       "ms": 0, "usd": 0.0})
+
+
+def _expected_letters(content):
+    """Letters the ink on a vision request's images suggests, or None when a
+    line height can't be measured. Blocking."""
+    import base64
+    import io
+    import numpy as np
+    from PIL import Image
+    total = 0.0
+    for part in content[1:]:
+        data = base64.b64decode(part["image_url"]["url"].split(",", 1)[1])
+        with Image.open(io.BytesIO(data)) as img:
+            gray = img.convert("L")
+        line = _text_line_height(gray)
+        if not line:
+            return None
+        ink = np.count_nonzero(np.asarray(gray) < INK_DARK_THRESHOLD)
+        total += ink / (_CASCADE_INK_PER_CHAR * line * line)
+    return total
+
+
+def _llm_reply_accepted(segs, expected):
+    """The cascade's check on a cheaper tier's reply: something was read,
+    each segment tagged with a distinct-alphabet language is mostly in that
+    script, no Latin/Cyrillic-tagged segment is mostly in a distinct script,
+    and the letter count is at least _CASCADE_MIN_LENGTH_RATIO of `expected`."""
+    letters = 0
+    for loc, txt in segs:
+        shares, n = _script_shares(txt)
+        letters += n
+        if not n:
+            continue
+        if loc in _SCRIPT_RANGE_LANGS:
+            if shares.get(loc, 0.0) < _CASCADE_MIN_SCRIPT_SHARE:
+                return False
+        elif sum(shares.values()) > _CASCADE_MAX_FOREIGN_SHARE:
+            return False
+    if not letters:
+        return False
+    return expected is None or letters >= _CASCADE_MIN_LENGTH_RATIO * expected
+
+
+def _log_llm_tier(label, k, tier, resp, ms, accepted, error=None):
+    usage = getattr(resp, "usage", None)
+    tokens_in = getattr(usage, "prompt_tokens", 0) or 0
+    tokens_out = getattr(usage, "completion_tokens", 0) or 0
+    usd = (tokens_in * tier.usd_in + tokens_out * tier.usd_out) / 1e6
+    stats = _llm_tier_stats[tier.deployment]
+    stats["requests"] += 1
+    stats["accepted"] += accepted
+    stats["ms"] += ms
+    stats["usd"] += usd
+    stats["failed"] += error is not None
+    outcome = f"failed ({error!r})" if error is not None else (
+        "accepted" if accepted else "escalated")
+    (logger.warning if error is not None else logger.info)(
+        f"LLM OCR ({label}) tier {k + 1} {tier.deployment}: "
+        f"{outcome} in {ms} ms, "
+        f"{tokens_in}+{tokens_out} tokens (${usd:.4f}); tier totals: "
+        f"{stats['accepted']}/{stats['requests']} accepted, "
+        f"{stats['ms'] / stats['requests']:.0f} ms mean, ${stats['usd']:.3f}")
+
+
+def _llm_ocr_page_groups(file_path, file_type, renders=None):
+    """Page-index groups, one vision request each: LLM_OCR_PAGES_PER_REQUEST
+    pages per group (0 = the whole document in one request). Blocking."""
+    if file_type != "pdf":
+        return [[0]]
+    pages = list(range(min(renders.page_count, LLM_OCR_MAX_PDF_PAGES)))
+    size = LLM_OCR_PAGES_PER_REQUEST or len(pages) or 1
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def _vision_content(images):
+    """Message content for a vision request: the prompt plus each (bytes, mime)
+    image as a base64 data URL."""
+    import base64
+    content = [{"type": "text", "text": LLM_OCR_PROMPT}]
+    for img, mime in images:
+        b64 = base64.b64encode(img).decode("ascii")
+        content.append({"type": "image_url",
+                        "image_url": {"url": f"data:{mime};base64,{b64}"}})
+    return content
+
+
+def _llm_ocr_content(file_path, file_type, renders=None, pages=(0,)):
+    """The vision request's message content for whole pages. Blocking
+    (rasterizes/encodes) — run it in a thread."""
+    if file_type == "pdf":
+        return _vision_content([_vision_image(renders.image(i)) for i in pages])
+    import io
+    from PIL import Image, ImageOps
+    with open(file_path, "rb") as f:
+        data = f.read()
+    with Image.open(io.BytesIO(data)) as img:
+        # A photo turned by its EXIF tag is re-encoded upright rather than sent as-is.
+        rotated = img.getexif().get(0x0112, 1) != 1
+        return _vision_content([_vision_image(ImageOps.exif_transpose(img),
+                                              None if rotated else data)])
+
+
+def _llm_crop_content(file_path, file_type, renders, page, box):
+    """The vision request's message content for one crop of a page (box as
+    page fractions). Blocking — run it in a thread."""
+    if file_type == "pdf":
+        return _vision_content([_vision_image(renders.crop(page, box))])
+    from PIL import Image
+    with Image.open(file_path) as img:
+        return _vision_content([_vision_image(_crop(img, box))])
+
+
+async def _llm_ocr_request(label, build, *args):
+    """One vision request -> [(locale2, text)]; `build(*args)` makes its
+    message content. The images are only encoded once a request slot is free,
+    so at most LLM_OCR_CONCURRENCY requests' images are held at a time.
+
+    The request climbs the AZURE_OPENAI_CASCADE tiers until a reply passes
+    _llm_reply_accepted; the last tier's reply is taken as it is. A tier whose
+    call fails (a missing deployment, a 429, a content filter) hands on to the
+    next one; only the last tier's failure is raised."""
+    import openai
+
+    async with _llm_semaphore():
+        content = await asyncio.to_thread(build, *args)
+        tiers = _llm_tiers()
+        expected = None
+        if len(tiers) > 1:
+            expected = await asyncio.to_thread(_expected_letters, content)
+        sent = sum(len(part["image_url"]["url"]) for part in content[1:])
+        logger.info(f"LLM OCR request ({label}): {len(content) - 1} image(s), {sent / 1024:.0f} KB")
+        for k, tier in enumerate(tiers):
+            meter = _llm_meter.get()
+            if meter is not None:
+                meter.append(sent)
+            t0 = time.monotonic()
+            last = k == len(tiers) - 1
+            try:
+                resp = await _llm_client().chat.completions.create(
+                    model=tier.deployment,
+                    messages=[{"role": "user", "content": content}],
+                    temperature=0,
+                    max_tokens=8000,
+                    response_format={"type": "json_object"},
+                )
+            except openai.APIError as ex:
+                _log_llm_tier(label, k, tier, None, round((time.monotonic() - t0) * 1000),
+                              False, error=ex)
+                if last:
+                    raise
+                continue
+            choice = resp.choices[0]
+            segs = _parse_llm_segments(choice.message.content or "")
+            accepted = last or (choice.finish_reason != "length"
+                                and _llm_reply_accepted(segs, expected))
+            _log_llm_tier(label, k, tier, resp, round((time.monotonic() - t0) * 1000), accepted)
+            if accepted:
+                break
+    if choice.finish_reason == "length":
+        logger.warning(f"LLM OCR reply truncated ({label})")
+    return segs
+
+
+async def _llm_ocr_group(file_path, file_type, renders, pages):
+    """One vision request for a page group -> [(locale2, text)]."""
+    return await _llm_ocr_request(f"pages {pages[0] + 1}-{pages[-1] + 1}",
+                                  _llm_ocr_content, file_path, file_type, renders, pages)
+
+
+def _merge_page_segments(groups):
+    """Concatenate per-group segment lists in page order. A group opening in
+    the language the previous one ended in continues that segment, so a
+    paragraph running across a page break stays one span in one voice."""
+    out = []
+    for segs in groups:
+        for k, (loc, txt) in enumerate(segs):
+            if k == 0 and out and out[-1][0] == loc:
+                out[-1] = (loc, out[-1][1] + "\n" + txt)
+            else:
+                out.append((loc, txt))
+    return out
+
+
+async def run_llm_ocr(file_path, file_type, locale2, renders=None):
     """OCR via Azure OpenAI vision (gpt-4.1-mini): reads scripts Azure Read can't
     (Georgian, Armenian, ...) and returns language-tagged segments so a mixed page
     is read with the right voice per language. Returns (text, raw_segments), or
-    ('', None) when Azure OpenAI isn't configured or the call fails."""
+    ('', None) when Azure OpenAI isn't configured or the call fails. `renders`
+    is the job's _PdfRenders when a PDF was already rasterized for the scan.
+
+    PDF pages go out as independent concurrent requests (see
+    LLM_OCR_PAGES_PER_REQUEST / LLM_OCR_CONCURRENCY), so latency tracks the
+    slowest page group rather than the page count. Any failed group fails the
+    whole call — a silently missing page is worse than no rescue."""
     if not _azure_openai_configured():
         logger.warning("OCR_FALLBACK=llm but Azure OpenAI is not configured "
                        "(set AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_API_KEY).")
         return "", None
+    file_type = _paged_type(file_path, file_type)
+    own = None
+    if file_type == "pdf" and renders is None:
+        renders = own = _PdfRenders(file_path)
     try:
-        import base64
-        from openai import AzureOpenAI
-        if file_type == "pdf":
-            images = [(png, "image/png") for png in
-                      _pdf_to_png_bytes(file_path, LLM_OCR_MAX_PDF_PAGES)]
-        else:
-            with open(file_path, "rb") as f:
-                data = f.read()
-            images = [(data, _img_mime(data))]
-        content = [{"type": "text", "text": LLM_OCR_PROMPT}]
-        for img, mime in images:
-            b64 = base64.b64encode(img).decode("ascii")
-            content.append({"type": "image_url",
-                            "image_url": {"url": f"data:{mime};base64,{b64}"}})
-        client = AzureOpenAI(azure_endpoint=AZURE_OPENAI_ENDPOINT,
-                             api_key=AZURE_OPENAI_API_KEY,
-                             api_version=AZURE_OPENAI_API_VERSION)
-        resp = client.chat.completions.create(
-            model=AZURE_OPENAI_DEPLOYMENT,
+        groups = await asyncio.to_thread(_llm_ocr_page_groups, file_path, file_type, renders)
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_llm_ocr_group(file_path, file_type, renders, g))
+                     for g in groups]
+        segs = _merge_page_segments(t.result() for t in tasks)
+        return "\n\n".join(t for _, t in segs), segs
+    except Exception as ex:
+        logger.error(f"LLM OCR failed: {ex!r}")
+        return "", None
+    finally:
+        if own is not None:
+            own.close()
+
+
+async def _llm_ocr_stream(label, build, *args):
+    """Streaming _llm_ocr_request: an async generator of (locale2, text)
+    pieces handed on by _SegmentStream as the reply arrives."""
+    async with _llm_semaphore():
+        content = await asyncio.to_thread(build, *args)
+        sent = sum(len(part["image_url"]["url"]) for part in content[1:])
+        logger.info(f"LLM OCR stream ({label}): {len(content) - 1} image(s), {sent / 1024:.0f} KB")
+        # A streamed reply is voiced before it could be checked, so it comes
+        # from the cascade's top tier.
+        stream = await _llm_client().chat.completions.create(
+            model=_llm_tiers()[-1].deployment,
             messages=[{"role": "user", "content": content}],
             temperature=0,
             max_tokens=8000,
             response_format={"type": "json_object"},
+            stream=True,
         )
-        segs = _parse_llm_segments(resp.choices[0].message.content or "")
-        return "\n\n".join(t for _, t in segs), segs
+        parser, finish = _SegmentStream(sep="\n\n"), None
+        async for chunk in stream:
+            if not chunk.choices:
+                continue  # Azure's prompt-filter results arrive as choice-less chunks
+            choice = chunk.choices[0]
+            finish = choice.finish_reason or finish
+            for piece in parser.feed(choice.delta.content or ""):
+                yield piece
+        if finish == "length":
+            logger.warning(f"LLM OCR reply truncated ({label})")
+        for piece in parser.finish():
+            yield piece
+
+
+async def stream_llm_ocr(file_path, file_type, locale2):
+    """Streaming run_llm_ocr: an async generator of (locale2, text) pieces in
+    reading order, each handed on as soon as the model has written it (see
+    _SegmentStream), so synthesis can start long before the reply is complete.
+
+    Page groups are still requested concurrently; a later group's pieces are
+    buffered until every earlier group has finished. Pieces that open a
+    segment or a page group start with the break run_llm_ocr would join them
+    with ("\n\n", or "\n" where a page continues the previous language), so
+    the pieces concatenate into its text. Unlike run_llm_ocr a failure raises
+    — by then earlier pieces may already have been voiced."""
+    file_type = _paged_type(file_path, file_type)
+    own = _PdfRenders(file_path) if file_type == "pdf" else None
+    tasks = []
+    try:
+        groups = await asyncio.to_thread(_llm_ocr_page_groups, file_path, file_type, own)
+        queues = [asyncio.Queue() for _ in groups]
+
+        async def pump(pages, queue):
+            try:
+                async for piece in _llm_ocr_stream(
+                        f"pages {pages[0] + 1}-{pages[-1] + 1}", _llm_ocr_content,
+                        file_path, file_type, own, pages):
+                    queue.put_nowait(piece)
+                queue.put_nowait(None)
+            except Exception as ex:
+                queue.put_nowait(ex)
+
+        tasks = [asyncio.create_task(pump(g, q)) for g, q in zip(groups, queues)]
+        last = None
+        for queue in queues:
+            first = True
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                if first and last is not None:
+                    item = (item[0], ("\n" if item[0] == last else "\n\n") + item[1])
+                first, last = False, item[0]
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if own is not None:
+            own.close()
+
+
+async def run_region_ocr(file_path, file_type, plan, renders=None):
+    """Region-targeted rescue: LLM-read only the plan's crops of uncovered ink
+    (concurrently, like run_llm_ocr's page groups) and merge them with the
+    Azure lines the plan kept, in reading order. Returns merged (locale2, text)
+    segments, or None on any failure so the caller can read whole pages."""
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_llm_ocr_request(
+                         f"page {idx + 1} region", _llm_crop_content,
+                         file_path, file_type, renders, idx, box))
+                     for idx, box in plan.regions]
+        return _merge_region_segments(plan, [t.result() for t in tasks])
     except Exception as ex:
-        logger.error(f"LLM OCR failed: {ex!r}")
-        return "", None
+        logger.warning(f"region LLM OCR failed, reading whole pages: {ex!r}")
+        return None
 
 
 def _segments_from_raw(raw_segments, fallback_lang):
@@ -1244,12 +2494,12 @@ def _segments_from_raw(raw_segments, fallback_lang):
     return dominant, segments
 
 
-def run_fallback_ocr(file_path, file_type, locale2):
+async def run_fallback_ocr(file_path, file_type, locale2):
     """Run the LLM OCR engine for an Azure-unsupported language (Georgian/
     Armenian). Returns (text, raw_segments), or ('', None) when the LLM isn't
     configured — the caller then reports no text for that language."""
     if OCR_FALLBACK == "llm" and _azure_openai_configured():
-        return run_llm_ocr(file_path, file_type, locale2)
+        return await run_llm_ocr(file_path, file_type, locale2)
     return "", None
 
 SUPPORTED_MIME = {
@@ -1268,8 +2518,12 @@ def normalize_ocr_text(raw_text: str) -> str:
     # sides, so numeric codes/ranges (e.g. "2.02.05-2020", "10-15") aren't merged
     # into "2.02.052020". A hyphen at a line break next to a digit keeps the
     # hyphen and just drops the break.
-    text = re.sub(r'(?<=[^\W\d_])-\s*\n\s*(?=[^\W\d_])', '', text)
-    text = re.sub(r'-\s*\n\s*(?=\d)', '-', text)
+    # The break is spelled `[^\S\n]*\n\s*` rather than `\s*\n\s*`: both match
+    # "whitespace containing a newline", but the latter backtracks over every
+    # split point of a long blank run (quadratic on OCR text with thousands of
+    # empty lines after a hyphen). See qa/test_regex_perf.py.
+    text = re.sub(r'(?<=[^\W\d_])-[^\S\n]*\n\s*(?=[^\W\d_])', '', text)
+    text = re.sub(r'-[^\S\n]*\n\s*(?=\d)', '-', text)
     text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
     text = re.sub(r'\n{3,}', '\n\n', text)
     text = re.sub(r' +', ' ', text)
@@ -1458,8 +2712,75 @@ def _grant_bonus_credits(user_id: int, bonus: int, days: int):
     return _load_quota(user_id)
 
 
-def _estimate_request_cost(file_type: str, file_size_kb: Optional[int]) -> int:
-    """Rough pre-cost estimate used for upfront confirmation on heavy files."""
+# --- Pre-flight document inspection ---
+# What a file holds, read from its headers and the PDF page tree without
+# decoding a pixel or parsing a content stream (milliseconds, even for a
+# 400-page PDF): page count, which PDF pages carry a text layer (read without
+# OCR, see _pdf_text_layer), and the pixel size and scan DPI. It prices the
+# file and picks its lane. PDF pages are sampled evenly past _INSPECT_MAX_PAGES.
+_INSPECT_MAX_PAGES = 64
+_INSPECT_SCAN_MIN_DPI = 100     # an image this dense across the page is a scan of it
+_TEXT_PAGE_WEIGHT = 0.25        # a text-layer page costs no OCR, only its speech
+_COST_PAGES_PER_CREDIT = 10     # weighted pages per credit
+_COST_MAX_CREDITS = 3           # the size-based schedule's ceiling
+
+
+class DocInfo(NamedTuple):
+    """A file's shape as seen by inspect_document."""
+    pages: int                  # PDF pages, or image frames (multi-page TIFF)
+    text_pages: int             # PDF pages with a text layer (estimated when sampled)
+    width: Optional[int]        # pixels of the image, or of a PDF's first page scan
+    height: Optional[int]
+    dpi: Optional[float]        # scan resolution, when known
+
+    @property
+    def ocr_pages(self) -> int:
+        return self.pages - self.text_pages
+
+
+def inspect_document(file_path: str, file_type: str) -> Optional[DocInfo]:
+    """Pre-flight DocInfo of a downloaded file, or None for a type it can't
+    read. Blocking, but cheap enough to run before the pre-cost prompt."""
+    if file_type == "pdf":
+        import fitz
+        with fitz.open(file_path) as doc:
+            n = doc.page_count
+            step = max(1, -(-n // _INSPECT_MAX_PAGES))
+            sampled = range(0, n, step)
+            text, size, dpi = 0, (None, None), None
+            for i in sampled:
+                box = doc.page_cropbox(i)
+                scan = max(((img[2], img[3]) for img in doc.get_page_images(i)
+                            if box.width and box.height
+                            and img[2] * 72 / box.width >= _INSPECT_SCAN_MIN_DPI
+                            and img[3] * 72 / box.height >= _INSPECT_SCAN_MIN_DPI),
+                           default=None)
+                if scan is None:
+                    text += bool(doc.get_page_fonts(i))
+                elif dpi is None:
+                    size, dpi = scan, round(scan[0] * 72 / box.width)
+            return DocInfo(n, round(text * n / max(1, len(sampled))), size[0], size[1], dpi)
+    if file_type == "image":
+        from PIL import Image
+        with Image.open(file_path) as img:
+            dpi = (img.info.get("dpi") or (None,))[0]
+            return DocInfo(img.n_frames if _multipage_tiff(img) else 1, 0, img.width, img.height,
+                           float(dpi) if dpi else None)
+    return None
+
+
+def _doc_load(info: DocInfo) -> float:
+    """Weighted page count: OCR'd pages in full, text-layer pages at a fraction."""
+    return info.ocr_pages + _TEXT_PAGE_WEIGHT * info.text_pages
+
+
+def _estimate_request_cost(file_type: str, file_size_kb: Optional[int],
+                           info: Optional[DocInfo] = None) -> int:
+    """Pre-cost estimate used for upfront confirmation on heavy files: from the
+    inspected pages when there is a DocInfo, else roughly from the file size."""
+    if info is not None:
+        credits = -(-_doc_load(info) // _COST_PAGES_PER_CREDIT)
+        return int(min(_COST_MAX_CREDITS, max(1, credits)))
     size = int(file_size_kb or 0)
     if file_type == "pdf":
         if size >= 5000:
@@ -1546,18 +2867,20 @@ def build_onboarding_keyboard(update: Update) -> InlineKeyboardMarkup:
         [InlineKeyboardButton(t(update, "onboarding_support_button"), callback_data="onb:support")],
     ])
 
-def build_language_keyboard(update: Update, detected_locale, recent=None) -> InlineKeyboardMarkup:
+def build_language_keyboard(update: Update, detected_locale, recent=None,
+                            job_id="") -> InlineKeyboardMarkup:
     """Inline keyboard: detected language pinned first (if recognized), then the
     user's recently-used languages, then the curated target-market languages,
     2 per row, de-duplicated. No typing required — built for screen-reader users
-    who navigate by tapping buttons."""
+    who navigate by tapping buttons. Each button carries `job_id`, the OCR job
+    it reads."""
     rows = []
     seen = set()
     if detected_locale in VOICE_MAP:
         info = VOICE_MAP[detected_locale]
         rows.append([InlineKeyboardButton(
             t(update, "detected_choice").format(lang=f'{info["flag"]} {info["name"]}'),
-            callback_data=f"lang:{detected_locale}")])
+            callback_data=f"lang:{detected_locale}:{job_id}")])
         seen.add(detected_locale)
     ordered = []
     for code in (list(recent or []) + MENU_LANGS):
@@ -1567,7 +2890,7 @@ def build_language_keyboard(update: Update, detected_locale, recent=None) -> Inl
     row = []
     for code in ordered:
         info = VOICE_MAP[code]
-        row.append(InlineKeyboardButton(f'{info["flag"]} {info["name"]}', callback_data=f"lang:{code}"))
+        row.append(InlineKeyboardButton(f'{info["flag"]} {info["name"]}', callback_data=f"lang:{code}:{job_id}"))
         if len(row) == 2:
             rows.append(row)
             row = []
@@ -1576,6 +2899,601 @@ def build_language_keyboard(update: Update, detected_locale, recent=None) -> Inl
     return InlineKeyboardMarkup(rows)
 
 
+# --- Digital PDF text layer ---
+# A born-digital PDF already carries exact text; Azure Read would only bill
+# for it page by page and take seconds to return it. A page's text layer
+# stands in for OCR unless the page looks scanned: an image covering most of
+# it, a rotated page, text that is mostly unmappable glyphs (a font without
+# a usable ToUnicode map), or ink the layer's words don't cover (text inside
+# a figure). Those pages alone go to Azure Read (`pages=`), and the two are
+# merged into one Azure-shaped result in page order, so language detection,
+# the ink scan and the rescue all work on it unchanged.
+_TEXT_LAYER_SCAN_IMAGE_SHARE = 0.9   # page area under images that means "scanned"
+_TEXT_LAYER_MAX_GARBAGE = 0.02       # share of unmappable / private-use glyphs
+_TEXT_LAYER_MIN_LETTER_SHARE = 0.4   # letters among the layer's non-space chars
+_TEXT_LAYER_CHECK_DPI = 72           # render DPI for the ink-coverage check
+
+
+class _Span(NamedTuple):
+    offset: int
+    length: int
+
+
+class _ReadLine(NamedTuple):
+    content: str
+    polygon: list
+    spans: list
+
+
+class _ReadPage(NamedTuple):
+    """An Azure Read page stand-in; coordinates in the page's own units."""
+    page_number: int
+    width: float
+    height: float
+    lines: list
+    words: list
+
+
+class _ReadLanguage(NamedTuple):
+    locale: str
+    confidence: float
+    spans: list
+
+
+class _MergedRead(NamedTuple):
+    content: str
+    pages: list
+    languages: list
+
+
+# Glyphs a text layer yields when it can't map a font to Unicode: controls,
+# the replacement character, private-use code points, lone surrogates.
+_TEXT_LAYER_GARBAGE = re.compile(
+    '[\x00-\x1f\x7f-\x9f\ufffd\ue000-\uf8ff\ud800-\udfff\U000f0000-\U0010ffff]')
+_NOT_LETTER = re.compile(r'[\W\d_]')
+
+
+def _text_layer_page(page):
+    """A PyMuPDF page's text layer as a _ReadPage, or None when the page has
+    to be OCR'd (see the section comment). Line boxes double as the page's
+    word boxes — the ink scan only needs the area they cover. Blocking."""
+    import numpy as np
+    import fitz
+    if page.rotation:
+        return None
+    rect = page.rect
+    images = ([fitz.Rect(info["bbox"]) & rect for info in page.get_image_info()]
+              if page.get_images() else [])
+    if (sum(r.width * r.height for r in images)
+            >= _TEXT_LAYER_SCAN_IMAGE_SHARE * ((rect.width * rect.height) or 1.0)):
+        return None
+    words = page.get_text("words")
+    chars = "".join(w[4] for w in words)
+    n = len(chars)
+    if (not n  # image-only, blank, or text drawn as outlines: let OCR decide
+            or len(_TEXT_LAYER_GARBAGE.findall(chars)) > _TEXT_LAYER_MAX_GARBAGE * n
+            or len(_NOT_LETTER.sub("", chars)) < _TEXT_LAYER_MIN_LETTER_SHARE * n):
+        return None
+    grouped = {}
+    for w in words:
+        grouped.setdefault((w[5], w[6]), []).append(w)
+    lines = []
+    for ws in grouped.values():
+        x0, y0 = min(w[0] for w in ws), min(w[1] for w in ws)
+        x1, y1 = max(w[2] for w in ws), max(w[3] for w in ws)
+        lines.append(_ReadLine(" ".join(w[4] for w in ws),
+                               [x0, y0, x1, y0, x1, y1, x0, y1], []))
+    out = _ReadPage(page.number + 1, rect.width, rect.height, lines, lines)
+    if images:
+        pix = page.get_pixmap(dpi=_TEXT_LAYER_CHECK_DPI, colorspace=fitz.csGRAY)
+        ink = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.stride)
+        ink = ink[:, :pix.width] < INK_DARK_THRESHOLD
+        if _page_unread_fraction(ink, out) >= UNREAD_INK_MIN_FRACTION:
+            return None
+    return out
+
+
+def _pdf_text_layer(file_path, renders=None):
+    """Per page, the text layer as a _ReadPage or None where it can't stand
+    in for OCR. Uses the job's _PdfRenders document when given. Blocking."""
+    if renders is not None:
+        return renders.text_layer()
+    import fitz
+    with fitz.open(file_path) as doc:
+        if not doc.is_pdf:
+            return [None] * doc.page_count
+        return [_text_layer_page(page) for page in doc]
+
+
+def _page_ranges(indices):
+    """0-based page indices as Azure's 1-based `pages` spec, e.g. "1,3-5"."""
+    out, start = [], None
+    for k, i in enumerate(indices):
+        if start is None:
+            start = i
+        if k + 1 == len(indices) or indices[k + 1] != i + 1:
+            out.append(f"{start + 1}" if start == i else f"{start + 1}-{i + 1}")
+            start = None
+    return ",".join(out)
+
+
+def _merge_read(layer, azure, azure_indices, skipped=None):
+    """One Azure-Read-shaped result for the whole PDF: layer pages where
+    `layer` has them, else the Azure page read for that index (Azure was sent
+    only `azure_indices`). Lines are laid out page after page, each ending in
+    a newline, with line and language spans re-based onto the merged content.
+    A `layer` entry may also be a one-page _MergedRead (a page from the page
+    cache), whose own language spans are re-based along with Azure's.
+
+    A page in `skipped` (index -> the index it duplicates, or None if blank)
+    keeps its place with no text, so page indices still line up with the
+    document for the ink scan; a duplicate carries its original's word boxes."""
+    import bisect
+    azure_pages = list(getattr(azure, "pages", None) or [])
+    numbers = [getattr(p, "page_number", None) for p in azure_pages]
+    if all(isinstance(n, int) for n in numbers):
+        by_index = {n - 1: p for n, p in zip(numbers, azure_pages)}
+    else:
+        by_index = dict(zip(azure_indices, azure_pages))
+    content, pages, moved = [], [], []   # moved: (old offset, length, new offset)
+    sources = [(getattr(azure, "languages", None) or [], moved)]
+    pos = 0
+    skipped = skipped or {}
+    for i, lp in enumerate(layer):
+        if i in skipped:
+            orig = pages[skipped[i]] if skipped[i] is not None else None
+            pages.append(_ReadPage(i + 1, orig.width if orig else 1.0,
+                                   orig.height if orig else 1.0, [],
+                                   orig.words if orig else []))
+            continue
+        track = moved if lp is None else None
+        if isinstance(lp, _MergedRead):
+            track = []
+            sources.append((lp.languages, track))
+            lp = lp.pages[0]
+        src = lp if lp is not None else by_index.get(i)
+        if src is None:
+            pages.append(_ReadPage(i + 1, 1.0, 1.0, [], []))
+            continue
+        lines = []
+        for line in src.lines:
+            text = line.content
+            old = getattr(line, "spans", None) or []
+            if track is not None and old:
+                track.append((old[0].offset, len(text), pos))
+            lines.append(_ReadLine(text, getattr(line, "polygon", None) or [],
+                                   [_Span(pos, len(text))]))
+            content.append(text + "\n")
+            pos += len(text) + 1
+        pages.append(_ReadPage(i + 1, src.width, src.height, lines,
+                               list(getattr(src, "words", None) or [])))
+    languages = []
+    for langs, moves in sources:
+        moves.sort()
+        starts = [m[0] for m in moves]
+        for lang in langs:
+            spans = []
+            for s in (lang.spans or []):
+                a, b = s.offset or 0, (s.offset or 0) + (s.length or 0)
+                k = max(0, bisect.bisect_right(starts, a) - 1)
+                while k < len(moves) and moves[k][0] < b:
+                    old, n, new = moves[k]
+                    lo, hi = max(a, old), min(b, old + n)
+                    if lo < hi:
+                        spans.append(_Span(new + lo - old, hi - lo))
+                    k += 1
+            if spans:
+                languages.append(_ReadLanguage(lang.locale, lang.confidence, spans))
+    return _MergedRead("".join(content), pages, languages)
+
+
+# --- Blank / duplicate page pre-screen ---
+# Scanned PDFs carry blank separator pages and pages scanned twice, each billed
+# by Azure Read. A low-DPI render catches blanks before OCR: a page is blank
+# when almost nothing inside its margins is clearly darker than its paper.
+# Repeats are only dropped with PDF_PRESCREEN=dupes, since a wrongly dropped
+# page loses text while a repeat only costs a page. A coarse difference hash
+# picks candidates, and a candidate's ink must match within a pixel in every
+# block at 48 DPI and then again at _PRESCREEN_CONFIRM_DPI: two invoice pages
+# differing only in an amount look the same at 48 DPI, but not at 150.
+_PRESCREEN_DPI = 48
+_PRESCREEN_MARGIN = 0.04          # of each side, ignored (scanner edges, punch holes)
+_PRESCREEN_INK_DELTA = 48         # gray levels below the paper's median that count as ink
+_PRESCREEN_BLANK_MAX_INK = 0.0005 # ink share at or below which a page is blank
+_PRESCREEN_HASH = 32
+_PRESCREEN_HASH_DEADBAND = 4      # gray levels; flat paper hashes to 0 bits, not to noise
+_PRESCREEN_CANDIDATE_BITS = 24    # of the 1024-bit hash
+_PRESCREEN_BLOCK = 16             # px at _PRESCREEN_DPI (~8 mm)
+_PRESCREEN_BLOCK_MAX_DIFF = 3     # unmatched ink px in any one block
+_PRESCREEN_CONFIRM_DPI = 150
+_PRESCREEN_CONFIRM_BLOCK = 24     # px at _PRESCREEN_CONFIRM_DPI (~4 mm, a digit or two)
+
+
+def _page_fingerprint(gray):
+    """(is_blank, 1024-bit difference hash, ink mask) of a low-DPI grayscale page."""
+    import numpy as np
+    from PIL import Image
+    w, h = gray.size
+    mx, my = int(w * _PRESCREEN_MARGIN), int(h * _PRESCREEN_MARGIN)
+    gray = gray.crop((mx, my, w - mx, h - my))
+    a = np.asarray(gray, dtype=np.int16)
+    ink = a < int(np.median(a)) - _PRESCREEN_INK_DELTA
+    blank = np.count_nonzero(ink) <= _PRESCREEN_BLANK_MAX_INK * a.size
+    small = np.asarray(gray.resize((_PRESCREEN_HASH + 1, _PRESCREEN_HASH), Image.BOX),
+                       dtype=np.int16)
+    return blank, (small[:, 1:] - small[:, :-1] > _PRESCREEN_HASH_DEADBAND).ravel(), ink
+
+
+def _dilate1(mask):
+    """`mask` grown by one pixel in all eight directions."""
+    d = mask.copy()
+    d[1:] |= mask[:-1]
+    d[:-1] |= mask[1:]
+    out = d.copy()
+    out[:, 1:] |= d[:, :-1]
+    out[:, :-1] |= d[:, 1:]
+    return out
+
+
+def _same_ink(a, b, n=_PRESCREEN_BLOCK):
+    """True when ink masks `a` and `b` agree to within a pixel's shift in every
+    n-pixel square."""
+    import numpy as np
+    if a.shape != b.shape:
+        return False
+    unmatched = (a & ~_dilate1(b)) | (b & ~_dilate1(a))
+    h, w = (unmatched.shape[0] + n - 1) // n * n, (unmatched.shape[1] + n - 1) // n * n
+    padded = np.zeros((h, w), dtype=np.int32)
+    padded[:unmatched.shape[0], :unmatched.shape[1]] = unmatched
+    return int(padded.reshape(h // n, n, w // n, n).sum(axis=(1, 3)).max()) <= _PRESCREEN_BLOCK_MAX_DIFF
+
+
+def _same_page(renders, i, j):
+    """True when pages i and j have the same ink at _PRESCREEN_CONFIRM_DPI —
+    the check a low-DPI match must pass before page i is dropped. Blocking."""
+    _, _, a = _page_fingerprint(renders.gray(i, _PRESCREEN_CONFIRM_DPI))
+    _, _, b = _page_fingerprint(renders.gray(j, _PRESCREEN_CONFIRM_DPI))
+    return _same_ink(a, b, _PRESCREEN_CONFIRM_BLOCK)
+
+
+def _prescreen_pages(file_path, renders, indices, dupes=None):
+    """Pages among `indices` that needn't be OCR'd: {index: None} for a blank
+    page and, with `dupes` (default: PDF_PRESCREEN=dupes), {index: earlier
+    index} for a repeat of a page that is kept. Blocking."""
+    import numpy as np
+    if dupes is None:
+        dupes = PDF_PRESCREEN == "dupes"
+    own = renders is None
+    if own:
+        renders = _PdfRenders(file_path)
+    try:
+        skipped, kept, hashes, masks = {}, [], [], []
+        for i in indices:
+            page = renders.gray(i, _PRESCREEN_DPI)
+            blank, bits, ink = _page_fingerprint(page)
+            if blank:
+                skipped[i] = None
+                continue
+            if not dupes:
+                continue
+            if hashes:
+                diff = np.count_nonzero(np.asarray(hashes) != bits, axis=1)
+                for j in np.argsort(diff, kind="stable"):
+                    if diff[j] > _PRESCREEN_CANDIDATE_BITS:
+                        break
+                    packed, shape = masks[j]
+                    mask = np.unpackbits(packed, count=shape[0] * shape[1]).reshape(shape)
+                    if _same_ink(ink, mask.astype(bool)) and _same_page(renders, i, kept[j]):
+                        skipped[i] = kept[j]
+                        break
+                if i in skipped:
+                    continue
+            kept.append(i)
+            hashes.append(bits)
+            masks.append((np.packbits(ink), ink.shape))  # 1 bit/px: long scans stay small
+        return skipped
+    finally:
+        if own:
+            renders.close()
+
+
+# --- Page-level OCR cache ---
+# The same chapter comes back as a different PDF — another page range, a
+# re-export, a page added — so a whole-file hash never matches, but the scanned
+# pages inside are the same objects. Every page Azure Read reads is kept here,
+# keyed by what the page draws (see _page_digest) and the locale hint it was
+# read with, and a later document's matching pages are stitched in from the
+# cache instead of being sent. The key is read from the PDF's objects, not a
+# render, so the cache costs no rasterizing; a re-export that re-encodes its
+# scans simply misses. Like a text-layer page, a cached page keeps its line
+# boxes as its word boxes: the ink scan only needs the area they cover, and
+# lines are a fraction of the memory. In-process, least recently used evicted
+# first.
+PAGE_CACHE_MAX_PAGES = int(os.environ.get("PAGE_CACHE_MAX_PAGES", "1000"))
+_PAGE_CACHE_DPI = 96   # render DPI of the key for documents that aren't PDFs
+
+
+class _PageCache:
+    """One-page _MergedReads by page key, evicting the least recently used past
+    `max_pages`. Thread-safe: it's used from the Azure Read worker threads."""
+
+    def __init__(self, max_pages):
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def get(self, key):
+        with self._lock:
+            self.lookups += 1
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+            return page
+
+    def put(self, key, page):
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+
+_page_cache = _PageCache(PAGE_CACHE_MAX_PAGES)
+
+
+def _page_digest(doc, i):
+    """Hash of what page i of an open PyMuPDF document draws: for a PDF its box,
+    rotation and content stream plus the raw images, forms and fonts it uses;
+    for any other document (a TIFF's frames) its grayscale render."""
+    import hashlib
+    import fitz
+    page = doc[i]
+    h = hashlib.sha256()
+    if not doc.is_pdf:
+        pm = page.get_pixmap(dpi=_PAGE_CACHE_DPI, colorspace=fitz.csGRAY)
+        h.update(f"{pm.width}x{pm.height}:".encode())
+        h.update(pm.samples)
+        return h.hexdigest()
+    h.update(f"{tuple(page.rect)} {page.rotation}:".encode())
+    h.update(page.read_contents())
+    for img in page.get_images(full=True):
+        h.update(f":{img[7]}:".encode())
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+        if img[1]:
+            h.update(doc.xref_stream_raw(img[1]) or b"")  # soft mask
+    for xref, name, *_ in page.get_xobjects():
+        h.update(f":{name}:".encode())
+        h.update(doc.xref_stream_raw(xref) or b"")
+    for font in page.get_fonts(full=True):
+        h.update(repr(font[1:6]).encode())  # subset-tagged name tells subsets apart
+    return h.hexdigest()
+
+
+def _page_keys(file_path, renders, indices, locale):
+    """{index: cache key} for the pages among `indices`. Blocking."""
+    if renders is not None:
+        digests = renders.digests(indices)
+    else:
+        import fitz
+        with fitz.open(file_path) as doc:
+            digests = [_page_digest(doc, i) for i in indices]
+    return {i: f"{locale or ''}:{d}" for i, d in zip(indices, digests)}
+
+
+def _page_read(result, p):
+    """Page p of an Azure-Read-shaped result as a one-page _MergedRead, with the
+    language spans on its lines re-based to its own text and its line boxes
+    standing in for its words."""
+    page = result.pages[p]
+    lines = list(page.lines or [])
+    boxes = [_ReadLine("", getattr(line, "polygon", None) or [], []) for line in lines]
+    one = _ReadPage(1, page.width, page.height, lines, boxes)
+    return _merge_read([None], _MergedRead(None, [one], result.languages), [0])
+
+
+def _cache_pages(result, keys):
+    """Store the pages of `result` that `keys` ({index: key}) names."""
+    for i, key in keys.items():
+        if i < len(result.pages):
+            _page_cache.put(key, _page_read(result, i))
+
+
+def _pdf_page_count(file_path, renders) -> int:
+    if renders is not None:
+        return renders.page_count
+    import fitz
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def _pdf_read_plan(file_path, renders, pinned_lang, keys=None):
+    """What Azure Read must see of a PDF: (layer, todo, skipped) — the text
+    layer per page (None where OCR is needed), the page indices to send, and
+    the pre-screen's skipped pages — or None to send the whole file as-is.
+    Pages found in the page cache are in `layer` as one-page _MergedReads;
+    `keys` (a dict), when given, is filled with the cache key of every page
+    left for Azure Read. Blocking."""
+    layer = None
+    if PDF_TEXT_LAYER != "off":
+        try:
+            layer = _pdf_text_layer(file_path, renders)
+        except Exception as ex:
+            logger.warning(f"PDF text layer read failed, using Azure Read: {ex!r}")
+    if layer is None:
+        layer = [None] * _pdf_page_count(file_path, renders)
+    todo = [i for i, p in enumerate(layer) if p is None]
+    skipped = {}
+    if len(todo) > 1 and PDF_PRESCREEN != "off":
+        try:
+            skipped = _prescreen_pages(file_path, renders, todo)
+        except Exception as ex:
+            logger.warning(f"PDF page pre-screen failed, sending every page: {ex!r}")
+        todo = [i for i in todo if i not in skipped]
+    cached = 0
+    if todo and keys is not None and PAGE_CACHE != "off":
+        try:
+            locale = pinned_lang if pinned_lang in OCR_LOCALE_HINT_LANGS else None
+            keys.update(_page_keys(file_path, renders, todo, locale))
+        except Exception as ex:
+            logger.warning(f"page cache keys failed, reading every page: {ex!r}")
+        for i in todo:
+            hit = _page_cache.get(keys[i]) if i in keys else None
+            if hit is not None:
+                layer[i] = hit
+                del keys[i]
+                cached += 1
+        todo = [i for i in todo if layer[i] is None]
+        if keys or cached:
+            logger.info(f"Page cache: {cached} of {cached + len(keys)} pages hit; "
+                        f"{_page_cache.hits}/{_page_cache.lookups} "
+                        f"({_page_cache.hits / _page_cache.lookups:.0%}) since start")
+    digital = [i for i, p in enumerate(layer) if isinstance(p, _ReadPage)]
+    if not digital and not skipped and not cached:
+        return None
+    if digital and not todo and not cached and not pinned_lang and not detect_script_language(
+            "\n".join(l.content for i in digital for l in layer[i].lines)):
+        # Language detection is Azure's: have it read one page (the wordiest)
+        # when neither a pin nor the script settles it.
+        sample = max(digital, key=lambda i: sum(len(l.content) for l in layer[i].lines))
+        layer[sample], todo = None, [sample]
+    blank = sum(1 for j in skipped.values() if j is None)
+    logger.info(f"PDF read plan: {len(layer)} pages — {len(layer) - len(todo) - len(skipped) - cached} "
+                f"from the text layer, "
+                f"{cached} from the page cache, {blank} blank and {len(skipped) - blank} "
+                f"duplicate skipped, {len(todo)} sent to Azure Read")
+    return layer, todo, skipped
+
+
+# --- Azure Read upload preparation ---
+# Azure Read is sent image files byte for byte, and a 15 MB BMP or PNG spends
+# longer on the container's uplink than in OCR. Images past READ_UPLOAD_MIN_KB
+# are decoded (a JPEG in draft mode, at a fraction of its size), scaled down
+# until a text line is ~READ_TARGET_LINE_PX tall — comfortably above what Read
+# needs — and re-encoded as JPEG. The file goes up as-is when that wouldn't
+# save _READ_UPLOAD_MIN_SAVING of it, and always for a multi-page TIFF or a
+# photo turned by its EXIF tag (the boxes Read returns must fit the file the
+# ink scan reads). Defaults checked with qa/tune_read_upload.py (CER vs the
+# qa/ corpus).
+READ_UPLOAD_OPTIMIZE = os.environ.get("READ_UPLOAD_OPTIMIZE", "on").strip().lower()  # on | off
+READ_UPLOAD_MIN_KB = int(os.environ.get("READ_UPLOAD_MIN_KB", "1024"))
+READ_TARGET_LINE_PX = int(os.environ.get("READ_TARGET_LINE_PX", "40"))
+READ_UPLOAD_QUALITY = int(os.environ.get("READ_UPLOAD_QUALITY", "85"))
+_READ_UPLOAD_MIN_SAVING = 0.25
+_READ_MEASURE_MAX_DIM = 2400     # px; the line height is measured on a view this size
+
+
+def _read_upload(file_path):
+    """The bytes to send Azure Read for an image file, or None to send the
+    file as-is (see the section comment). Blocking."""
+    import io
+    import math
+    from PIL import Image
+    size = os.path.getsize(file_path)
+    if size < READ_UPLOAD_MIN_KB * 1024:
+        return None
+    with Image.open(file_path) as img:
+        if _multipage_tiff(img) or img.getexif().get(0x0112, 1) != 1:
+            return None
+        W, H = img.size
+        shrink = max(W, H) / _READ_MEASURE_MAX_DIM
+        if img.format == "JPEG" and shrink > 1:
+            img.draft("L", (math.ceil(W / shrink), math.ceil(H / shrink)))
+        gray = img.convert("L")
+        k = math.ceil(max(gray.size) / _READ_MEASURE_MAX_DIM)
+        if k > 1:
+            gray = gray.reduce(k)
+        line = _text_line_height(gray)
+    scale = min(1.0, READ_TARGET_LINE_PX / (line * W / gray.width)) if line else 1.0
+    w, h = max(1, int(W * scale)), max(1, int(H * scale))
+    with Image.open(file_path) as img:
+        if img.format == "JPEG" and scale <= 0.5:
+            img.draft(img.mode, (w, h))
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            rgba = img.convert("RGBA")
+            out = Image.new("RGB", rgba.size, "white")
+            out.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            out = img.convert("RGB") if img.mode not in ("L", "RGB") else img.copy()
+    if out.mode != "L" and _is_near_gray(out):
+        out = out.convert("L")
+    if out.size != (w, h):
+        out = out.resize((w, h), Image.LANCZOS)
+    buf = io.BytesIO()
+    out.save(buf, format="JPEG", quality=READ_UPLOAD_QUALITY, optimize=True)
+    data = buf.getvalue()
+    return data if len(data) <= (1 - _READ_UPLOAD_MIN_SAVING) * size else None
+
+
+# --- Running header / footer / page-number stripping ---
+# Multi-page documents repeat a header, a footer and a page number on every
+# page; voiced, they cost TTS characters and minutes of audio. A line is one of
+# them when it sits in the top or bottom band of its page and its text, with
+# digit runs folded together ("Page 3 of 9" = "Page 12 of 9"), recurs there on
+# enough of the pages. A text seen more than once in one page's band (a table's
+# first row of figures) is never counted for that page.
+_BOILERPLATE_BAND = 0.12        # of the page height, at the top and at the bottom
+_BOILERPLATE_MIN_PAGES = 3      # pages with text, and pages a line must recur on
+_BOILERPLATE_MIN_SHARE = 0.4    # of the pages with text (even/odd headers alternate)
+_BOILERPLATE_DIGITS = re.compile(r'\d+')
+
+
+def _boilerplate_lines(pages):
+    """{(page index, line index)} of the running headers, footers and page
+    numbers among an Azure-Read-shaped result's pages."""
+    found, count, texted = {}, {}, 0
+    for p, page in enumerate(pages):
+        lines = getattr(page, "lines", None) or []
+        if lines:
+            texted += 1
+        height = getattr(page, "height", None)
+        if not lines or not height:
+            continue
+        keyed = {}
+        for k, line in enumerate(lines):
+            ys = (getattr(line, "polygon", None) or [])[1::2]
+            if not ys or not any(c.isalnum() for c in line.content):
+                continue
+            y = (min(ys) + max(ys)) / 2 / height
+            if _BOILERPLATE_BAND <= y <= 1 - _BOILERPLATE_BAND:
+                continue
+            text = _BOILERPLATE_DIGITS.sub("#", " ".join(line.content.lower().split()))
+            keyed.setdefault((y < 0.5, text), []).append(k)
+        for key, ks in keyed.items():
+            if len(ks) == 1:
+                found.setdefault(key, []).append((p, ks[0]))
+                count[key] = count.get(key, 0) + 1
+    if texted < _BOILERPLATE_MIN_PAGES:
+        return set()
+    need = max(_BOILERPLATE_MIN_PAGES, _BOILERPLATE_MIN_SHARE * texted)
+    return {pk for key, n in count.items() if n >= need for pk in found[key]}
+
+
+def _strip_boilerplate(result):
+    """(result without its boilerplate lines, characters removed). The result
+    comes back unchanged when there is nothing to strip, else as a _MergedRead
+    with the language spans re-based; word boxes are kept for the ink scan."""
+    pages = list(getattr(result, "pages", None) or [])
+    drop = _boilerplate_lines(pages)
+    if not drop:
+        return result, 0
+    kept, removed = [], 0
+    for p, page in enumerate(pages):
+        lines = []
+        for k, line in enumerate(page.lines or []):
+            if (p, k) in drop:
+                removed += len(line.content) + 1
+            else:
+                lines.append(line)
+        kept.append(_ReadPage(p + 1, page.width, page.height, lines,
+                              list(getattr(page, "words", None) or [])))
+    stripped = _merge_read([None] * len(kept), _MergedRead(None, kept, result.languages),
+                           range(len(kept)))
+    return stripped, removed
+
+
 class OcrResult(NamedTuple):
     """Result of OCR + content-language detection — the bot's core extraction
     step decoupled from Telegram, so it can be reused (e.g. by the qa toolkit)."""
@@ -1589,24 +3507,21 @@ class OcrResult(NamedTuple):
     # Ordered (locale2, text) spans for a multilingual page, else None. When set,
     # synthesis reads each span with its own voice instead of one voice for all.
     segments: Optional[list] = None
-
-
-def extract_text(file_path: str, file_type: str, pinned_lang: str = None) -> OcrResult:
-    """Run OCR and detect the content language for a local file.
-
-    Mirrors what the bot does in handle_file, without Telegram coupling:
-    pinned_lang in FALLBACK_LANGS routes to the fallback OCR engine (no
-    detection); otherwise Azure Read extracts the text and the language is
-    inferred by script first, then by Azure's per-line detection.
-    """
-    if pinned_lang in FALLBACK_LANGS:
-        raw, raw_segments = run_fallback_ocr(file_path, file_type, pinned_lang)
-        text = normalize_ocr_text(raw or "")
-        if not text.strip():
-            return OcrResult("", None, None, 0.0, 0.0, None, True)
-        dominant, segments = _segments_from_raw(raw_segments, pinned_lang)
-        return OcrResult(text, None, dominant, 1.0, 1.0, None, True, segments)
-
+    # Pages Azure Read didn't have to bill: read from a PDF's text layer or the
+    # page cache, skipped as blank / duplicate by the pre-screen (see
+    # _pdf_read_plan), or read by the local engine (see run_local_ocr).
+    ocr_pages_saved: int = 0
+    # Characters of running headers, footers and page numbers left out of
+    # `text` (see _strip_boilerplate).
+    boilerplate_chars: int = 0
+
+
+def _azure_read(file_path: str, file_type: str, pinned_lang: str = None):
+    """The Azure Read half of extract_text: OCR, language detection and the
+    decision whether the LLM should re-read the file. Blocking — run it in a
+    thread. Returns (ocr_result, needs_rescue, renders, plan): `renders` is the
+    job's _PdfRenders (or None) for the LLM to reuse, which the caller closes;
+    `plan` is a _RegionPlan when only crops need re-reading, else None."""
     # A pinned language on the allowlist is passed to Azure Read as a locale hint,
     # which helps recognition on hard/degraded images. Omitted in the auto-detect
     # path (pinned_lang is None), where the language isn't known yet, and for
@@ -1614,9 +3529,83 @@ def extract_text(file_path: str, file_type: str, pinned_lang: str = None) -> Ocr
     analyze_kwargs = {"features": [DocumentAnalysisFeature.LANGUAGES]}
     if pinned_lang in OCR_LOCALE_HINT_LANGS:
         analyze_kwargs["locale"] = pinned_lang
-    with open(file_path, "rb") as f:
-        poller = doc_client.begin_analyze_document("prebuilt-read", f, **analyze_kwargs)
-        result = poller.result()
+    # The unread-ink scan below can only matter when the LLM could rescue; its
+    # rasterization doesn't need the OCR result, so start it now, in parallel.
+    # A PDF is opened once into `renders`, shared with the LLM if it rescues.
+    ink_prep = renders = None
+    if OCR_FALLBACK == "llm" and _azure_openai_configured():
+        renders = _PdfRenders(file_path) if file_type == "pdf" else None
+        ink_prep = _InkPrep(file_path, file_type, renders)
+    pages_saved = 0
+    page_keys = {}
+    try:
+        read_plan = (_pdf_read_plan(file_path, renders, pinned_lang, page_keys)
+                     if file_type == "pdf" else None)
+        if read_plan is not None:
+            layer, todo, skipped = read_plan
+            pages_saved = len(layer) - len(todo)
+            if (not todo and ink_prep is not None
+                    and not any(isinstance(p, _MergedRead) for p in layer)):
+                ink_prep.cancel()  # no page's text came from OCR; nothing to scan
+                ink_prep = None
+            azure = None
+            if todo:
+                _meter_azure_pages(len(todo))
+                with open(file_path, "rb") as f:
+                    poller = doc_client.begin_analyze_document(
+                        "prebuilt-read", f, pages=_page_ranges(todo), **analyze_kwargs)
+                    azure = poller.result()
+            result = _merge_read(layer, azure, todo, skipped)
+        else:
+            _meter_azure_pages(_pdf_page_count(file_path, renders) if file_type == "pdf" else 1)
+            upload = None
+            size = os.path.getsize(file_path)
+            considered = (file_type == "image" and READ_UPLOAD_OPTIMIZE != "off"
+                          and size >= READ_UPLOAD_MIN_KB * 1024)
+            if considered:
+                t_prep = time.monotonic()
+                try:
+                    upload = _read_upload(file_path)
+                except Exception as ex:
+                    logger.warning(f"Read upload re-encode failed, sending the file: {ex!r}")
+                prep_ms = round((time.monotonic() - t_prep) * 1000)
+            t_read = time.monotonic()
+            if upload is not None:
+                import io
+                poller = doc_client.begin_analyze_document(
+                    "prebuilt-read", io.BytesIO(upload), **analyze_kwargs)
+                result = poller.result()
+            else:
+                with open(file_path, "rb") as f:
+                    poller = doc_client.begin_analyze_document("prebuilt-read", f, **analyze_kwargs)
+                    result = poller.result()
+            if considered:
+                # Read time with and without the re-encode, for comparing uplinks.
+                sent = len(upload) if upload is not None else size
+                extra = f", re-encoded in {prep_ms} ms" if upload is not None else ", as-is"
+                logger.info(f"Azure Read upload: {sent} of {size} bytes{extra}, "
+                            f"read in {round((time.monotonic() - t_read) * 1000)} ms")
+    except Exception:
+        if ink_prep is not None:
+            ink_prep.cancel()
+        if renders is not None:
+            renders.close()
+        raise
+    if page_keys:
+        try:
+            _cache_pages(result, page_keys)
+        except Exception as ex:
+            logger.warning(f"page cache store failed: {ex!r}")
+    text_layer_only = isinstance(result, _MergedRead)
+    boilerplate_chars = 0
+    if STRIP_BOILERPLATE != "off":
+        try:
+            result, boilerplate_chars = _strip_boilerplate(result)
+        except Exception as ex:
+            logger.warning(f"boilerplate strip failed, keeping every line: {ex!r}")
+        if boilerplate_chars:
+            logger.info(f"Stripped {boilerplate_chars} chars of running headers/footers "
+                        f"from {len(result.pages)} pages")
     ocr_pages = len(result.pages)
     extracted_text = ""
     for page in result.pages:
@@ -1632,6 +3621,9 @@ def extract_text(file_path: str, file_type: str, pinned_lang: str = None) -> Ocr
             locale2, conf, coverage = script_lang, 1.0, 1.0
         else:
             locale2, conf, coverage = detect_dominant_language(result)
+            if locale2 is None and pinned_lang and text_layer_only:
+                # All text-layer: no Azure detection ran; the pin is the language.
+                locale2, conf, coverage = pinned_lang, 1.0, 1.0
 
     segments = build_language_segments(result, locale2) if locale2 else None
     suspect_segment = segments and any(
@@ -1654,23 +3646,532 @@ def extract_text(file_path: str, file_type: str, pinned_lang: str = None) -> Ocr
     # comes back as clean, confident English with the Georgian column simply
     # gone). Catch it by scanning the image for text-like ink Azure never
     # covered with a word box. Only worth the pixels when the LLM can rescue.
-    if (not needs_rescue and OCR_FALLBACK == "llm" and _azure_openai_configured()
-            and _ink_scan_eligible(file_type, ocr_pages)
-            and _unread_ink_fraction(file_path, file_type, result) >= UNREAD_INK_MIN_FRACTION):
-        needs_rescue = True
-
-    if needs_rescue:
-        if OCR_FALLBACK == "llm" and _azure_openai_configured():
-            raw, raw_segments = run_llm_ocr(file_path, file_type, pinned_lang)
+    # When this is the only red flag, Azure's own text is fine: plan to re-read
+    # just the ink it missed (see _RegionPlan) rather than whole pages.
+    plan = None
+    if ink_prep is not None:
+        if not needs_rescue and _ink_scan_eligible(file_type, ocr_pages):
+            unread = _unread_ink_fraction(file_path, file_type, result,
+                                          UNREAD_INK_MIN_FRACTION, prep=ink_prep)
+            needs_rescue = unread >= UNREAD_INK_MIN_FRACTION
+            if needs_rescue:
+                try:
+                    plan = _region_plan(result, ink_prep.pages() or [], locale2)
+                except Exception as ex:
+                    logger.warning(f"unread-ink region plan failed: {ex!r}")
+        else:
+            ink_prep.cancel()
+    if renders is not None and not needs_rescue:
+        renders.close()
+        renders = None
+
+    if not normalized_text.strip():
+        return (OcrResult("", ocr_pages, None, 0.0, 0.0, None, False,
+                          ocr_pages_saved=pages_saved), needs_rescue, renders, plan)
+    return (OcrResult(normalized_text, ocr_pages, locale2, conf, coverage, script_lang, False,
+                      segments, pages_saved, boilerplate_chars), needs_rescue, renders, plan)
+
+
+def _rescue_likelihood(prefs):
+    """How likely the user's next file is to need the LLM rescue: the moving
+    average of their past files, else the prior for their pinned language."""
+    try:
+        return float(prefs.get("rescue_rate"))
+    except (TypeError, ValueError):
+        lang = prefs.get("default_lang") or ""
+        return (_RESCUE_PRIOR_UNHINTED
+                if lang in VOICE_MAP and lang not in OCR_LOCALE_HINT_LANGS | FALLBACK_LANGS
+                else 0.0)
+
+
+def _next_rescue_rate(likelihood, rescued):
+    return likelihood + _RESCUE_RATE_ALPHA * (float(rescued) - likelihood)
+
+
+# Hedged-read outcomes since start, logged with every decision so the hit rate
+# and the vision input paid for by misses can be read off the logs when tuning
+# LLM_SPECULATE_MIN_LIKELIHOOD.
+_speculation_stats = {"runs": 0, "hits": 0, "wasted_kb": 0.0}
+
+
+def _log_speculation(hit, meter):
+    stats = _speculation_stats
+    stats["runs"] += 1
+    if hit:
+        stats["hits"] += 1
+        outcome = "hit"
+    else:
+        stats["wasted_kb"] += sum(meter) / 1024
+        outcome = f"miss, {sum(meter) / 1024:.0f} KB of vision input wasted"
+    logger.info(f"LLM speculation {outcome}; hit rate {stats['hits']}/{stats['runs']}, "
+                f"{stats['wasted_kb']:.0f} KB wasted in total")
+
+
+# --- Local OCR fast path ---
+# A clean, flat, high-contrast scan in a pinned Latin/Cyrillic language reads
+# about as well with Tesseract as with Azure Read, for free. Such images are
+# recognised by _image_quality: the weakest of edge sharpness, ink-to-paper
+# contrast, text line height and skew, each as a ratio to the level Tesseract
+# needs (1.0 = just enough). Past LOCAL_OCR_MIN_SCORE the image is read
+# locally in a process pool, and the text is kept only if Tesseract is
+# confident in it and no distinct script turns up; anything else goes to Azure
+# Read as before. Opt-in (needs pytesseract and the tesseract binary with the
+# _TESSERACT_LANGS packs); LOCAL_OCR_MIN_SCORE is calibrated against Azure's
+# CER with qa/calibrate_local_ocr.py.
+LOCAL_OCR = os.environ.get("LOCAL_OCR", "off").strip().lower()  # on | off (default)
+LOCAL_OCR_MIN_SCORE = float(os.environ.get("LOCAL_OCR_MIN_SCORE", "1.0"))
+LOCAL_OCR_MIN_CONF = float(os.environ.get("LOCAL_OCR_MIN_CONF", "85"))
+LOCAL_OCR_WORKERS = max(1, int(os.environ.get("LOCAL_OCR_WORKERS", "2")))
+_LOCAL_OCR_MIN_WORDS = 5
+_TESSERACT_LANGS = {"en": "eng", "uk": "ukr", "ru": "rus", "es": "spa", "de": "deu", "fr": "fra",
+                    "pl": "pol", "pt": "por", "it": "ita", "nl": "nld", "tr": "tur"}
+_QUALITY_MAX_DIM = 1600        # px; quality is measured on a view this size
+_QUALITY_LINE_PX = 24          # sharpness is measured with text lines this tall
+_QUALITY_MIN_SHARPNESS = 0.6   # steepest edges (p99 of the gradient) / contrast
+_QUALITY_MIN_CONTRAST = 100    # paper minus ink, gray levels
+_QUALITY_MIN_LINE_PX = 20      # text line height in the original image
+_QUALITY_MAX_SKEW = 1.0        # degrees
+_QUALITY_SKEW_STEP = 0.25
+
+
+class _ImageQuality(NamedTuple):
+    sharpness: float
+    contrast: float
+    skew: float                 # degrees, of the text lines
+    line_px: Optional[float]    # text line height in the original image
+    score: float                # the weakest of the four as a ratio to its minimum
+
+
+def _skew(ys, xs, step):
+    """(degrees, row profile) of text lines from their ink pixel coordinates:
+    the angle within ±5° whose shear stacks the ink into the sharpest row
+    profile, and that profile. Positive when lines fall to the right."""
+    import math
+    import numpy as np
+    best = None
+    for deg in np.arange(-5.0, 5.0 + 1e-9, step):
+        rows = np.round(ys - xs * math.tan(math.radians(deg))).astype(np.intp)
+        profile = np.bincount(rows - rows.min())
+        peak = float(np.dot(profile, profile))
+        if best is None or peak > best[0]:
+            best = (peak, float(deg), profile)
+    return best[1], best[2]
+
+
+def _image_quality(gray):
+    """_ImageQuality of a grayscale page (see the section comment)."""
+    import math
+    import numpy as np
+    from PIL import Image
+    k = max(1, math.ceil(max(gray.size) / _QUALITY_MAX_DIM))
+    view = gray.reduce(k) if k > 1 else gray
+    a = np.asarray(view, dtype=np.float32)
+    paper = float(np.median(a))
+    contrast = paper - float(np.percentile(a, 2))
+    ys, xs = np.nonzero(a < paper - contrast / 2)
+    if contrast <= 0 or not len(ys):
+        return _ImageQuality(0.0, max(0.0, contrast), 0.0, None, 0.0)
+    skew, profile = _skew(ys, xs, _QUALITY_SKEW_STEP)
+    inked = np.concatenate(([0], (profile > max(1, a.shape[1] // 500)).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(inked))
+    runs = edges[1::2] - edges[0::2]
+    runs = runs[runs >= 3]
+    line = float(np.median(runs)) if len(runs) >= 3 else None
+    if line is None:
+        return _ImageQuality(0.0, contrast, skew, None, 0.0)
+    if line > _QUALITY_LINE_PX:
+        s = _QUALITY_LINE_PX / line
+        a = np.asarray(view.resize((max(1, int(view.width * s)), max(1, int(view.height * s))),
+                                   Image.BOX), dtype=np.float32)
+    grad = np.maximum(np.abs(a[1:, 1:] - a[1:, :-1]), np.abs(a[1:, 1:] - a[:-1, 1:]))
+    sharpness = float(np.percentile(grad, 99)) / contrast
+    score = min(sharpness / _QUALITY_MIN_SHARPNESS, contrast / _QUALITY_MIN_CONTRAST,
+                line * k / _QUALITY_MIN_LINE_PX,
+                _QUALITY_MAX_SKEW / max(abs(skew), _QUALITY_SKEW_STEP))
+    return _ImageQuality(sharpness, contrast, skew, line * k, score)
+
+
+def _file_quality(file_path):
+    """_ImageQuality of an image file, upright per its EXIF tag. Blocking."""
+    from PIL import Image, ImageOps
+    with Image.open(file_path) as img:
+        return _image_quality(ImageOps.exif_transpose(img).convert("L"))
+
+
+def _tesseract_read(file_path, lang):
+    """(text, mean word confidence 0-100, word count) of an image read by
+    Tesseract with `lang` (e.g. "rus+eng"). Runs in _local_ocr_pool."""
+    import pytesseract
+    from PIL import Image, ImageOps
+    with Image.open(file_path) as img:
+        data = pytesseract.image_to_data(ImageOps.exif_transpose(img).convert("L"), lang=lang,
+                                         output_type=pytesseract.Output.DICT)
+    lines, weight, total = {}, 0.0, 0
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        weight += conf * len(word)
+        total += len(word)
+    text = "\n".join(" ".join(ws) for ws in lines.values())
+    return text, (weight / total if total else 0.0), sum(len(ws) for ws in lines.values())
+
+
+_local_pool = None
+
+
+def _local_ocr_pool():
+    global _local_pool
+    if _local_pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _local_pool = ProcessPoolExecutor(max_workers=LOCAL_OCR_WORKERS)
+    return _local_pool
+
+
+async def run_local_ocr(file_path, lang):
+    """OcrResult read locally for a clean image in pinned language `lang`, or
+    None when the image or Tesseract's reading of it isn't good enough."""
+    t0 = time.monotonic()
+    try:
+        quality = await asyncio.to_thread(_file_quality, file_path)
+        if quality.score < LOCAL_OCR_MIN_SCORE:
+            logger.info(f"Local OCR skipped: quality {quality.score:.2f} "
+                        f"(sharp={quality.sharpness:.2f} contrast={quality.contrast:.0f} "
+                        f"line={quality.line_px} skew={quality.skew:+.2f})")
+            return None
+        tess = _TESSERACT_LANGS[lang] + ("" if lang == "en" else "+eng")
+        raw, conf, words = await asyncio.get_running_loop().run_in_executor(
+            _local_ocr_pool(), _tesseract_read, file_path, tess)
+    except Exception as ex:
+        logger.warning(f"local OCR failed, using Azure Read: {ex!r}")
+        return None
+    text = normalize_ocr_text(raw)
+    ok = (words >= _LOCAL_OCR_MIN_WORDS and conf >= LOCAL_OCR_MIN_CONF
+          and not detect_script_language(text) and not _has_hidden_distinct_script(text, lang))
+    logger.info(f"Local OCR {'used' if ok else 'rejected'}: quality {quality.score:.2f}, "
+                f"conf {conf:.0f}, {words} words, {round((time.monotonic() - t0) * 1000)} ms")
+    if not ok:
+        return None
+    return OcrResult(text, 1, lang, conf / 100, 1.0, None, False, ocr_pages_saved=1)
+
+
+async def extract_text_async(file_path: str, file_type: str, pinned_lang: str = None,
+                             speculate: bool = False) -> OcrResult:
+    """Run OCR and detect the content language for a local file.
+
+    Mirrors what the bot does in handle_file, without Telegram coupling:
+    pinned_lang in FALLBACK_LANGS routes to the fallback OCR engine (no
+    detection); otherwise Azure Read extracts the text and the language is
+    inferred by script first, then by Azure's per-line detection. The Azure
+    half runs in a worker thread; the LLM call is awaited on the loop.
+
+    speculate (photos only) starts the whole-page LLM read alongside Azure
+    Read; it becomes the rescue if one is needed and is cancelled otherwise.
+
+    With LOCAL_OCR on, a clean image in a pinned language Tesseract knows is
+    read locally instead (see run_local_ocr), falling back to Azure Read.
+
+    A multi-page TIFF is read page by page like a PDF (see _paged_type).
+    """
+    file_type = _paged_type(file_path, file_type)
+    if pinned_lang in FALLBACK_LANGS:
+        raw, raw_segments = await run_fallback_ocr(file_path, file_type, pinned_lang)
+        text = normalize_ocr_text(raw or "")
+        if not text.strip():
+            return OcrResult("", None, None, 0.0, 0.0, None, True)
+        dominant, segments = _segments_from_raw(raw_segments, pinned_lang)
+        return OcrResult(text, None, dominant, 1.0, 1.0, None, True, segments)
+
+    if LOCAL_OCR == "on" and file_type == "image" and pinned_lang in _TESSERACT_LANGS:
+        local = await run_local_ocr(file_path, pinned_lang)
+        if local is not None:
+            return local
+
+    llm = OCR_FALLBACK == "llm" and _azure_openai_configured()
+    spec, meter = None, []
+    if speculate and llm and file_type == "image":
+        token = _llm_meter.set(meter)
+        spec = asyncio.create_task(run_llm_ocr(file_path, file_type, pinned_lang))
+        _llm_meter.reset(token)
+    renders = None
+    try:
+        ocr, needs_rescue, renders, plan = await asyncio.to_thread(
+            _azure_read, file_path, file_type, pinned_lang)
+        if needs_rescue and llm:
+            raw = raw_segments = None
+            if spec is not None:
+                try:
+                    raw, raw_segments = await spec
+                except Exception as ex:
+                    logger.error(f"speculative LLM OCR failed: {ex!r}")
+                _log_speculation(True, meter)
+                spec = None
+                if not (raw or "").strip():
+                    # A failed or empty hedge doesn't cost the file its rescue.
+                    logger.warning("speculative LLM read gave no text, reading again")
+            if not (raw or "").strip():
+                merged = None
+                if plan is not None:
+                    merged = await run_region_ocr(file_path, file_type, plan, renders)
+                if merged:
+                    text = normalize_ocr_text("\n\n".join(t for _, t in merged))
+                    if text.strip():
+                        dominant, rescued_segments = _segments_from_raw(
+                            merged, ocr.locale2 or pinned_lang or "en")
+                        # Azure's lines kept around the crops were stripped already.
+                        return OcrResult(text, ocr.ocr_pages, dominant, 1.0, 1.0, None, True,
+                                         rescued_segments, ocr.ocr_pages_saved,
+                                         ocr.boilerplate_chars)
+                raw, raw_segments = await run_llm_ocr(file_path, file_type, pinned_lang, renders)
             text = normalize_ocr_text(raw or "")
             if text.strip():
                 dominant, rescued_segments = _segments_from_raw(raw_segments, pinned_lang or "en")
-                return OcrResult(text, ocr_pages, dominant, 1.0, 1.0, None, True, rescued_segments)
-        if not normalized_text.strip():
-            return OcrResult("", ocr_pages, None, 0.0, 0.0, None, False)
+                return OcrResult(text, ocr.ocr_pages, dominant, 1.0, 1.0, None, True,
+                                 rescued_segments, ocr.ocr_pages_saved)
+    finally:
+        if spec is not None:
+            spec.cancel()
+            await asyncio.gather(spec, return_exceptions=True)
+            _log_speculation(False, meter)
+        if renders is not None:
+            renders.close()
+    return ocr
+
+
+def extract_text(file_path: str, file_type: str, pinned_lang: str = None) -> OcrResult:
+    """Blocking extract_text_async, for scripts outside an event loop (qa/run_ocr.py)."""
+    return asyncio.run(extract_text_async(file_path, file_type, pinned_lang))
+
+
+# --- Re-photographed page reuse ---
+# Unsure the first shot worked, a user often photographs the same page again
+# a minute later; every photo is a new file, so only the picture can tell.
+# Each photo's text block is fingerprinted (_photo_print): ink found against
+# the local paper tone, deskewed and cropped to its bounding box, kept at full
+# working resolution. A new photo that matches one of the user's last few
+# within PHOTO_REUSE_WINDOW_S reuses its OcrResult. False matches would read
+# the user the wrong page, so a match compares the ink itself. The shots are
+# registered first, which takes out framing and zoom: the scale and vertical
+# offset that line up their row profiles (ink per text row), then the
+# horizontal offset from their column profiles. Row profiles that don't line
+# up rule out another page cheaply; otherwise every glyph-sized block of one
+# shot's ink must be found in the other's, each tile of blocks allowed a
+# couple of pixels and each block one more. Ink is compared against the other
+# shot's faint ink, and only solid (2x2) unmatched ink counts: focus and noise
+# leave 1 px slivers along stroke edges, a changed letter leaves a patch.
+# The bars are set from re-shots of rendered forms (moved, zoomed ±5%,
+# tilted, dimmer, blurrier: none left more than a pixel) against copies with a
+# name changed by a letter (3 px or more). A changed digit can stay under
+# that — 5 and 6 differ by a pixel or two in a phone photo — so a read with
+# figures in it isn't remembered at all (_remember_photo): amounts, dates and
+# account numbers are what tell copies of one form apart. A shot at a
+# different perspective, or framed so another part of the page is cut off,
+# simply misses and is read again.
+PHOTO_REUSE = os.environ.get("PHOTO_REUSE", "on").strip().lower()  # on (default) | off
+PHOTO_REUSE_WINDOW_S = int(os.environ.get("PHOTO_REUSE_WINDOW_S", "120"))
+_PHOTO_RECENT = 3                  # photos per user kept for matching
+_PHOTO_WORK_DIM = 1600             # px; the photo is fingerprinted at this size
+_PHOTO_PAPER_BLOCK = 4             # px; paper tone is each block's lightest pixel, smoothed
+_PHOTO_INK_DELTA = 50              # gray levels below the local paper that count as ink
+_PHOTO_FAINT_DELTA = 30            # ... that count as faint ink (edges, blurred strokes)
+_PHOTO_MIN_INK = 0.002             # ink share below which there's nothing to match
+_PHOTO_SKEW_STEP = 0.1             # degrees
+_PHOTO_SKEW_SAMPLES = 50000        # ink pixels the deskew looks at
+_PHOTO_MARGIN = 0.02               # of the text block, kept around its bounding box
+_PHOTO_MAX_ZOOM = 0.08             # scale searched around the text blocks' height ratio
+_PHOTO_ZOOM_STEP = 0.001
+_PHOTO_MIN_ROWS_CORR = 0.95        # row profiles, registered
+_PHOTO_BLOCK = 24                  # px at _PHOTO_WORK_DIM (a digit or two)
+_PHOTO_TILE_BLOCKS = 4             # blocks per side of a tile, aligned as one
+_PHOTO_TILE_SHIFT = 2              # px each tile may move; a block a pixel more
+_PHOTO_BLOCK_MAX_DIFF = 1          # solid unmatched ink px in any one block
+_photo_reuse_stats = {"lookups": 0, "candidates": 0, "hits": 0}
+
+
+class _PhotoPrint(NamedTuple):
+    shape: tuple        # (H, W) of the text block, margin included
+    ink: object         # packed bits of the (H, W) ink mask
+    faint: object       # packed bits of the (H, W) faint-ink mask (a superset)
+    rows: object        # ink px per row
+    cols: object        # ink px per column
+    height: float       # text block height, px, without the margin
+
+
+def _photo_print(file_path) -> Optional[_PhotoPrint]:
+    """_PhotoPrint of a single-frame image, or None when there's too little
+    ink to match on. Blocking."""
+    import numpy as np
+    from PIL import Image, ImageFilter, ImageOps
+    with Image.open(file_path) as img:
+        if _multipage_tiff(img):
+            return None
+        gray = ImageOps.autocontrast(ImageOps.exif_transpose(img).convert("L"), cutoff=1)
+    s = min(1.0, _PHOTO_WORK_DIM / max(gray.size))
+    if s < 1.0:
+        gray = gray.resize((max(1, int(gray.width * s)), max(1, int(gray.height * s))), Image.BOX)
+    a = np.asarray(gray, dtype=np.int16)
+    H, W = a.shape
+    k = _PHOTO_PAPER_BLOCK
+    if H < 4 * k or W < 4 * k:
+        return None
+    # The paper under a stroke is taken from the lightest pixels around it, so
+    # dense text doesn't darken its own paper estimate.
+    top = a[:H // k * k, :W // k * k].reshape(H // k, k, W // k, k).max(axis=(1, 3))
+    top = Image.fromarray(top.astype(np.uint8)).filter(ImageFilter.BoxBlur(3))
+    paper = np.asarray(top.resize((W // k * k, H // k * k), Image.BILINEAR), dtype=np.int16)
+    paper = np.pad(paper, ((0, H - paper.shape[0]), (0, W - paper.shape[1])), mode="edge")
+    dark = np.clip(paper - a, 0, 255).astype(np.uint8)
+    ys, xs = np.nonzero(dark > _PHOTO_INK_DELTA)
+    if len(ys) < _PHOTO_MIN_INK * dark.size:
+        return None
+    step = max(1, len(ys) // _PHOTO_SKEW_SAMPLES)
+    skew, _ = _skew(ys[::step], xs[::step], _PHOTO_SKEW_STEP)
+    if skew:
+        dark = np.asarray(Image.fromarray(dark).rotate(skew, resample=Image.BILINEAR))  # levelling
+        ys, xs = np.nonzero(dark > _PHOTO_INK_DELTA)
+        if not len(ys):
+            return None
+    y0, y1 = np.percentile(ys, [0.5, 99.5])
+    x0, x1 = np.percentile(xs, [0.5, 99.5])
+    if y1 <= y0 or x1 <= x0:
+        return None
+    m = _PHOTO_MARGIN * max(x1 - x0, y1 - y0)
+    block = dark[max(0, int(y0 - m)):int(y1 + m) + 1, max(0, int(x0 - m)):int(x1 + m) + 1]
+    ink = block > _PHOTO_INK_DELTA
+    return _PhotoPrint(ink.shape, np.packbits(ink), np.packbits(block > _PHOTO_FAINT_DELTA),
+                       ink.sum(axis=1).astype(np.float64), ink.sum(axis=0).astype(np.float64),
+                       float(y1 - y0))
+
+
+def _unpack_mask(bits, shape):
+    import numpy as np
+    return np.unpackbits(bits, count=shape[0] * shape[1]).reshape(shape).astype(bool)
+
+
+def _profile_fit(p, q, scales):
+    """(correlation, scale, offset) that best lines up profile q with p, q
+    read at scale * i + offset for p's i."""
+    import numpy as np
+    pz = p - p.mean()
+    n = 1 << int(np.ceil(np.log2(len(p) + len(q) / scales.min() + 1)))
+    fp = np.conj(np.fft.rfft(pz, n))
+    best = (-1.0, 1.0, 0.0)
+    for s in scales:
+        qs = np.interp(np.arange(int(len(q) / s)) * s, np.arange(len(q)), q)
+        qz = qs - qs.mean()
+        e = float(np.sqrt(np.dot(pz, pz) * np.dot(qz, qz)))
+        if not e:
+            continue
+        c = np.fft.irfft(fp * np.fft.rfft(qz, n), n)  # c[k] = sum of p[i] * qs[i + k]
+        k = int(np.argmax(c))
+        if c[k] / e > best[0]:
+            best = (float(c[k] / e), float(s), (k if k < n // 2 else k - n) * float(s))
+    return best
+
+
+def _photo_diff(a: _PhotoPrint, b: _PhotoPrint, scale, dx, dy):
+    """Solid (2x2) ink px of the worst block that a and b, b registered onto
+    a by (scale, dx, dy), don't share. What's left of the registration (a
+    hair of tilt, lens distortion) is taken out per tile of several blocks,
+    each tile moving up to _PHOTO_TILE_SHIFT px; a block moves at most a
+    pixel more, so it can't slide a changed glyph onto its neighbour."""
+    import numpy as np
+    from PIL import Image
+    H, W = a.shape
+
+    def onto_a(bits):
+        img = Image.fromarray(_unpack_mask(bits, b.shape).astype(np.uint8) * 255)
+        return np.asarray(img.transform((W, H), Image.AFFINE, (scale, 0, dx, 0, scale, dy),
+                                        resample=Image.BILINEAR)) > 127
+
+    def solid(m):
+        out = np.zeros_like(m)
+        out[:-1, :-1] = m[:-1, :-1] & m[1:, :-1] & m[:-1, 1:] & m[1:, 1:]
+        return out
+
+    def sums(m, size):
+        padded = np.zeros((h, w), dtype=np.int32)
+        padded[:H, :W] = m
+        return padded.reshape(h // size, size, w // size, size).sum(axis=(1, 3))
+
+    ink_a, faint_a = _unpack_mask(a.ink, a.shape), _unpack_mask(a.faint, a.shape)
+    ink_b, faint_b = onto_a(b.ink), onto_a(b.faint)
+    n, t, r = _PHOTO_BLOCK, _PHOTO_BLOCK * _PHOTO_TILE_BLOCKS, _PHOTO_TILE_SHIFT
+    h, w = (H + t - 1) // t * t, (W + t - 1) // t * t
+    shifts = [(sy, sx) for sy in range(-r, r + 1) for sx in range(-r, r + 1)]
+    tiles, blocks = [], []
+    for sy, sx in shifts:
+        ink_s, faint_s = np.zeros_like(ink_b), np.zeros_like(faint_b)
+        dst = (slice(max(0, sy), H + min(0, sy)), slice(max(0, sx), W + min(0, sx)))
+        src = (slice(max(0, -sy), H + min(0, -sy)), slice(max(0, -sx), W + min(0, -sx)))
+        ink_s[dst], faint_s[dst] = ink_b[src], faint_b[src]
+        miss_a, miss_b = ink_a & ~faint_s, ink_s & ~faint_a
+        tiles.append(sums(miss_a, t) + sums(miss_b, t))
+        blocks.append(sums(solid(miss_a), n) + sums(solid(miss_b), n))
+    best = np.argmin(np.stack(tiles), axis=0)                   # per tile, index into shifts
+    k = _PHOTO_TILE_BLOCKS
+    near = np.array(shifts)[best].repeat(k, axis=0).repeat(k, axis=1)  # per block (y, x)
+    worst = np.full(near.shape[:2], np.iinfo(np.int32).max)
+    for (sy, sx), counts in zip(shifts, blocks):
+        ok = (np.abs(near[..., 0] - sy) <= 1) & (np.abs(near[..., 1] - sx) <= 1)
+        worst = np.where(ok, np.minimum(worst, counts), worst)
+    return int(worst.max())
+
+
+def _photo_match(a: _PhotoPrint, b: _PhotoPrint):
+    """(same page?, row profile correlation, worst block's unmatched ink px);
+    the px count is None when the row profiles already ruled b out."""
+    import numpy as np
+    guess = b.height / a.height
+    scales = guess * np.arange(1 - _PHOTO_MAX_ZOOM, 1 + _PHOTO_MAX_ZOOM + 1e-9, _PHOTO_ZOOM_STEP)
+    corr, scale, dy = _profile_fit(a.rows, b.rows, scales)
+    if corr < _PHOTO_MIN_ROWS_CORR:
+        return False, corr, None
+    _, _, dx = _profile_fit(a.cols, b.cols, np.array([scale]))
+    diff = _photo_diff(a, b, scale, dx, dy)
+    return diff <= _PHOTO_BLOCK_MAX_DIFF, corr, diff
+
+
+def _reused_photo(user_data, key, pp: _PhotoPrint) -> Optional[OcrResult]:
+    """The OcrResult of a recent photo from this user (`user_data`) of the
+    same page, read with the same `key` (the OCR hint), or None."""
+    now = time.monotonic()
+    recent = [r for r in user_data.get("recent_photos", ())
+              if now - r[0] <= PHOTO_REUSE_WINDOW_S]
+    user_data["recent_photos"] = recent
+    stats = _photo_reuse_stats
+    stats["lookups"] += 1
+    for _, k, other, ocr in reversed(recent):
+        if k != key:
+            continue
+        same, corr, diff = _photo_match(pp, other)
+        if diff is not None:
+            stats["candidates"] += 1
+            logger.info(f"Photo reuse {'hit' if same else 'rejected'}: rows {corr:.3f}, "
+                        f"{diff} px unmatched ink in the worst block")
+        if same:
+            stats["hits"] += 1
+            logger.info(f"Photo reuse totals: {stats['hits']}/{stats['lookups']} photos reused, "
+                        f"{stats['candidates'] - stats['hits']} candidates rejected")
+            return ocr._replace(ocr_pages_saved=ocr.ocr_pages or 1)
+    return None
+
 
-    return OcrResult(normalized_text, ocr_pages, locale2, conf, coverage,
-                     script_lang, False, segments)
+def _remember_photo(user_data, key, pp: _PhotoPrint, ocr: OcrResult) -> None:
+    """Keep `ocr` for re-shots of the photo — unless it read nothing or its
+    language was unsure: that's the shot a user retakes, and reusing it would
+    hand the retake the same failure. Nor when it has figures in it: a copy of
+    the page with one digit changed can pass _photo_match."""
+    if not ocr.text.strip() or not (ocr.segments or (
+            ocr.confidence >= AUTO_DETECT_MIN_CONFIDENCE
+            and ocr.coverage >= AUTO_DETECT_MIN_COVERAGE)):
+        return
+    if any(ch.isdigit() for ch in ocr.text):
+        return
+    recent = user_data.get("recent_photos") or []
+    user_data["recent_photos"] = (recent + [(time.monotonic(), key, pp, ocr)])[-_PHOTO_RECENT:]
 
 
 async def _safe_edit_text(message, text, **kwargs):
@@ -1689,6 +4190,273 @@ async def _safe_edit_text(message, text, **kwargs):
             logger.warning(f"status fallback send_message failed: {ex2!r}")
 
 
+# Per-loop lane slots (see FAST_LANE_MAX_LOAD); per loop like _llm_semaphore.
+_lane_semaphores = weakref.WeakKeyDictionary()
+
+
+def _lane_semaphore(info: Optional[DocInfo]) -> asyncio.Semaphore:
+    """The fast or slow lane's slots for a file; uninspected files go fast."""
+    loop = asyncio.get_running_loop()
+    lanes = _lane_semaphores.get(loop)
+    if lanes is None:
+        lanes = _lane_semaphores[loop] = (asyncio.Semaphore(FAST_LANE_CONCURRENCY),
+                                          asyncio.Semaphore(SLOW_LANE_CONCURRENCY))
+    return lanes[info is not None and _doc_load(info) > FAST_LANE_MAX_LOAD]
+
+
+class _LaneSlot:
+    """A job's slot in its lane, taken when the job first has work of its own
+    to do and held until release()."""
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self._semaphore = semaphore
+        self._held = False
+
+    async def take(self):
+        if not self._held:
+            await self._semaphore.acquire()
+            self._held = True
+
+    def release(self):
+        if self._held:
+            self._held = False
+            self._semaphore.release()
+
+
+# --- In-flight job coalescing ---
+# A double-tapped send, or one PDF forwarded by several people in a group at
+# once, starts the same work several times over: the OCR and TTS caches only
+# fill when a job finishes. While a job is in flight it's registered here by
+# what it's made from — the file's content hash and read language for OCR, the
+# text and voice for TTS — and identical requests meanwhile await its result
+# instead of starting their own. Each requester still gets their own status
+# messages, language choice and voice message; only the work is shared. A
+# follower waits at most COALESCE_WAIT_S and runs its own copy if the leader
+# is slower or fails, so one stuck job can't strand the rest. A follower takes
+# no lane slot while it waits on the leader; the slot is taken only once
+# _Flights.run knows the request runs the job itself (a leader, or a copy
+# after a timeout), or for the follower's own work after the read.
+COALESCE = os.environ.get("COALESCE", "on").strip().lower()  # on (default) | off
+COALESCE_WAIT_S = float(os.environ.get("COALESCE_WAIT_S", "120"))
+
+
+class _Flights:
+    """Jobs in flight by key: the first caller (the leader) runs the job,
+    callers with the same key meanwhile await the leader's result."""
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self.runs = 0
+        self.joined = 0
+
+    async def run(self, key, start, slot=None):
+        """(result, shared) of the job `key`: `start()` (a coroutine) run
+        here, or the result of the same job already in flight (shared=True).
+        `slot()`, if given, is awaited before `start()` whenever this call runs
+        the job itself — never while it only waits on another's."""
+        async def own():
+            if slot is not None:
+                await slot()
+            return await start()
+
+        if COALESCE == "off":
+            return await own(), False
+        loop = asyncio.get_running_loop()
+        leader = self._inflight.get(key)
+        if leader is not None and leader.get_loop() is loop:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(leader), COALESCE_WAIT_S)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self.name} in flight for over {COALESCE_WAIT_S:g}s, "
+                               f"running a copy")
+            except Exception as ex:
+                logger.warning(f"{self.name} in flight failed, running a copy: {ex!r}")
+            else:
+                self.joined += 1
+                logger.info(f"Joined the {self.name} in flight; {self.joined} of "
+                            f"{self.runs + self.joined} requests joined since start")
+                return result, True
+            self.runs += 1
+            return await own(), False
+        fut = self._inflight[key] = loop.create_future()
+        self.runs += 1
+        try:
+            result = await own()
+        except BaseException as ex:
+            fut.set_exception(ex if isinstance(ex, Exception) else RuntimeError(f"{ex!r}"))
+            fut.exception()  # retrieved: no "never retrieved" noise when nobody joined
+            raise
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+        fut.set_result(result)
+        return result, False
+
+
+_ocr_flights = _Flights("OCR")
+_tts_flights = _Flights("TTS")
+
+
+def _text_digest(text: str) -> str:
+    import hashlib
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _file_digest(file_path) -> str:
+    """SHA-256 of a file's bytes. Blocking."""
+    import hashlib
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+async def _coalesced_ocr(digest, file_path, file_type, pinned_lang=None, speculate=False,
+                         slot=None):
+    """extract_text_async, shared with an identical request in flight (same
+    content `digest`, type and language). A shared result counts its pages as
+    saved, like a reused photo. `slot()` (a lane slot) is awaited before a
+    read of its own, not before joining one."""
+    if digest is None:
+        if slot is not None:
+            await slot()
+        return await extract_text_async(file_path, file_type, pinned_lang, speculate=speculate)
+    ocr, shared = await _ocr_flights.run(
+        (digest, file_type, pinned_lang),
+        lambda: extract_text_async(file_path, file_type, pinned_lang, speculate=speculate),
+        slot=slot)
+    return ocr._replace(ocr_pages_saved=ocr.ocr_pages or 1) if shared else ocr
+
+
+# --- Read-ahead behind the pre-cost prompt ---
+# A heavy file first waits on the pre-cost prompt, and after "Continue" the
+# user waits again for the OCR. The file is already downloaded to price it
+# (_download_and_inspect), so the read starts as soon as the prompt is shown.
+# It's held in the pending prompt for PRECOST_READ_AHEAD_TTL_S, and a
+# confirmation within that window takes over the result, or the read still
+# under way, instead of starting over. Quota is still charged only on
+# confirmation, and it starts only for a user who could afford the file.
+# The read takes no lane slot and isn't started while the file's lane is
+# full, so it never holds up a confirmed job. "Cancel", a newer prompt or the
+# TTL cancels the read; the TTL or a newer prompt also deletes the file, so a
+# late confirmation downloads it again. The pages the read sent to Azure Read
+# are logged as waste, next to the latency saved on confirmations, so the two
+# can be weighed.
+# They're counted as they're sent: a cancelled read's Azure call still runs
+# to the end in its thread and is billed.
+PRECOST_READ_AHEAD = os.environ.get("PRECOST_READ_AHEAD", "on").strip().lower()  # on (default) | off
+PRECOST_READ_AHEAD_TTL_S = float(os.environ.get("PRECOST_READ_AHEAD_TTL_S", "300"))
+_precost_read_stats = {"started": 0, "used": 0, "saved_ms": 0, "wasted": 0, "pages_wasted": 0}
+
+
+class _PrecostRead:
+    """An OCR read started for a file waiting on the pre-cost prompt."""
+
+    def __init__(self, args, coro, file_path):
+        self.args = args                # (pinned_lang, speculate) it reads with
+        self.file_path = file_path      # the pre-flight download it reads
+        self.started = time.monotonic()
+        self.done_at = None
+        self.dropped = False
+        self.pages_sent = []            # per Azure Read call (see _azure_page_meter)
+        token = _azure_page_meter.set(self.pages_sent)
+        self.task = asyncio.create_task(coro)
+        _azure_page_meter.reset(token)
+        self.task.add_done_callback(self._done)
+        self.timer = asyncio.get_running_loop().call_later(
+            PRECOST_READ_AHEAD_TTL_S, _drop_precost_read, self, "expired")
+
+    def _done(self, task):
+        self.done_at = time.monotonic()
+        if not task.cancelled():
+            task.exception()  # retrieved: a failure is reported when claimed
+
+
+def _precost_ocr_args(prefs) -> Optional[tuple]:
+    """(pinned_lang, speculate) of the read _process_file_payload makes for a
+    user with `prefs`, or None when it streams the file instead."""
+    default_lang = (prefs.get("default_lang") or "").strip()
+    if default_lang in FALLBACK_LANGS:
+        if LLM_OCR_STREAM != "off" and OCR_FALLBACK == "llm" and _azure_openai_configured():
+            return None
+        return default_lang, False
+    hint_lang = default_lang if default_lang in OCR_LOCALE_HINT_LANGS else None
+    return hint_lang, _rescue_likelihood(prefs) >= LLM_SPECULATE_MIN_LIKELIHOOD
+
+
+async def _read_ahead(file_path, file_type, pinned_lang, speculate):
+    digest = await asyncio.to_thread(_file_digest, file_path) if COALESCE != "off" else None
+    return await _coalesced_ocr(digest, file_path, file_type, pinned_lang, speculate=speculate)
+
+
+def _start_precost_read(user_id, file_path, file_type, doc_info, cost) -> Optional[_PrecostRead]:
+    """Start reading a file that waits on the pre-cost prompt, or None when it
+    wouldn't pay off or would hold up confirmed jobs: no file, a user who
+    can't afford it, a streamed read, a full lane."""
+    if PRECOST_READ_AHEAD == "off" or file_path is None:
+        return None
+    try:
+        snap = _load_quota(user_id)
+        if not snap.get("unlimited") and snap["free_left"] + snap["bonus_credits"] < cost:
+            return None
+        args = _precost_ocr_args(user_store.get_user(user_id))
+    except Exception as ex:
+        logger.warning(f"pre-cost read-ahead not started: {ex!r}")
+        return None
+    if args is None or _lane_semaphore(doc_info).locked():
+        return None
+    _precost_read_stats["started"] += 1
+    return _PrecostRead(args, _read_ahead(file_path, file_type, *args), file_path)
+
+
+async def _claim_precost_read(ahead: _PrecostRead, args) -> Optional[OcrResult]:
+    """The read-ahead's OcrResult, awaited if still running, or None
+    when it can't stand in for a read with `args`."""
+    if ahead.dropped or ahead.args != args:
+        _drop_precost_read(ahead, "settings changed")
+        return None
+    ahead.dropped = True
+    ahead.timer.cancel()
+    saved_ms = round(((ahead.done_at or time.monotonic()) - ahead.started) * 1000)
+    try:
+        ocr = await ahead.task
+    except Exception as ex:
+        logger.warning(f"pre-cost read-ahead failed, reading again: {ex!r}")
+        return None
+    stats = _precost_read_stats
+    stats["used"] += 1
+    stats["saved_ms"] += saved_ms
+    logger.info(f"Pre-cost read-ahead used: {saved_ms} ms saved; {stats['used']} of "
+                f"{stats['started']} used, {stats['saved_ms'] / stats['used'] / 1000:.1f} s "
+                f"saved on average, {stats['wasted']} wasted ({stats['pages_wasted']} pages)")
+    return ocr
+
+
+def _drop_precost_read(ahead: Optional[_PrecostRead], why: str) -> None:
+    """Cancel a read-ahead nobody will use and log what it cost. An expired or
+    replaced one also deletes its file: nothing will confirm it in time."""
+    if ahead is None or ahead.dropped:
+        return
+    ahead.dropped = True
+    ahead.timer.cancel()
+    stats = _precost_read_stats
+    stats["wasted"] += 1
+    pages = sum(ahead.pages_sent)
+    stats["pages_wasted"] += pages
+    cost = f"{pages} pages sent to Azure Read"
+    if not ahead.task.done():
+        ahead.task.cancel()
+        cost += f", cancelled after {round((time.monotonic() - ahead.started) * 1000)} ms"
+    elif ahead.task.cancelled() or ahead.task.exception() is not None:
+        cost += ", failed"
+    logger.info(f"Pre-cost read-ahead wasted ({why}): {cost}; {stats['wasted']} of "
+                f"{stats['started']} wasted, {stats['pages_wasted']} pages in all")
+    if why in ("expired", "prompt replaced"):
+        remove_temp_file(ahead.file_path)  # a no-op when already gone
+
+
 async def _process_file_payload(
         update: Update,
         context: ContextTypes.DEFAULT_TYPE,
@@ -1696,28 +4464,72 @@ async def _process_file_payload(
         file_type: str,
         file_size_kb: Optional[int],
         cost_credits: int,
+        file_path: str = None,
+        doc_info: DocInfo = None,
+        precost_read: _PrecostRead = None,
+        job_id: str = None,
 ) -> None:
-    """Download → OCR/detect → synthesize flow for an accepted file payload."""
+    """Download → OCR/detect → synthesize flow for an accepted file payload.
+    `file_path` is the file when handle_file already downloaded it to inspect
+    it; it is removed when done either way. `precost_read` is the read started
+    behind the pre-cost prompt, used if it reads the file the way this would.
+    The OCR result is kept under `job_id` for the language menu (see
+    _put_user_job)."""
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
+    job_id = job_id or _new_job_id()
     # reply_markup also clears the legacy 1/2/3 language reply-keyboard from older
     # versions so it disappears on the user's next file (no-op if they never had it).
     status_message = await context.bot.send_message(
         chat_id, t(update, "analyzing"), reply_markup=ReplyKeyboardRemove())
     stop_typing = asyncio.Event()
     typing_task = asyncio.create_task(_keep_typing(context.bot, chat_id, stop_typing))
-    file_path = None
     t0 = time.monotonic()
+    digest = None
+    if file_path is not None and COALESCE != "off":
+        try:
+            digest = await asyncio.to_thread(_file_digest, file_path)
+        except Exception as ex:
+            logger.warning(f"file digest failed: {ex!r}")
+    # The lane slot is taken before the job's own work: not while it waits on
+    # an identical read in flight or on the read-ahead (see _Flights.run).
+    lane = _LaneSlot(_lane_semaphore(doc_info))
+
+    async def read(pinned_lang, speculate=False):
+        nonlocal precost_read
+        ahead, precost_read = precost_read, None
+        ocr = await _claim_precost_read(ahead, (pinned_lang, speculate)) if ahead else None
+        if ocr is None:
+            ocr = await _coalesced_ocr(digest, file_path, file_type, pinned_lang,
+                                       speculate=speculate, slot=lane.take)
+        await lane.take()  # for the voice message
+        return ocr
+
     try:
-        tg_file = await context.bot.get_file(file_id)
-        file_path = tempfile.mktemp()
-        await tg_file.download_to_drive(file_path)
+        if file_path is None:
+            await lane.take()
+            tg_file = await context.bot.get_file(file_id)
+            file_path = tempfile.mktemp()
+            await tg_file.download_to_drive(file_path)
 
         prefs = user_store.get_user(user_id)
         default_lang = (prefs.get("default_lang") or "").strip()
 
+        if (default_lang in FALLBACK_LANGS and LLM_OCR_STREAM != "off"
+                and OCR_FALLBACK == "llm" and _azure_openai_configured()):
+            info = VOICE_MAP[default_lang]
+            await _safe_edit_text(status_message,
+                t(update, "using_default").format(lang=f'{info["flag"]} {info["name"]}')
+            )
+            await lane.take()
+            stream_pages = 1 if file_type != "pdf" else (
+                min(doc_info.pages, LLM_OCR_MAX_PDF_PAGES) if doc_info else None)
+            await stream_and_send(update, context, file_path, file_type, default_lang,
+                                  file_size_kb, cost_credits, t0, ocr_pages=stream_pages)
+            return
+
         if default_lang in FALLBACK_LANGS:
-            ocr = await asyncio.to_thread(extract_text, file_path, file_type, default_lang)
+            ocr = await read(default_lang)
             normalized_text = ocr.text
             ocr_ms = round((time.monotonic() - t0) * 1000)
             if not normalized_text.strip():
@@ -1727,22 +4539,41 @@ async def _process_file_payload(
                           file_type=file_type, file_size_kb=file_size_kb, duration_ms=ocr_ms,
                           cost_credits=cost_credits)
                 return
-            context.user_data["ocr_job"] = {
+            _put_user_job(context.user_data, "ocr_jobs", job_id, {
                 "text": normalized_text, "ocr_pages": ocr.ocr_pages, "ocr_ms": ocr_ms,
                 "file_type": file_type, "file_size_kb": file_size_kb, "cost_credits": cost_credits,
-            }
+            })
             info = VOICE_MAP[default_lang]
             await _safe_edit_text(status_message,
                 t(update, "using_default").format(lang=f'{info["flag"]} {info["name"]}')
             )
             stop_typing.set()
-            await synthesize_and_send(update, context, default_lang, status_message=None)
+            await synthesize_and_send(update, context, default_lang, job_id, status_message=None)
             return
 
         hint_lang = default_lang if default_lang in OCR_LOCALE_HINT_LANGS else None
-        ocr = extract_text(file_path, file_type, pinned_lang=hint_lang)
+        photo = ocr = None
+        if file_type == "image" and PHOTO_REUSE != "off":
+            try:
+                photo = await asyncio.to_thread(_photo_print, file_path)
+                if photo is not None:
+                    ocr = _reused_photo(context.user_data, hint_lang, photo)
+            except Exception as ex:
+                logger.warning(f"photo reuse check failed: {ex!r}")
+        if ocr is None:
+            likelihood = _rescue_likelihood(prefs)
+            ocr = await read(hint_lang, speculate=likelihood >= LLM_SPECULATE_MIN_LIKELIHOOD)
+            try:
+                user_store.set_rescue_rate(user_id, _next_rescue_rate(likelihood, ocr.used_fallback))
+            except Exception as ex:
+                logger.warning(f"set_rescue_rate failed: {ex!r}")
+            if photo is not None:
+                _remember_photo(context.user_data, hint_lang, photo, ocr)
+        await lane.take()  # a reused photo still needs its voice message
         normalized_text = ocr.text
         ocr_pages = ocr.ocr_pages
+        pages_saved = ocr.ocr_pages_saved if file_type == "pdf" else (ocr.ocr_pages_saved or None)
+        boilerplate_chars = ocr.boilerplate_chars if (ocr_pages or 0) > 1 else None
         ocr_ms = round((time.monotonic() - t0) * 1000)
 
         if not normalized_text.strip():
@@ -1751,16 +4582,18 @@ async def _process_file_payload(
             await context.bot.send_message(chat_id, t(update, "help"))
             log_usage(user_id, status="failure", reason="no_text", ocr_pages=ocr_pages,
                       file_type=file_type, file_size_kb=file_size_kb, duration_ms=ocr_ms,
-                      cost_credits=cost_credits)
+                      cost_credits=cost_credits, ocr_pages_saved=pages_saved,
+                      boilerplate_chars=boilerplate_chars)
             return
 
         locale2, conf, coverage = ocr.locale2, ocr.confidence, ocr.coverage
         logger.info(f"User {user_id}: script={ocr.script_lang} lang={locale2} conf={conf:.2f} coverage={coverage:.2f}")
-        context.user_data["ocr_job"] = {
+        _put_user_job(context.user_data, "ocr_jobs", job_id, {
             "text": normalized_text, "ocr_pages": ocr_pages, "ocr_ms": ocr_ms,
             "file_type": file_type, "file_size_kb": file_size_kb, "cost_credits": cost_credits,
-            "segments": ocr.segments,
-        }
+            "segments": ocr.segments, "ocr_pages_saved": pages_saved,
+            "boilerplate_chars": boilerplate_chars,
+        })
 
         if default_lang in VOICE_MAP:
             info = VOICE_MAP[default_lang]
@@ -1768,7 +4601,7 @@ async def _process_file_payload(
                 t(update, "using_default").format(lang=f'{info["flag"]} {info["name"]}')
             )
             stop_typing.set()
-            await synthesize_and_send(update, context, default_lang, status_message=None)
+            await synthesize_and_send(update, context, default_lang, job_id, status_message=None)
         elif ocr.segments:
             # Genuinely multilingual page: read every part with its own voice
             # instead of forcing one language (or sending the user to the menu).
@@ -1780,7 +4613,7 @@ async def _process_file_payload(
                                for l in seg_locs if l in VOICE_MAP)
             await _safe_edit_text(status_message,t(update, "detected_lang").format(lang=label))
             stop_typing.set()
-            await synthesize_and_send(update, context, locale2, status_message=None,
+            await synthesize_and_send(update, context, locale2, job_id, status_message=None,
                                       use_segments=True)
         elif (locale2 in VOICE_MAP and conf >= AUTO_DETECT_MIN_CONFIDENCE
                 and coverage >= AUTO_DETECT_MIN_COVERAGE):
@@ -1789,12 +4622,12 @@ async def _process_file_payload(
                 t(update, "detected_lang").format(lang=f'{info["flag"]} {info["name"]}')
             )
             stop_typing.set()
-            await synthesize_and_send(update, context, locale2, status_message=None)
+            await synthesize_and_send(update, context, locale2, job_id, status_message=None)
         else:
             recent = [c for c in prefs.get("recent", "").split(",") if c]
             await _safe_edit_text(status_message,
                 t(update, "choose_language"),
-                reply_markup=build_language_keyboard(update, locale2, recent)
+                reply_markup=build_language_keyboard(update, locale2, recent, job_id)
             )
     except Exception as e:
         logger.error(f"OCR/handle exception for user {user_id}: {e!r}")
@@ -1809,6 +4642,8 @@ async def _process_file_payload(
                   duration_ms=round((time.monotonic() - t0) * 1000),
                   cost_credits=cost_credits)
     finally:
+        lane.release()
+        _drop_precost_read(precost_read, "not needed")
         stop_typing.set()
         typing_task.cancel()
         try:
@@ -1818,6 +4653,73 @@ async def _process_file_payload(
         remove_temp_file(file_path)
 
 
+async def _download_and_inspect(context, user_id: int, file_id: str, file_type: str):
+    """(file_path, DocInfo) of an upload, fetched ahead of the cost decision;
+    (None, None) when the download fails, (file_path, None) when the file
+    can't be inspected. Either way the cost falls back to the size estimate."""
+    file_path = None
+    try:
+        tg_file = await context.bot.get_file(file_id)
+        file_path = tempfile.mktemp()
+        await tg_file.download_to_drive(file_path)
+    except Exception as ex:
+        logger.warning(f"pre-flight download failed for user {user_id}: {ex!r}")
+        remove_temp_file(file_path)
+        return None, None
+    try:
+        info = await asyncio.to_thread(inspect_document, file_path, file_type)
+    except Exception as ex:
+        logger.warning(f"pre-flight inspection failed for user {user_id}: {ex!r}")
+        return file_path, None
+    if info is not None:
+        logger.info(f"Pre-flight for user {user_id}: {info.pages} pages, {info.text_pages} "
+                    f"with text, {info.width}x{info.height} px, dpi={info.dpi}")
+    return file_path, info
+
+
+# --- Per-job user state ---
+# Files and pre-cost taps are handled concurrently (block=False), so one user
+# can have several jobs between prompt, OCR and language menu at once. Each
+# job's state sits in user_data under its own id, which its buttons carry in
+# their callback data; a handler pops its entry before its first await, so a
+# double tap finds nothing the second time.
+_USER_JOBS_MAX = 4   # per kind; older entries are dropped (a menu never answered)
+# A pre-cost prompt's downloaded file is deleted after this long unanswered;
+# a later "Continue" downloads it again.
+PRECOST_FILE_TTL_S = float(os.environ.get("PRECOST_FILE_TTL_S", "600"))
+
+
+def _new_job_id():
+    return secrets.token_hex(4)
+
+
+def _put_user_job(user_data, key, job_id, entry):
+    """Store `entry` as user_data[key][job_id]; returns the oldest entries
+    dropped to keep at most _USER_JOBS_MAX."""
+    jobs = user_data.setdefault(key, {})
+    jobs[job_id] = entry
+    dropped = []
+    while len(jobs) > _USER_JOBS_MAX:
+        dropped.append(jobs.pop(next(iter(jobs))))
+    return dropped
+
+
+def _expire_precost_file(pending):
+    """Delete the download of a pre-cost prompt nobody answered."""
+    _drop_precost_read(pending.get("precost_read"), "expired")
+    remove_temp_file(pending.get("file_path"))
+    pending["file_path"] = None
+
+
+def _release_precost(pending, why):
+    """Free what an unconfirmed pre-cost prompt holds: its expiry timer, its
+    read-ahead and its downloaded file."""
+    if pending.get("expiry"):
+        pending["expiry"].cancel()
+    _drop_precost_read(pending.get("precost_read"), why)
+    remove_temp_file(pending.get("file_path"))
+
+
 async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Entry point for document/photo uploads with pre-cost guard for heavy files."""
     user_id = update.effective_user.id
@@ -1842,26 +4744,40 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                   file_type=file_type, file_size_kb=file_size_kb)
         return
 
-    cost = _estimate_request_cost(file_type, file_size_kb)
+    file_path, doc_info = await _download_and_inspect(context, user_id, file_id, file_type)
+    cost = _estimate_request_cost(file_type, file_size_kb, doc_info)
+    job_id = _new_job_id()
     if cost >= PRECOST_CONFIRM_MIN_COST:
-        context.user_data["pending_precost"] = {
+        pending = {
             "file_id": file_id,
             "file_type": file_type,
             "file_size_kb": file_size_kb,
             "cost": cost,
+            "file_path": file_path,
+            "doc_info": doc_info,
+            "precost_read": _start_precost_read(user_id, file_path, file_type, doc_info, cost),
         }
+        if file_path is not None:
+            pending["expiry"] = asyncio.get_running_loop().call_later(
+                PRECOST_FILE_TTL_S, _expire_precost_file, pending)
+        for stale in _put_user_job(context.user_data, "pending_precost", job_id, pending):
+            # The oldest prompt left unanswered.
+            _release_precost(stale, "prompt replaced")
         log_growth_event(user_id, event_type="precost_prompt_shown", source=str(cost))
         await update.message.reply_text(
             t(update, "precost_prompt").format(cost=cost),
             reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton(t(update, "precost_continue_button"), callback_data="pre:ok"),
-                InlineKeyboardButton(t(update, "precost_cancel_button"), callback_data="pre:cancel"),
+                InlineKeyboardButton(t(update, "precost_continue_button"),
+                                     callback_data=f"pre:ok:{job_id}"),
+                InlineKeyboardButton(t(update, "precost_cancel_button"),
+                                     callback_data=f"pre:cancel:{job_id}"),
             ]])
         )
         return
 
     ok, snap = _consume_quota(user_id, cost=cost)
     if not ok:
+        remove_temp_file(file_path)
         await update.message.reply_text(t(update, "limit_reached"))
         await update.message.reply_text(
             t(
@@ -1878,14 +4794,19 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         return
 
     await _process_file_payload(update, context, file_id=file_id, file_type=file_type,
-                                file_size_kb=file_size_kb, cost_credits=cost)
+                                file_size_kb=file_size_kb, cost_credits=cost,
+                                file_path=file_path, doc_info=doc_info, job_id=job_id)
 
 
 async def on_precost_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
+    _, action, job_id = ((query.data or "").split(":", 2) + ["", ""])[:3]
+    # Taken before the first await: callbacks run concurrently (block=False),
+    # and a double tap on Continue must charge and read the file once.
+    pending = (context.user_data.get("pending_precost") or {}).pop(job_id, None)
+    if pending and pending.get("expiry"):
+        pending["expiry"].cancel()
     await query.answer()
-    action = (query.data or "").split(":", 1)[-1]
-    pending = context.user_data.get("pending_precost")
     if not pending:
         await context.bot.send_message(update.effective_chat.id, t(update, "help"))
         return
@@ -1893,14 +4814,14 @@ async def on_precost_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = update.effective_user.id
     if action != "ok":
         log_growth_event(user_id, event_type="precost_cancel")
-        context.user_data.pop("pending_precost", None)
+        _release_precost(pending, "cancelled")
         await context.bot.send_message(update.effective_chat.id, t(update, "precost_cancelled"))
         return
 
     cost = int(pending.get("cost") or 1)
     ok, snap = _consume_quota(user_id, cost=cost)
     if not ok:
-        context.user_data.pop("pending_precost", None)
+        _release_precost(pending, "quota exceeded")
         await context.bot.send_message(update.effective_chat.id, t(update, "limit_reached"))
         await context.bot.send_message(
             update.effective_chat.id,
@@ -1918,8 +4839,10 @@ async def on_precost_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
                   cost_credits=cost)
         return
 
+    file_path = pending.get("file_path")
+    if file_path is not None and not os.path.exists(file_path):
+        file_path = None  # deleted with its expired read-ahead: download again
     log_growth_event(user_id, event_type="precost_confirm", source=str(cost))
-    context.user_data.pop("pending_precost", None)
     await _process_file_payload(
         update,
         context,
@@ -1927,44 +4850,141 @@ async def on_precost_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
         file_type=pending.get("file_type") or "other",
         file_size_kb=pending.get("file_size_kb"),
         cost_credits=cost,
+        file_path=file_path,
+        doc_info=pending.get("doc_info"),
+        precost_read=pending.get("precost_read"),
+        job_id=job_id,
     )
 
-def prepare_tts_text(text: str, locale2: str) -> str:
-    """Light, language-specific text cleanup before synthesis.
+# Large integers: space-grouped millions ("1 250 000", also with a comma-decimal
+# tail: "1 250 000,00") or a plain run of 5+ digits not starting with 0.
+# Times, dates and years don't match, and neither
+# does a number that reads as a code: after "+", "#", "-", "/", "No."/"Nr."/"№",
+# glued to letters, or one group of a phone- or ID-like run of digit groups
+# ("+1 212 555-0100", "0171 1234567", "12345-678").
+_NUMBER_CODE_BEFORE = (r'(?<![\w+#\-/.,:])(?<!\d )'
+                       r'(?<!No\. )(?<!Nr\. )(?<!No )(?<!Nr )(?<!№ )')
+_NUMBER_CODE_AFTER = r'(?![\w\-/]|[.,:]\d| \d)'
+_LARGE_NUMBER_PATTERN = (rf'{_NUMBER_CODE_BEFORE}'
+                         rf'(?:\d{{1,3}}(?: \d{{3}}){{2,}}(?:,\d{{1,2}}(?!\d))?|(?!0)\d{{5,}})'
+                         rf'{_NUMBER_CODE_AFTER}')
+_LARGE_NUMBER_RE = re.compile(_LARGE_NUMBER_PATTERN)
+
+# Languages whose large numbers are spelled out (comma-separated codes). Opt-in:
+# a voice that reads digit groups well is better left alone than risk voicing
+# a code as an amount. Ukrainian's voice reads them digit by digit.
+TTS_SPELL_NUMBERS = {c.strip() for c in os.environ.get("TTS_SPELL_NUMBERS", "uk").split(",")
+                     if c.strip()}
+
+# Unit rewrites per language, as (regex, replacement). The OCR flattens м²→м2 /
+# м³→м3, which the uk voice reads as "ем два".
+TTS_UNIT_RULES = {
+    "uk": (
+        (r'(?<=\d)\s*м\s*[²2](?![\d²³])', ' квадратних метрів'),
+        (r'(?<=\d)\s*м\s*[³3](?![\d²³])', ' кубічних метрів'),
+    ),
+}
 
-    Ukrainian only (ru/en already sound fine, so we don't touch them):
-    - The OCR flattens м²→м2 / м³→м3, which the uk voice reads as "ем два"; we
-      expand those to words.
-    - The uk voice reads large numbers digit by digit ("один два п'ять нуль…")
-      and ignores <say-as>, so we spell them out as words ("один мільйон двісті
-      п'ятдесят тисяч") via num2words. Times/dates/codes/phones/years are left
-      alone (only standalone integers of 5+ digits, or space-grouped millions).
-    """
-    if locale2 == "uk":
-        text = re.sub(r'(?<=\d)\s*м\s*[²2](?![\d²³])', ' квадратних метрів', text)
-        text = re.sub(r'(?<=\d)\s*м\s*[³3](?![\d²³])', ' кубічних метрів', text)
-        text = _spell_large_numbers(text, "uk")
-    return text
+# VOICE_MAP code -> num2words code, where they differ.
+_NUM2WORDS_LANG_ALIASES = {"kk": "kz"}
 
 
-def _spell_large_numbers(text: str, lang: str) -> str:
-    """Replace large integers (grouped "1 250 000" or plain "1250000") with their
-    word form so a voice can't read them digit by digit. num2words is imported
-    lazily and missing it degrades gracefully (number left as-is)."""
+@functools.lru_cache(maxsize=None)
+def _num2words():
+    """num2words, imported once; None when it isn't installed (numbers are then
+    left as-is)."""
     try:
-        from num2words import num2words
+        from num2words import num2words, CONVERTER_CLASSES
     except ImportError:
+        return None
+    return num2words, CONVERTER_CLASSES
+
+
+def _num2words_lang(locale2: str) -> Optional[str]:
+    """The num2words language for a VOICE_MAP code, or None if it has none."""
+    n2w = _num2words()
+    if n2w is None:
+        return None
+    lang = _NUM2WORDS_LANG_ALIASES.get(locale2, locale2)
+    return lang if lang in n2w[1] else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _spell_number(number: str, lang: str) -> Optional[str]:
+    """Word form of a digit string ("1 250 000", "1 250 000,25" or "1250000"),
+    memoized by (number, lang) — documents repeat the same amounts. A zero
+    decimal tail (",00") is dropped. None when num2words can't spell it (too
+    large, unsupported language)."""
+    from decimal import Decimal
+    n2w = _num2words()
+    if n2w is None:
+        return None
+    whole, _, frac = number.replace(' ', '').partition(',')
+    try:
+        if frac.strip('0'):
+            return n2w[0](Decimal(f"{whole}.{frac}"), lang=lang)
+        return n2w[0](int(whole), lang=lang)
+    except Exception:
+        return None
+
+
+class _TtsPrep(NamedTuple):
+    """Precompiled text preparation for one language: every rule folded into a
+    single alternation so a block is rewritten in one regex pass."""
+    pattern: re.Pattern
+    replacements: dict          # group name -> replacement string
+    number_lang: Optional[str]  # num2words language for the "num" group
+
+
+@functools.lru_cache(maxsize=None)
+def _tts_prep(locale2: str) -> Optional[_TtsPrep]:
+    """Build (once per language) the rule set for prepare_tts_text, or None when
+    the language needs no preparation."""
+    parts, replacements = [], {}
+    number_lang = _num2words_lang(locale2) if locale2 in TTS_SPELL_NUMBERS else None
+    if number_lang:
+        parts.append(f'(?P<num>{_LARGE_NUMBER_PATTERN})')
+    for i, (pattern, replacement) in enumerate(TTS_UNIT_RULES.get(locale2, ())):
+        parts.append(f'(?P<unit{i}>{pattern})')
+        replacements[f'unit{i}'] = replacement
+    if not parts:
+        return None
+    return _TtsPrep(re.compile('|'.join(parts)), replacements, number_lang)
+
+
+def prepare_tts_text(text: str, locale2: str) -> str:
+    """Light, language-specific text cleanup before synthesis.
+
+    - Units (TTS_UNIT_RULES, Ukrainian today): м²/м³ are expanded to words.
+    - Some voices read large numbers digit by digit ("один два п'ять нуль…")
+      and ignore <say-as>, so for the languages in TTS_SPELL_NUMBERS (if
+      num2words supports them) we spell them out as words ("один мільйон
+      двісті п'ятдесят тисяч"). Only standalone integers of 5+ digits or
+      space-grouped millions (with any ",00" tail) are spelled; times,
+      dates, years, phones and numbered codes are left alone (see
+      _LARGE_NUMBER_PATTERN).
+    """
+    prep = _tts_prep(locale2)
+    if prep is None:
         return text
 
     def repl(m):
-        try:
-            return num2words(int(m.group(0).replace(' ', '')), lang=lang)
-        except Exception:
-            return m.group(0)
+        if m.lastgroup == "num":
+            return _spell_number(m.group(0), prep.number_lang) or m.group(0)
+        return prep.replacements[m.lastgroup]
+
+    return prep.pattern.sub(repl, text)
 
-    text = re.sub(r'(?<!\d)\d{1,3}(?: \d{3}){2,}(?!\d)', repl, text)  # grouped millions
-    text = re.sub(r'(?<![\d.:+\-])\d{5,}(?![\d.:\-])', repl, text)     # plain 5+ digits
-    return text
+
+def _spell_large_numbers(text: str, lang: str) -> str:
+    """Replace large integers (grouped "1 250 000" or plain "1250000") with their
+    word form so a voice can't read them digit by digit. Missing num2words or an
+    unsupported language degrades gracefully (number left as-is)."""
+    number_lang = _num2words_lang(lang)
+    if number_lang is None:
+        return text
+    return _LARGE_NUMBER_RE.sub(
+        lambda m: _spell_number(m.group(0), number_lang) or m.group(0), text)
 
 
 def _voice_ssml_block(seg_text: str, seg_locale: str) -> str:
@@ -2001,17 +5021,248 @@ def synthesize_to_file(text: str, locale2: str, out_path: str, segments=None):
     return result
 
 
+# --- Near-duplicate audio reuse ---
+# Two photos of one letter read back almost the same text — a stray character,
+# a line break read as a paragraph end — and each would be voiced from
+# scratch. Every voiced text is kept here as sentences, each with its slice of
+# the audio, cut at SSML bookmarks so a slice is exactly what the voice said in
+# context. A new job's text is matched against recent texts in the same voice
+# by a 64-bit SimHash of its word shingles; the nearest one's sentences are
+# aligned with the new ones, unchanged sentences take their cached audio and
+# only the rest go to Azure, in one request. The sentence, not the paragraph,
+# is the unit: Azure Read text rarely has paragraph breaks. Speech writes a
+# file as 16 kHz PCM WAV, so slices splice sample-exact, and a splice falls in
+# the pause after a full stop. In-process, bounded by TTS_REUSE_MAX_MB of
+# audio, least recently used evicted first.
+TTS_REUSE = os.environ.get("TTS_REUSE", "on").strip().lower()  # on (default) | off
+TTS_REUSE_MAX_MB = int(os.environ.get("TTS_REUSE_MAX_MB", "64"))
+_TTS_REUSE_MAX_BITS = 12       # SimHash Hamming distance, of 64
+_TTS_REUSE_MIN_SHARE = 0.5     # of the new text's characters, reusable
+_TTS_SENTENCE_RE = re.compile(r"(?<=[.!?…:;])\s+")
+_TTS_MIN_UNIT = 16             # chars; shorter pieces join the next sentence
+_TICKS_PER_S = 10_000_000      # Speech SDK audio offsets are 100 ns ticks
+
+
+class _VoicedText(NamedTuple):
+    voice: str          # the dominant voice; texts only match within one
+    simhash: int
+    units: list         # (locale2, sentence)
+    audio: list         # PCM bytes per unit
+    params: tuple       # (channels, sample width, frame rate)
+
+
+class _ReusedAudio(NamedTuple):
+    reason: object      # stands in for the SpeechSynthesisResult when nothing was synthesized
+
+
+class _TtsAudioCache:
+    """_VoicedTexts by (voice, SimHash), evicting the least recently used past
+    `max_bytes` of audio. Thread-safe."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._texts = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.chars = 0
+        self.chars_saved = 0
+
+    def nearest(self, voice, simhash) -> Optional[_VoicedText]:
+        with self._lock:
+            self.lookups += 1
+            best, best_bits = None, _TTS_REUSE_MAX_BITS + 1
+            for key, vt in self._texts.items():
+                bits = (vt.simhash ^ simhash).bit_count()
+                if vt.voice == voice and bits < best_bits:
+                    best, best_bits = key, bits
+            if best is None:
+                return None
+            self._texts.move_to_end(best)
+            return self._texts[best]
+
+    def put(self, vt, chars, chars_saved):
+        size = sum(map(len, vt.audio))
+        with self._lock:
+            self.chars += chars
+            if chars_saved:
+                self.hits += 1
+                self.chars_saved += chars_saved
+            if size > self.max_bytes:
+                return
+            old = self._texts.pop((vt.voice, vt.simhash), None)
+            if old is not None:
+                self._bytes -= sum(map(len, old.audio))
+            self._texts[(vt.voice, vt.simhash)] = vt
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, old = self._texts.popitem(last=False)
+                self._bytes -= sum(map(len, old.audio))
+
+
+_tts_audio_cache = _TtsAudioCache(TTS_REUSE_MAX_MB * 1024 * 1024)
+
+
+def _simhash(text: str) -> int:
+    """64-bit SimHash of the text's lowercase word 3-shingles."""
+    import hashlib
+    import numpy as np
+    words = re.findall(r"\w+", text.lower())
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+    hashes = b"".join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(hashes, dtype=np.uint8).reshape(-1, 8), axis=1)
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) > len(shingles)
+    return int("".join("1" if v else "0" for v in votes), 2)
+
+
+def _tts_units(text: str, locale2: str, segments=None) -> list:
+    """The text as (locale2, sentence) pairs, in the voice each is read in. A
+    piece shorter than _TTS_MIN_UNIT ("Mrs.", "1.") stays with the next, so a
+    splice never lands mid-sentence."""
+    spans = segments if segments and len(segments) > 1 else [(locale2, text)]
+    units = []
+    for loc, span in spans:
+        carry = ""
+        for s in _TTS_SENTENCE_RE.split(span.strip()):
+            carry = f"{carry} {s}" if carry else s
+            if len(carry) >= _TTS_MIN_UNIT:
+                units.append((loc, carry))
+                carry = ""
+        if carry:
+            units.append((loc, carry))
+    return units
+
+
+def _synthesize_units(units: list, locale2: str, out_path: str):
+    """Synthesize `units` to out_path with a bookmark before each and cut the
+    audio at the bookmarks. Returns (result, params, PCM bytes per unit); the
+    last two are None when the audio can't be cut."""
+    import wave
+    from itertools import groupby
+    dom = VOICE_MAP.get(locale2) or VOICE_MAP["en"]
+    blocks = []
+    for loc, group in groupby(enumerate(units), key=lambda iu: iu[1][0]):
+        info = VOICE_MAP.get(loc) or VOICE_MAP["en"]
+        body = "\n    ".join(f'<bookmark mark="{i}"/>{escape_ssml(prepare_tts_text(s, loc))}'
+                             for i, (_, s) in group)
+        blocks.append(f'  <voice name="{info["voice"]}">\n    {body}\n  </voice>')
+    voices = "\n".join(blocks)
+    ssml = f"""
+<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{dom['lang_code']}">
+{voices}
+</speak>
+"""
+    marks = {}
+    synthesizer = SpeechSynthesizer(
+        speech_config=speech_config, audio_config=AudioConfig(filename=out_path)
+    )
+    synthesizer.bookmark_reached.connect(lambda evt: marks.setdefault(evt.text, evt.audio_offset))
+    result = synthesizer.speak_ssml_async(ssml).get()
+    del synthesizer
+    if result.reason != ResultReason.SynthesizingAudioCompleted:
+        return result, None, None
+    try:
+        with wave.open(out_path, "rb") as w:
+            params = (w.getnchannels(), w.getsampwidth(), w.getframerate())
+            data = w.readframes(w.getnframes())
+    except (wave.Error, EOFError) as ex:
+        logger.warning(f"Synthesized audio can't be cut for reuse: {ex!r}")
+        return result, None, None
+    frame = params[0] * params[1]
+    if any(str(i) not in marks for i in range(1, len(units))):
+        logger.warning(f"Synthesized audio can't be cut for reuse: "
+                       f"{len(marks)} of {len(units)} bookmarks reached")
+        return result, None, None
+    cuts = [0] + [min(len(data) // frame, round(marks[str(i)] * params[2] / _TICKS_PER_S)) * frame
+                  for i in range(1, len(units))] + [len(data)]
+    if cuts != sorted(cuts):
+        return result, None, None
+    return result, params, [data[a:b] for a, b in zip(cuts, cuts[1:])]
+
+
+def synthesize_reusing(text: str, locale2: str, out_path: str, segments=None):
+    """synthesize_to_file that reuses the audio of unchanged sentences from a
+    near-duplicate text voiced earlier. Returns (result, characters whose
+    audio was reused); `result` is a _ReusedAudio when every sentence was.
+    Blocking."""
+    units = _tts_units(text, locale2, segments)
+    if TTS_REUSE != "on" or not units:
+        return synthesize_to_file(text, locale2, out_path, segments=segments), 0
+    import difflib
+    import wave
+    voice = (VOICE_MAP.get(locale2) or VOICE_MAP["en"])["voice"]
+    simhash = _simhash(text)
+    reuse = {}  # unit index -> cached PCM
+    near = _tts_audio_cache.nearest(voice, simhash)
+    if near is not None:
+        sm = difflib.SequenceMatcher(None, near.units, units, autojunk=False)
+        for tag, i1, i2, j1, j2 in sm.get_opcodes():
+            if tag == "equal":
+                reuse.update(zip(range(j1, j2), near.audio[i1:i2]))
+        if sum(len(units[j][1]) for j in reuse) < _TTS_REUSE_MIN_SHARE * len(text):
+            reuse = {}
+    todo = [j for j in range(len(units)) if j not in reuse]
+    if todo:
+        result, params, parts = _synthesize_units([units[j] for j in todo], locale2, out_path)
+        if result.reason != ResultReason.SynthesizingAudioCompleted:
+            return result, 0
+        if parts is None or (reuse and params != near.params):
+            # Nothing to splice with: out_path holds the new sentences only.
+            if reuse:
+                return synthesize_to_file(text, locale2, out_path, segments=segments), 0
+            return result, 0
+    else:
+        result, params, parts = _ReusedAudio(ResultReason.SynthesizingAudioCompleted), near.params, []
+    fresh = dict(zip(todo, parts))
+    audio = [reuse[j] if j in reuse else fresh[j] for j in range(len(units))]
+    saved = sum(len(units[j][1]) for j in reuse)
+    if reuse:
+        with wave.open(out_path, "wb") as w:
+            w.setnchannels(params[0])
+            w.setsampwidth(params[1])
+            w.setframerate(params[2])
+            w.writeframes(b"".join(audio))
+    _tts_audio_cache.put(_VoicedText(voice, simhash, units, audio, params), len(text), saved)
+    if reuse:
+        c = _tts_audio_cache
+        logger.info(f"TTS reuse: {len(reuse)} of {len(units)} sentences from cached audio, "
+                    f"{saved} of {len(text)} characters saved; {c.chars_saved} of {c.chars} "
+                    f"({c.chars_saved / max(1, c.chars):.0%}) since start, {c.hits} hits")
+    return result, saved
+
+
+def _voice_message(text: str, locale2: str, segments=None):
+    """(result, characters whose audio was reused, OGG/Opus bytes) of a text:
+    synthesize_reusing, then convert_mp3_to_ogg; the bytes are None when the
+    synthesis failed. Blocking."""
+    audio_path = f"{tempfile.mktemp()}.mp3"
+    ogg_path = f"{tempfile.mktemp()}.ogg"
+    try:
+        result, saved = synthesize_reusing(text, locale2, audio_path, segments=segments)
+        if result.reason != ResultReason.SynthesizingAudioCompleted:
+            return result, saved, None
+        convert_mp3_to_ogg(audio_path, ogg_path)
+        with open(ogg_path, "rb") as f:
+            return result, saved, f.read()
+    finally:
+        for path in (audio_path, ogg_path):
+            remove_temp_file(path)
+
+
 async def synthesize_and_send(update: Update, context: ContextTypes.DEFAULT_TYPE,
-                              locale2: str, status_message=None,
+                              locale2: str, job_id: str, status_message=None,
                               use_segments: bool = False) -> None:
-    """Synthesize the stored OCR text into a voice message in the chosen language.
-    Shared by the auto-detect path and the manual inline-picker callback.
+    """Synthesize job `job_id`'s stored OCR text into a voice message in the
+    chosen language. Shared by the auto-detect path and the manual inline-picker
+    callback.
 
     use_segments reads a multilingual page with one voice per language span (auto
     path only); a manually-picked or pinned language always reads in one voice."""
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
-    job = context.user_data.get("ocr_job")
+    # Taken before the first await: a second tap on the menu finds nothing.
+    job = (context.user_data.get("ocr_jobs") or {}).pop(job_id, None)
     if not job:
         # Stale callback (e.g. after a scale-to-zero restart) — nothing to synthesize.
         await context.bot.send_message(chat_id, t(update, "help"))
@@ -2021,13 +5272,13 @@ async def synthesize_and_send(update: Update, context: ContextTypes.DEFAULT_TYPE
     lang_label = f'{info["flag"]} {info["name"]}'
     normalized_text = job["text"]
     ocr_pages = job.get("ocr_pages")
+    ocr_pages_saved = job.get("ocr_pages_saved")
+    boilerplate_chars = job.get("boilerplate_chars")
     ocr_ms = job.get("ocr_ms", 0)
     file_type = job.get("file_type")
     file_size_kb = job.get("file_size_kb")
     cost_credits = job.get("cost_credits")
 
-    audio_path = None
-    ogg_path = None
     t0 = time.monotonic()
     stop_typing = asyncio.Event()
     typing_task = asyncio.create_task(_keep_typing(context.bot, chat_id, stop_typing))
@@ -2046,9 +5297,12 @@ async def synthesize_and_send(update: Update, context: ContextTypes.DEFAULT_TYPE
                 chat_id, t(update, "generating_audio").format(lang=lang_label)
             )
 
-        audio_path = f"{tempfile.mktemp()}.mp3"
         segments = job.get("segments") if use_segments else None
-        result = synthesize_to_file(normalized_text, locale2, audio_path, segments=segments)
+        key = (_text_digest(repr((normalized_text, segments))), locale2)
+        (result, tts_chars_saved, voice), shared = await _tts_flights.run(
+            key, lambda: asyncio.to_thread(_voice_message, normalized_text, locale2, segments))
+        if shared:
+            tts_chars_saved = len(normalized_text)
 
         if result.reason != ResultReason.SynthesizingAudioCompleted:
             error_message = "Speech synthesis failed."
@@ -2062,20 +5316,19 @@ async def synthesize_and_send(update: Update, context: ContextTypes.DEFAULT_TYPE
             await context.bot.send_message(chat_id, t(update, "help"))
             log_usage(user_id, status="failure", reason="synthesis_error", language=info["name"],
                       ocr_pages=ocr_pages, file_type=file_type, file_size_kb=file_size_kb,
-                      duration_ms=elapsed_ms(), cost_credits=cost_credits)
+                      duration_ms=elapsed_ms(), cost_credits=cost_credits,
+                      ocr_pages_saved=ocr_pages_saved, boilerplate_chars=boilerplate_chars)
             return
 
-        ogg_path = f"{tempfile.mktemp()}.ogg"
-        convert_mp3_to_ogg(audio_path, ogg_path)
-
-        with open(ogg_path, "rb") as voice_file:
-            await context.bot.send_voice(chat_id=chat_id, voice=voice_file)
+        await context.bot.send_voice(chat_id=chat_id, voice=voice)
         await context.bot.send_message(chat_id, t(update, "playback_tip"))
         await context.bot.send_message(chat_id, t(update, "help"))
         logger.info(f"User {user_id} processed a file in language {locale2}")
         log_usage(user_id, status="success", language=info["name"], ocr_pages=ocr_pages,
                   tts_chars=len(normalized_text), file_type=file_type, file_size_kb=file_size_kb,
-                  duration_ms=elapsed_ms(), cost_credits=cost_credits)
+                  duration_ms=elapsed_ms(), cost_credits=cost_credits,
+                  ocr_pages_saved=ocr_pages_saved, boilerplate_chars=boilerplate_chars,
+                  tts_chars_saved=tts_chars_saved or None)
 
     except Exception as e:
         logger.error(f"Exception for user {user_id}: {e!r}")
@@ -2084,7 +5337,8 @@ async def synthesize_and_send(update: Update, context: ContextTypes.DEFAULT_TYPE
         await context.bot.send_message(chat_id, t(update, "help"))
         log_usage(user_id, status="failure", reason="exception", language=info["name"],
                   ocr_pages=ocr_pages, file_type=file_type, file_size_kb=file_size_kb,
-                  duration_ms=elapsed_ms(), cost_credits=cost_credits)
+                  duration_ms=elapsed_ms(), cost_credits=cost_credits,
+                  ocr_pages_saved=ocr_pages_saved, boilerplate_chars=boilerplate_chars)
     finally:
         stop_typing.set()
         typing_task.cancel()
@@ -2097,9 +5351,98 @@ async def synthesize_and_send(update: Update, context: ContextTypes.DEFAULT_TYPE
                 await status_message.delete()
         except Exception:
             pass
-        for path in [audio_path, ogg_path]:
-            remove_temp_file(path)
-        context.user_data.pop("ocr_job", None)
+
+
+async def stream_and_send(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                          file_path: str, file_type: str, locale2: str,
+                          file_size_kb: Optional[int], cost_credits: int, t0: float,
+                          ocr_pages: Optional[int] = None) -> None:
+    """Pinned Georgian/Armenian path with LLM_OCR_STREAM: read the file with
+    stream_llm_ocr and voice it while the model is still transcribing. Each
+    voice message holds the text that arrived while the previous one was being
+    synthesized, so the first sentence is heard early and later messages grow
+    longer. Like synthesize_and_send for a pinned language, it reads in one
+    voice, and the parts go through _voice_message so cached sentence audio is
+    reused. The read itself is not coalesced: a live stream has no result a
+    second request could join until it is over."""
+    user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
+    info = VOICE_MAP[locale2]
+    pieces = asyncio.Queue()
+
+    async def read():
+        try:
+            async for piece in stream_llm_ocr(file_path, file_type, locale2):
+                pieces.put_nowait(piece)
+        finally:
+            pieces.put_nowait(None)
+
+    reader = asyncio.create_task(read())
+    read_chars, saved_chars, voiced, first_ms = 0, 0, 0, None
+
+    def elapsed_ms():
+        return round((time.monotonic() - t0) * 1000)
+
+    def usage(status, reason=None):
+        log_usage(user_id, status=status, reason=reason, language=info["name"],
+                  tts_chars=read_chars or None, file_type=file_type,
+                  file_size_kb=file_size_kb, duration_ms=elapsed_ms(),
+                  cost_credits=cost_credits, ocr_pages=ocr_pages,
+                  tts_chars_saved=saved_chars or None)
+
+    try:
+        done = False
+        while not done:
+            batch = [await pieces.get()]
+            while not pieces.empty():
+                batch.append(pieces.get_nowait())
+            if None in batch:
+                done, batch = True, batch[:batch.index(None)]
+            text = normalize_ocr_text("".join(t for _, t in batch))
+            if not text.strip():
+                continue
+            result, saved, voice = await asyncio.to_thread(_voice_message, text, locale2)
+            if voice is None:
+                logger.error(f"Speech synthesis error for user {user_id} (streamed part "
+                             f"{voiced + 1}): {result.reason}")
+                await context.bot.send_message(chat_id, t(update, "synthesis_error"))
+                await context.bot.send_message(chat_id, t(update, "help"))
+                usage("failure", "synthesis_error")
+                return
+            await context.bot.send_voice(chat_id=chat_id, voice=voice)
+            read_chars += len(text)
+            saved_chars += saved
+            voiced += 1
+            if first_ms is None:
+                first_ms = elapsed_ms()
+        await reader  # re-raises a failed read
+    except Exception as ex:
+        logger.error(f"Streamed LLM OCR failed for user {user_id} after {voiced} part(s): {ex!r}")
+        if not voiced:
+            # Nothing voiced yet: report it like the non-streamed path reports
+            # a failed LLM read.
+            await context.bot.send_message(chat_id, t(update, "no_text"))
+            await context.bot.send_message(chat_id, t(update, "help"))
+            usage("failure", "no_text_fallback")
+        else:
+            await context.bot.send_message(chat_id, t(update, "generic_error"))
+            await context.bot.send_message(chat_id, t(update, "help"))
+            usage("failure", "exception")
+        return
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+    if not voiced:
+        await context.bot.send_message(chat_id, t(update, "no_text"))
+        await context.bot.send_message(chat_id, t(update, "help"))
+        usage("failure", "no_text_fallback")
+        return
+    await context.bot.send_message(chat_id, t(update, "playback_tip"))
+    await context.bot.send_message(chat_id, t(update, "help"))
+    logger.info(f"User {user_id} processed a file in language {locale2}: {voiced} streamed "
+                f"part(s), first audio after {first_ms} ms")
+    usage("success")
 
 
 async def on_language_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -2108,13 +5451,13 @@ async def on_language_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     data = query.data or ""
     if not data.startswith("lang:"):
         return
-    locale2 = data.split(":", 1)[1]
+    _, locale2, job_id = (data.split(":", 2) + [""])[:3]
     if locale2 in VOICE_MAP:
         try:
             user_store.add_recent_lang(update.effective_user.id, locale2)
         except Exception as ex:
             logger.warning(f"add_recent_lang failed: {ex!r}")
-    await synthesize_and_send(update, context, locale2, status_message=query.message)
+    await synthesize_and_send(update, context, locale2, job_id, status_message=query.message)
 
 
 def build_default_lang_keyboard(update: Update) -> InlineKeyboardMarkup:
@@ -2558,6 +5901,11 @@ async def _post_init(application) -> None:
     asyncio.create_task(_set_bot_descriptions(application.bot))
 
 
+async def _post_shutdown(application) -> None:
+    """Write what the user store still holds (the batched rescue rates)."""
+    await asyncio.to_thread(user_store.flush)
+
+
 def main() -> None:
     app = (
         ApplicationBuilder()
@@ -2566,6 +5914,7 @@ def main() -> None:
         .write_timeout(60)
         .connect_timeout(15)
         .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
         .build()
     )
     # Runs before everything (group=-1): drop duplicate webhook re-deliveries.
@@ -2580,10 +5929,11 @@ def main() -> None:
     app.add_handler(CommandHandler("feedback_recent", feedback_recent_command))
     app.add_handler(CommandHandler("feedback_stats", feedback_stats_command))
     app.add_handler(CommandHandler("feedback_digest", feedback_digest_command))
-    app.add_handler(MessageHandler(filters.Document.ALL | filters.PHOTO, handle_file))
+    # Files run concurrently (block=False), paced by the fast/slow lanes.
+    app.add_handler(MessageHandler(filters.Document.ALL | filters.PHOTO, handle_file, block=False))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, on_text_message))
     app.add_handler(CallbackQueryHandler(on_onboarding_callback, pattern=r"^onb:"))
-    app.add_handler(CallbackQueryHandler(on_precost_callback, pattern=r"^pre:"))
+    app.add_handler(CallbackQueryHandler(on_precost_callback, pattern=r"^pre:", block=False))
     app.add_handler(CallbackQueryHandler(on_support_callback, pattern=r"^sup:"))
     app.add_handler(CallbackQueryHandler(on_support_admin_callback, pattern=r"^supadm:"))
     app.add_handler(CallbackQueryHandler(on_unlimited_admin_callback, pattern=r"^unlim:"))
@@ -0,0 +1,222 @@
+"""Benchmark for the unread-ink scan (app._unread_ink_fraction's per-page core).
+
+Renders synthetic pages — dense (thousands of words), sparse, and slightly
+rotated — with a share of the words left out of the fake Azure result (the
+"dropped column" case), then times the NumPy scan against the previous
+PIL implementation (point() threshold, per-word ImageDraw polygons,
+MaxFilter dilation, mask multiply). Fails if the two fractions ever differ
+by more than TOLERANCE.
+
+A second pass sweeps the dropped share across UNREAD_INK_MIN_FRACTION and
+times the tiled-sampling threshold decision against the exact per-page
+analysis, then slides a short full-width block of unread ink (a dropped
+table or stamp between read lines) down a page. Fails if sampling ever flips
+a rescue decision.
+
+Pure local benchmark (no Azure calls), but importing app.py validates env and
+builds clients, so we inject a dummy Telegram token first (Azure keys come from
+.env). Run:  python qa/bench_ink_scan.py [--repeats 5]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+os.environ.setdefault("TELEGRAM_API_TOKEN", "qa-dummy-token")
+os.environ.setdefault("BOT_ENV", "qa")
+sys.path.insert(0, str(REPO_ROOT))
+
+for _stream in (sys.stdout, sys.stderr):
+    try:
+        _stream.reconfigure(encoding="utf-8", errors="replace")
+    except (AttributeError, ValueError):
+        pass
+
+from PIL import Image, ImageDraw, ImageFilter, ImageChops  # noqa: E402
+
+import app  # noqa: E402
+
+TOLERANCE = 0.01  # max |legacy - numpy| unread-ink fraction
+
+
+class _Word:
+    def __init__(self, polygon):
+        self.polygon = polygon
+
+
+class _Page:
+    def __init__(self, width, height, words):
+        self.width = width
+        self.height = height
+        self.words = words
+
+
+def _render(width, height, rows, cols, dropped, angle_deg, seed):
+    """A page of `rows` x `cols` ink "words" (striped blocks). Words in the
+    `dropped` share of columns get no polygon, like text Azure never read."""
+    rnd = random.Random(seed)
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    words = []
+    cw, rh = width / cols, height / rows
+    a = math.radians(angle_deg)
+    cx, cy = width / 2, height / 2
+
+    def rot(x, y):
+        dx, dy = x - cx, y - cy
+        return (cx + dx * math.cos(a) - dy * math.sin(a),
+                cy + dx * math.sin(a) + dy * math.cos(a))
+
+    dropped_cols = set(range(int(cols * (1 - dropped)), cols))
+    for r in range(rows):
+        for c in range(cols):
+            x0 = c * cw + cw * 0.1
+            x1 = x0 + cw * rnd.uniform(0.5, 0.8)
+            y0 = r * rh + rh * 0.2
+            y1 = y0 + rh * 0.6
+            quad = [rot(x0, y0), rot(x1, y0), rot(x1, y1), rot(x0, y1)]
+            draw.polygon(quad, fill=40)
+            # white stripes so the "word" isn't a solid block of ink
+            for sx in range(int(x0) + 3, int(x1), 6):
+                draw.line([rot(sx, y0), rot(sx, y1)], fill=255, width=2)
+            if c not in dropped_cols:
+                words.append(_Word([v for xy in quad for v in xy]))
+    return img, _Page(width, height, words)
+
+
+def _render_block(width, height, y, block_h):
+    """A sparse page of read text lines with one dense, unread, full-width
+    block of `block_h` px at `y` (a table Azure skipped) — shorter than the
+    gap between sampled bands, so the sample can miss it entirely."""
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+
+    def ink(x0, y0, x1, y1):
+        draw.rectangle([x0, y0, x1, y1], fill=40)
+        for sx in range(x0 + 3, x1, 6):
+            draw.line([(sx, y0), (sx, y1)], fill=255, width=2)
+
+    words = []
+    cw = width / 10
+    for ly in range(100, height - 100, 120):
+        if ly + 20 >= y and ly <= y + block_h:
+            continue
+        for c in range(10):
+            x0, x1 = int(c * cw + 20), int(c * cw + cw * 0.7)
+            ink(x0, ly, x1, ly + 20)
+            words.append(_Word([x0, ly, x1, ly, x1, ly + 20, x0, ly + 20]))
+    ink(40, y, width - 41, y + block_h - 1)
+    return img, _Page(width, height, words)
+
+
+def _legacy_page_fraction(img, page):
+    """The per-page body of _unread_ink_fraction before the NumPy rewrite."""
+    scale = min(1.0, app._INK_SCAN_MAX_DIM / max(img.size))
+    if scale < 1.0:
+        img = img.resize((max(1, int(img.size[0] * scale)),
+                          max(1, int(img.size[1] * scale))))
+    W, H = img.size
+    sx = W / (page.width or W)
+    sy = H / (page.height or H)
+    ink = img.point(lambda p: 255 if p < app.INK_DARK_THRESHOLD else 0, mode="L")
+    total_ink = ink.histogram()[255]
+    if not total_ink:
+        return 0.0
+    mask = Image.new("L", (W, H), 0)
+    draw = ImageDraw.Draw(mask)
+    for w in page.words:
+        poly = w.polygon or []
+        if len(poly) < 6:
+            continue
+        draw.polygon([(poly[i] * sx, poly[i + 1] * sy)
+                      for i in range(0, len(poly), 2)], fill=255)
+    mask = mask.filter(ImageFilter.MaxFilter(app._INK_MASK_DILATE))
+    inside_ink = ImageChops.multiply(ink, mask).histogram()[255]
+    return (total_ink - inside_ink) / total_ink
+
+
+def _numpy_page_fraction(img, page):
+    return app._page_unread_fraction(app._ink_array(img), page)
+
+
+def _best(fn, repeats):
+    best, value = float("inf"), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, value
+
+
+SCENARIOS = [
+    # name, width, height, rows, cols, dropped share, rotation (deg)
+    ("dense A4, 3000 words", 2480, 3508, 100, 30, 0.0, 0.0),
+    ("dense A4, half dropped", 2480, 3508, 100, 30, 0.5, 0.0),
+    ("sparse photo, 120 words", 1600, 1200, 20, 6, 0.3, 0.0),
+    ("rotated 3°, 1500 words", 2000, 2800, 60, 25, 0.4, 3.0),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"  {'scenario':<28}{'legacy':>10}{'numpy':>10}{'speedup':>9}"
+          f"{'frac(legacy)':>14}{'frac(numpy)':>13}")
+    for i, (name, w, h, rows, cols, dropped, angle) in enumerate(SCENARIOS):
+        img, page = _render(w, h, rows, cols, dropped, angle, seed=i)
+        t_old, f_old = _best(lambda: _legacy_page_fraction(img, page), args.repeats)
+        t_new, f_new = _best(lambda: _numpy_page_fraction(img, page), args.repeats)
+        ok = abs(f_old - f_new) <= TOLERANCE
+        print(f"{'✓' if ok else '✗'} {name:<28}{t_old * 1000:>8.1f}ms{t_new * 1000:>8.1f}ms"
+              f"{t_old / t_new:>8.1f}x{f_old:>14.4f}{f_new:>13.4f}")
+        if not ok:
+            failures.append(f"fraction outside ±{TOLERANCE}: {name}")
+
+    thr = app.UNREAD_INK_MIN_FRACTION
+    print(f"\n  {'threshold decision':<28}{'exact':>10}{'sampled':>10}{'speedup':>9}"
+          f"{'frac(exact)':>14}{'decision':>10}")
+    for i, dropped in enumerate((0.0, 0.1, 0.2, 0.27, 0.3, 0.34, 0.4, 0.6)):
+        for angle in (0.0, 2.0):
+            img, page = _render(2480, 3508, 80, 20, dropped, angle, seed=100 + i)
+            ink = app._ink_array(img)
+            t_full, f_full = _best(lambda: app._page_unread_fraction(ink, page), args.repeats)
+            t_dec, f_dec = _best(lambda: app._page_unread_decision(ink, page, thr), args.repeats)
+            ok = (f_full >= thr) == (f_dec >= thr)
+            name = f"dropped {dropped:.2f}, {angle:.0f}°"
+            print(f"{'✓' if ok else '✗'} {name:<28}{t_full * 1000:>8.1f}ms{t_dec * 1000:>8.1f}ms"
+                  f"{t_full / t_dec:>8.1f}x{f_full:>14.4f}{'rescue' if f_dec >= thr else 'keep':>10}")
+            if not ok:
+                failures.append(f"decision flipped: {name}")
+
+    print(f"\n  {'unread block sweep':<28}{'exact':>10}{'sampled':>10}{'speedup':>9}"
+          f"{'frac(exact)':>14}{'decision':>10}")
+    for y in range(100, 3160, 52):
+        img, page = _render_block(2480, 3508, y, 240)
+        ink = app._ink_array(img)
+        t_full, f_full = _best(lambda: app._page_unread_fraction(ink, page), 1)
+        t_dec, f_dec = _best(lambda: app._page_unread_decision(ink, page, thr), 1)
+        ok = (f_full >= thr) == (f_dec >= thr)
+        if not ok or y % 520 == 100:
+            name = f"block at y={y}"
+            print(f"{'✓' if ok else '✗'} {name:<28}{t_full * 1000:>8.1f}ms{t_dec * 1000:>8.1f}ms"
+                  f"{t_full / t_dec:>8.1f}x{f_full:>14.4f}{'rescue' if f_dec >= thr else 'keep':>10}")
+        if not ok:
+            failures.append(f"decision flipped: block at y={y}")
+
+    print()
+    if failures:
+        print(f"FAILED: {len(failures)} — {', '.join(failures)}")
+        return 1
+    print(f"All scenarios within ±{TOLERANCE} of the legacy fraction; no decision flipped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
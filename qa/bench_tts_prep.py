@@ -0,0 +1,90 @@
+"""Micro-benchmark for app.prepare_tts_text — throughput in characters/second.
+
+Builds a realistic block per language (prose with amounts, areas, phones and
+years), then times prepare_tts_text on it: once cold (rule sets and the number
+speller cache cleared) and repeatedly warm. For Ukrainian it also times the
+previous implementation (regexes compiled per call, num2words per match) as a
+baseline.
+
+Pure-function benchmark (no Azure calls), but importing app.py validates env
+and builds clients, so we inject a dummy Telegram token first (Azure keys come
+from .env). Run:  python qa/bench_tts_prep.py [--lang uk,ru,en] [--kb 64]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+os.environ.setdefault("TELEGRAM_API_TOKEN", "qa-dummy-token")
+os.environ.setdefault("BOT_ENV", "qa")
+sys.path.insert(0, str(REPO_ROOT))
+
+for _stream in (sys.stdout, sys.stderr):
+    try:
+        _stream.reconfigure(encoding="utf-8", errors="replace")
+    except (AttributeError, ValueError):
+        pass
+
+import app  # noqa: E402
+
+SAMPLE = {
+    "uk": "Площа квартири 106.4 м2, ціна 1 250 000 грн, депозит 125000 грн. "
+          "Тел. +380 67 123-45-67, договір від 12.03.2024 о 14:30. ",
+    "ru": "Площадь 106.4 м2, цена 1 250 000 руб, залог 125000 руб. "
+          "Тел. +7 912 123-45-67, договор от 12.03.2024 в 14:30. ",
+    "en": "The flat is 106.4 m2 and costs 1 250 000 USD, deposit 125000 USD. "
+          "Call +1 212 555-0100, signed 12.03.2024 at 14:30. ",
+}
+
+
+def _legacy_prepare_uk(text):
+    """prepare_tts_text for 'uk' as it was before the per-language registry."""
+    from num2words import num2words
+
+    def repl(m):
+        try:
+            return num2words(int(m.group(0).replace(' ', '')), lang="uk")
+        except Exception:
+            return m.group(0)
+
+    text = re.sub(r'(?<=\d)\s*м\s*[²2](?![\d²³])', ' квадратних метрів', text)
+    text = re.sub(r'(?<=\d)\s*м\s*[³3](?![\d²³])', ' кубічних метрів', text)
+    text = re.sub(r'(?<!\d)\d{1,3}(?: \d{3}){2,}(?!\d)', repl, text)
+    text = re.sub(r'(?<![\d.:+\-])\d{5,}(?![\d.:\-])', repl, text)
+    return text
+
+
+def _chars_per_s(fn, text, repeats):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn(text)
+    return len(text) * repeats / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lang", default=",".join(SAMPLE), help="comma-separated codes")
+    parser.add_argument("--kb", type=int, default=64, help="block size per call")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    langs = [c.strip() for c in args.lang.split(",") if c.strip()]
+    app.TTS_SPELL_NUMBERS |= set(langs)  # time number spelling wherever num2words has it
+    print(f"{'lang':<6}{'cold':>14}{'warm':>14}{'legacy':>14}   (chars/s)")
+    for lang in langs:
+        unit = SAMPLE.get(lang, SAMPLE["en"])
+        text = unit * max(1, args.kb * 1024 // len(unit))
+        app._tts_prep.cache_clear()
+        app._spell_number.cache_clear()
+        cold = _chars_per_s(lambda s: app.prepare_tts_text(s, lang), text, 1)
+        warm = _chars_per_s(lambda s: app.prepare_tts_text(s, lang), text, args.repeats)
+        legacy = (f"{_chars_per_s(_legacy_prepare_uk, text, args.repeats):>14,.0f}"
+                  if lang == "uk" else f"{'-':>14}")
+        print(f"{lang:<6}{cold:>14,.0f}{warm:>14,.0f}{legacy}")
+
+
+if __name__ == "__main__":
+    main()
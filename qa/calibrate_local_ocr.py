@@ -0,0 +1,87 @@
+"""Calibrate the local OCR fast path (app.LOCAL_OCR_MIN_SCORE) against Azure Read.
+
+Takes a run_ocr.py results file as the Azure baseline (run it with
+--pin-expected: the fast path only serves pinned languages), then reads every
+image case with a ground truth in a Tesseract language locally — the quality
+score from app._file_quality, the text and confidence from app._tesseract_read
+— and compares CERs. The recommendation is the lowest score at which every
+case at or above it, that Tesseract is confident in, reads within --tolerance
+of Azure's CER; set it via LOCAL_OCR_MIN_SCORE.
+
+Local only (Tesseract + pytesseract must be installed; no Azure calls — the
+baseline comes from the results file).
+
+Usage:
+    python qa/run_ocr.py --pin-expected
+    python qa/calibrate_local_ocr.py qa/results/run-YYYYMMDD-HHMMSS.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+QA_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(QA_DIR))
+
+from run_ocr import _file_type_for, _quiet_sdk_logs, load_cases, resolve_case  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results", help="run_ocr.py results JSON (the Azure baseline)")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="max CER increase over Azure's on any locally read case")
+    args = parser.parse_args()
+
+    import metrics  # local module
+    import app  # bot module — triggers env validation + Azure client setup
+    _quiet_sdk_logs()
+
+    data = json.loads(Path(args.results).read_text(encoding="utf-8"))
+    azure = {r["id"]: r["cer"] for r in data["results"] if r.get("cer") is not None}
+
+    rows = []
+    print(f"  {'case':<28}{'score':>7}{'conf':>6}{'CER local':>11}{'CER azure':>11}")
+    for case in load_cases():
+        cid, lang = case.get("id"), case.get("expected_lang")
+        if cid not in azure or lang not in app._TESSERACT_LANGS:
+            continue
+        try:
+            src, expected = resolve_case(case)
+        except ValueError:
+            continue
+        if not expected or _file_type_for(src) != "image":
+            continue
+        quality = app._file_quality(str(src))
+        tess = app._TESSERACT_LANGS[lang] + ("" if lang == "en" else "+eng")
+        raw, conf, _ = app._tesseract_read(str(src), tess)
+        cer = metrics.cer(expected, app.normalize_ocr_text(raw))
+        if cer is None:
+            continue
+        rows.append((cid, quality.score, conf, cer, azure[cid]))
+        print(f"  {cid:<28}{quality.score:>7.2f}{conf:>6.0f}{cer:>11.4f}{azure[cid]:>11.4f}")
+    if not rows:
+        sys.exit("No image cases in a Tesseract language with ground truth and an Azure CER.")
+
+    # Walk the cutoff down from the cleanest case while every confident case
+    # above it stays within tolerance.
+    rows.sort(key=lambda r: r[1], reverse=True)
+    cutoff = None
+    for i, row in enumerate(rows):
+        served = [r for r in rows[:i + 1] if r[2] >= app.LOCAL_OCR_MIN_CONF]
+        if any(r[3] > r[4] + args.tolerance for r in served):
+            break
+        cutoff = row[1]
+    print()
+    if cutoff is None:
+        print("Recommended: keep LOCAL_OCR off — even the cleanest case regresses.")
+        return 0
+    local = [r for r in rows if r[1] >= cutoff and r[2] >= app.LOCAL_OCR_MIN_CONF]
+    print(f"{len(rows)} cases. Recommended: LOCAL_OCR_MIN_SCORE={cutoff:.2f} "
+          f"({len(local)} of {len(rows)} cases read locally "
+          f"at LOCAL_OCR_MIN_CONF={app.LOCAL_OCR_MIN_CONF:.0f}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
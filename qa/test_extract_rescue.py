@@ -7,14 +7,21 @@ per-line classifier guessed wrong on every line. The old rescue only fired on
 empty text or an unsupported dominant locale, so this page sailed through and
 got rendered with three wrong voices instead of running the LLM-OCR rescue.
 
-Mocks doc_client.begin_analyze_document and run_llm_ocr (no live Azure calls).
+Mocks doc_client.begin_analyze_document and run_llm_ocr or its Azure OpenAI
+client (no live Azure calls).
 Run:  python qa/test_extract_rescue.py
 """
+import asyncio
+import base64
+import io
 import os
 import sys
 import tempfile
+import threading
+import time
 from pathlib import Path
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 os.environ.setdefault("TELEGRAM_API_TOKEN", "qa-dummy-token")
@@ -44,13 +51,22 @@ class _Lang:
 
 
 class _Line:
-    def __init__(self, content):
+    def __init__(self, content, polygon=None, offset=None):
         self.content = content
+        self.polygon = polygon
+        self.spans = [_Span(offset, len(content))] if offset is not None else []
+
+
+class _Word:
+    def __init__(self, polygon):
+        self.polygon = polygon
 
 
 class _Page:
     def __init__(self, content):
         self.lines = [_Line(content)]
+        self.width = self.height = None
+        self.words = []
 
 
 class _Result:
@@ -196,6 +212,962 @@ def run():
     check("clean English page with low unread ink is not rescued",
           result6.locale2 == "en" and result6.used_fallback is False)
 
+    # The sampled ink decision: a short, dense block of unread rows (a table
+    # Azure skipped) between read lines can fall between every sampled band;
+    # wherever it sits, the decision matches the exact scan.
+    import numpy as np
+    thr = app.UNREAD_INK_MIN_FRACTION
+    flipped = []
+    for y in range(100, 3160, 52):
+        ink = np.zeros((3508, 2480), dtype=bool)
+        words = []
+        for ly in range(100, 3408, 120):
+            if ly + 20 >= y and ly <= y + 240:
+                continue
+            for c in range(10):
+                x0, x1 = c * 248 + 20, c * 248 + 173
+                ink[ly:ly + 21, x0:x1 + 1:3] = True
+                words.append(_Word([x0, ly, x1, ly, x1, ly + 20, x0, ly + 20]))
+        ink[y:y + 240, 40:2440:3] = True
+        page = SimpleNamespace(width=2480, height=3508, words=words)
+        exact = app._page_unread_fraction(ink, page)
+        if (app._page_unread_decision(ink, page, thr) >= thr) != (exact >= thr):
+            flipped.append(y)
+    check("an unread block of rows missed by the sample still gets the exact scan",
+          not flipped)
+
+    # The ink scan's rasterization must overlap the Azure Read call: the poller
+    # below only returns once the background prep has started thresholding.
+    from PIL import Image
+    png_path = tempfile.mktemp(suffix=".png")
+    Image.new("L", (200, 100), 255).save(png_path)
+    prep_started = threading.Event()
+    real_ink_array = app._ink_array
+
+    def spy_ink_array(img):
+        prep_started.set()
+        return real_ink_array(img)
+
+    class _WaitingPoller:
+        def result(self):
+            self.overlapped = prep_started.wait(5)
+            return clean_en
+
+    waiting = _WaitingPoller()
+    with patch.object(app.doc_client, "begin_analyze_document", return_value=waiting), \
+         patch.object(app, "_ink_array", side_effect=spy_ink_array), \
+         patch.object(app, "run_llm_ocr", side_effect=AssertionError("should not be called")), \
+         patch.object(app, "OCR_FALLBACK", "llm"), \
+         patch.object(app, "_azure_openai_configured", return_value=True):
+        result7 = app.extract_text(png_path, "image")
+
+    check("ink-scan rasterization overlaps the Azure Read call",
+          waiting.overlapped and result7.used_fallback is False)
+
+    # A rescued PDF is opened and rasterized once: the pre-screen renders small
+    # grayscale pages, the ink scan one full-DPI render per page, downsampled
+    # for the scan and kept for the LLM.
+    import fitz
+    pdf_path = tempfile.mktemp(suffix=".pdf")
+    with fitz.open() as doc:
+        for _ in range(3):
+            doc.new_page().draw_rect(fitz.Rect(72, 72, 400, 300), fill=(0, 0, 0))
+        doc.save(pdf_path)
+    clean_en_pdf = _Result("E" * 60, [_Lang("en-US", 0.98, [(0, 60)])])
+    clean_en_pdf.pages = [_Page("E" * 20) for _ in range(3)]
+    opens, renders, pngs = [], [], []
+    real_open, real_get_pixmap = fitz.open, fitz.Page.get_pixmap
+
+    def spy_open(*a, **kw):
+        opens.append(a)
+        return real_open(*a, **kw)
+
+    def spy_get_pixmap(page, *a, **kw):
+        renders.append((page.number, kw.get("dpi"), kw.get("colorspace") is fitz.csGRAY))
+        return real_get_pixmap(page, *a, **kw)
+
+    class _FakeCompletions:
+        async def create(self, messages, **kw):
+            for part in messages[0]["content"][1:]:
+                b64 = part["image_url"]["url"].split(",", 1)[1]
+                pngs.append(base64.b64decode(b64))
+            reply = '{"segments":[{"lang":"ka","text":"%s"}]}' % rescued_text
+            return SimpleNamespace(choices=[SimpleNamespace(
+                finish_reason="stop", message=SimpleNamespace(content=reply))])
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+
+    with patch.object(app.doc_client, "begin_analyze_document",
+                       return_value=_Poller(clean_en_pdf)), \
+         patch.object(fitz, "open", side_effect=spy_open), \
+         patch.object(fitz.Page, "get_pixmap", spy_get_pixmap), \
+         patch.object(app, "_llm_client", return_value=fake_client), \
+         patch.object(app, "OCR_FALLBACK", "llm"), \
+         patch.object(app, "_azure_openai_configured", return_value=True):
+        result8 = app.extract_text(pdf_path, "pdf")
+
+    check("rescued PDF: ink scan flags the unread page", result8.used_fallback is True)
+    check("rescued PDF: document opened once", len(opens) == 1)
+    check("rescued PDF: other renders are small (pre-screen, color probe)",
+          all(dpi <= app._PRESCREEN_CONFIRM_DPI for _, dpi, _ in renders
+              if dpi != app._LLM_OCR_DPI))
+    check("rescued PDF: each page rendered at full DPI once, for scan and LLM",
+          sorted(i for i, dpi, _ in renders if dpi == app._LLM_OCR_DPI) == [0, 1, 2])
+    check("rescued PDF: a page without color is rendered and kept in grayscale",
+          all(gray for _, dpi, gray in renders if dpi == app._LLM_OCR_DPI))
+    check("rescued PDF: LLM gets an image per page",
+          len(pngs) == 3 and all(Image.open(io.BytesIO(p)).size[0] > 0 for p in pngs))
+
+    # Region-targeted rescue: a side-by-side page where Azure read the English
+    # column (words + lines with geometry) and dropped the Georgian one. Only
+    # a crop around the unread column goes to the LLM, and its text is put
+    # before the English column (left to right), which is kept from Azure.
+    from PIL import ImageDraw
+    W, H = 1200, 800
+    page_img = Image.new("L", (W, H), 255)
+    draw = ImageDraw.Draw(page_img)
+    en_lines, words, line_boxes = [], [], []
+    for row in range(12):
+        y0 = 80 + row * 50
+        for x0 in (60, 660):
+            for k in range(4):
+                wx0 = x0 + k * 115
+                draw.rectangle([wx0, y0, wx0 + 90, y0 + 24], fill=30)
+                for sx in range(wx0 + 4, wx0 + 90, 7):
+                    draw.line([(sx, y0), (sx, y0 + 24)], fill=255, width=2)
+                if x0 == 660:
+                    words.append(_Word([wx0, y0, wx0 + 90, y0, wx0 + 90, y0 + 24, wx0, y0 + 24]))
+        en_lines.append(f"English line {row}.")
+        line_boxes.append([660, y0, 1100, y0, 1100, y0 + 24, 660, y0 + 24])
+    region_path = tempfile.mktemp(suffix=".png")
+    page_img.save(region_path)
+    en_content = "\n".join(en_lines)
+    side_by_side = _Result(en_content, [_Lang("en-US", 0.99, [(0, len(en_content))])])
+    page = side_by_side.pages[0]
+    page.width, page.height, page.words = W, H, words
+    offsets = [sum(len(l) + 1 for l in en_lines[:i]) for i in range(len(en_lines))]
+    page.lines = [_Line(text, poly, off)
+                  for text, poly, off in zip(en_lines, line_boxes, offsets)]
+
+    crops = []
+
+    class _CropCompletions:
+        async def create(self, messages, **kw):
+            for part in messages[0]["content"][1:]:
+                b64 = part["image_url"]["url"].split(",", 1)[1]
+                crops.append(Image.open(io.BytesIO(base64.b64decode(b64))).size)
+            reply = '{"segments":[{"lang":"ka","text":"%s"}]}' % rescued_text
+            return SimpleNamespace(choices=[SimpleNamespace(
+                finish_reason="stop", message=SimpleNamespace(content=reply))])
+
+    crop_client = SimpleNamespace(chat=SimpleNamespace(completions=_CropCompletions()))
+    with patch.object(app.doc_client, "begin_analyze_document",
+                       return_value=_Poller(side_by_side)), \
+         patch.object(app, "_llm_client", return_value=crop_client), \
+         patch.object(app, "OCR_FALLBACK", "llm"), \
+         patch.object(app, "_azure_openai_configured", return_value=True):
+        result9 = app.extract_text(region_path, "image")
+
+    check("dropped column: only one crop sent to the LLM",
+          len(crops) == 1 and crops[0][0] * crops[0][1] < W * H / 2)
+    check("dropped column: LLM text first, Azure's English column kept",
+          result9.used_fallback is True and result9.text.startswith(rescued_text)
+          and "English line 0. English line 1." in result9.text
+          and [loc for loc, _ in (result9.segments or [])] == ["ka", "en"])
+
+    # A full-width title and footer don't join the two columns into one: the
+    # dropped Georgian column still comes before the English one.
+    two_cols = app._RegionPlan([(0, (0.05, 0.15, 0.48, 0.9))], {0: [
+        ((0.05, 0.02, 0.95, 0.06), "en", "Contract title."),
+        *[((0.55, 0.1 + 0.1 * r, 0.95, 0.14 + 0.1 * r), "en", f"English line {r}.")
+          for r in range(3)],
+        ((0.05, 0.93, 0.95, 0.97), "en", "Page footer."),
+    ]})
+    merged = app._merge_region_segments(two_cols, [[("ka", rescued_text)]])
+    check("full-width title: columns still read left to right",
+          merged == [("en", "Contract title."), ("ka", rescued_text),
+                     ("en", "English line 0.\nEnglish line 1.\nEnglish line 2.\nPage footer.")])
+
+    # Hedged read: with speculate=True the LLM read starts before Azure Read
+    # returns (the poller waits for it) and becomes the rescue on a hit...
+    llm_started = threading.Event()
+
+    class _WaitForLlm(_Poller):
+        def result(self):
+            llm_started.wait(2)
+            return self._result
+
+    async def speculative_llm(*a, **kw):
+        llm_started.set()
+        return rescued_text, [("ka", rescued_text)]
+
+    with patch.object(app.doc_client, "begin_analyze_document",
+                       return_value=_WaitForLlm(clean_en)), \
+         patch.object(app, "_unread_ink_fraction", return_value=0.52), \
+         patch.object(app, "run_llm_ocr", side_effect=speculative_llm) as llm, \
+         patch.object(app, "OCR_FALLBACK", "llm"), \
+         patch.object(app, "_azure_openai_configured", return_value=True):
+        hit = asyncio.run(app.extract_text_async(fake_path, "image", speculate=True))
+    check("speculative LLM read overlaps Azure Read", llm_started.is_set())
+    check("speculation hit is the rescue, LLM called once",
+          hit.used_fallback is True and hit.text.startswith(rescued_text) and llm.call_count == 1)
+
+    # ...and is cancelled, Azure's text kept, on a miss.
+    cancelled = threading.Event()
+
+    async def slow_llm(*a, **kw):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with patch.object(app.doc_client, "begin_analyze_document",
+                       return_value=_Poller(clean_en)), \
+         patch.object(app, "_unread_ink_fraction", return_value=0.02), \
+         patch.object(app, "run_llm_ocr", side_effect=slow_llm), \
+         patch.object(app, "OCR_FALLBACK", "llm"), \
+         patch.object(app, "_azure_openai_configured", return_value=True):
+        miss = asyncio.run(asyncio.wait_for(
+            app.extract_text_async(fake_path, "image", speculate=True), 10))
+    check("speculation miss cancels the LLM read and keeps Azure's text",
+          cancelled.is_set() and miss.used_fallback is False and miss.locale2 == "en")
+
+    # A failed hedge still rescues: the LLM is asked again after Azure Read.
+    calls = []
+
+    async def failing_then_ok(*a, **kw):
+        calls.append(a)
+        if len(calls) == 1:
+            return "", None
+        return rescued_text, [("ka", rescued_text)]
+
+    with patch.object(app.doc_client, "begin_analyze_document",
+                       return_value=_Poller(clean_en)), \
+         patch.object(app, "_unread_ink_fraction", return_value=0.52), \
+         patch.object(app, "run_llm_ocr", side_effect=failing_then_ok), \
+         patch.object(app, "OCR_FALLBACK", "llm"), \
+         patch.object(app, "_azure_openai_configured", return_value=True):
+        retried = asyncio.run(app.extract_text_async(fake_path, "image", speculate=True))
+    check("failed speculative read is retried as the rescue",
+          len(calls) == 2 and retried.used_fallback is True
+          and retried.text.startswith(rescued_text))
+
+    # The learned rate is written in batches, not on every file; until then
+    # get_user still sees it.
+    from unittest.mock import MagicMock
+    table = object.__new__(app._TableStore)
+    table._client = MagicMock()
+    table._client.get_entity.return_value = {"default_lang": "kk", "rescue_rate": "0.500"}
+    table._rates, table._rates_lock, table._rates_flushed = {}, threading.Lock(), time.monotonic()
+    for uid in (1, 2, 1):
+        table.set_rescue_rate(uid, 0.25 * uid)
+    held = (table._client.submit_transaction.call_count == 0
+            and table.get_user(1)["rescue_rate"] == "0.250")
+    with patch.object(app, "RESCUE_RATE_FLUSH_S", 0):
+        table.set_rescue_rate(3, 0.1)
+    (ops,), _ = table._client.submit_transaction.call_args
+    check("rescue rates held, then written in one transaction",
+          held and table._client.submit_transaction.call_count == 1
+          and table._client.upsert_entity.call_count == 0
+          and sorted((e["RowKey"], e["rescue_rate"]) for _, e in ops)
+          == [("1", "0.250"), ("2", "0.500"), ("3", "0.100")]
+          and table.get_user(1)["rescue_rate"] == "0.500")
+
+    # Likelihood: a prior for an unhinted pinned language, then learned.
+    check("no history, hinted or no pin -> no speculation",
+          app._rescue_likelihood({}) == 0.0
+          and app._rescue_likelihood({"default_lang": "ru"}) == 0.0)
+    prior = app._rescue_likelihood({"default_lang": "kk"})
+    check("unhinted pinned language starts at the prior",
+          prior == app._RESCUE_PRIOR_UNHINTED)
+    rate = prior
+    for _ in range(5):
+        rate = app._next_rescue_rate(rate, False)
+    check("clean files teach the rate down below the threshold",
+          app._rescue_likelihood({"default_lang": "kk", "rescue_rate": f"{rate:.3f}"})
+          < app.LLM_SPECULATE_MIN_LIKELIHOOD)
+
+    # Digital PDF: text-layer pages skip Azure Read; only the scanned page is
+    # sent (pages="2"), and the merge keeps page order and Azure's languages.
+    import fitz
+    from unittest.mock import MagicMock
+    layer_path = tempfile.mktemp(suffix=".pdf")
+    scan = io.BytesIO()
+    Image.new("L", (600, 800), 200).save(scan, "PNG")
+    with fitz.open() as doc:
+        for k in range(3):
+            pg = doc.new_page()
+            if k == 1:
+                pg.insert_image(pg.rect, stream=scan.getvalue())
+            else:
+                pg.insert_text((72, 72), f"Digital page {k} says hello to the reader.")
+        doc.save(layer_path)
+    scanned = _Result("Scanned line one\nScanned line two",
+                      [_Lang("en-US", 0.97, [(0, 33)])])
+    scanned.pages[0].lines = [_Line("Scanned line one", None, 0),
+                              _Line("Scanned line two", None, 17)]
+    scanned.pages[0].page_number = 2
+    analyze = MagicMock(return_value=_Poller(scanned))
+    with patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        mixed = app.extract_text(layer_path, "pdf")
+    check("only the scanned page goes to Azure Read",
+          analyze.call_count == 1 and analyze.call_args.kwargs.get("pages") == "2")
+    t = mixed.text
+    check("text layer and Azure pages merged in page order",
+          t.index("Digital page 0") < t.index("Scanned line one")
+          < t.index("Scanned line two") < t.index("Digital page 2"))
+    check("Azure's language spans re-based onto the merged text",
+          mixed.locale2 == "en" and mixed.ocr_pages == 3)
+    layer = app._pdf_text_layer(layer_path)
+    merged = app._merge_read(layer, scanned, [1])
+    span = merged.languages[0].spans
+    check("re-based spans cover exactly Azure's lines",
+          [merged.content[s.offset:s.offset + s.length] for s in span]
+          == ["Scanned line one", "Scanned line two"])
+
+    with fitz.open(layer_path) as doc:
+        doc.delete_page(1)
+        doc.save(layer_path + ".digital.pdf")
+    analyze.reset_mock()
+    with patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        pinned = app.extract_text(layer_path + ".digital.pdf", "pdf", pinned_lang="en")
+    check("all-digital PDF with a pinned language never calls Azure",
+          analyze.call_count == 0 and pinned.locale2 == "en"
+          and "Digital page 2 says hello" in pinned.text)
+    with patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        app.extract_text(layer_path + ".digital.pdf", "pdf")
+    check("all-digital PDF, no pin: Azure reads one page for the language",
+          analyze.call_count == 1 and analyze.call_args.kwargs.get("pages") in ("1", "2"))
+    os.remove(layer_path + ".digital.pdf")
+    os.remove(layer_path)
+
+    # Scanned PDF with a blank separator and a page scanned twice: the
+    # pre-screen skips the blank and, with PDF_PRESCREEN=dupes, the rescan;
+    # Azure reads the rest, and the skipped pages keep their place. A page
+    # differing from page 1 in one word block is kept.
+    import numpy as np
+    import random
+
+    def scan_page(seed, noise_seed, changed_row=None):
+        rnd = random.Random(seed)
+        img = Image.new("L", (1240, 1754), 235)
+        d = ImageDraw.Draw(img)
+        if seed is not None:
+            for r in range(30):
+                x = 120
+                while x < 1050:
+                    w = rnd.randint(40, 140)
+                    fill = 30 if r != changed_row or x > 400 else 235
+                    d.rectangle([x, 150 + r * 48, x + w, 172 + r * 48], fill=fill)
+                    x += w + 25
+        noise = np.random.default_rng(noise_seed).normal(0, 8, (1754, 1240))
+        img = Image.fromarray(np.clip(np.asarray(img) + noise, 0, 255).astype("uint8"))
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=75)
+        return out.getvalue()
+
+    dup_path = tempfile.mktemp(suffix=".pdf")
+    with fitz.open() as doc:
+        for seed, noise_seed, changed in ((1, 1, None), (None, 2, None), (1, 3, None),
+                                          (2, 4, None), (1, 5, 12)):
+            pg = doc.new_page()
+            pg.insert_image(pg.rect, stream=scan_page(seed, noise_seed, changed))
+        doc.save(dup_path)
+    check("pre-screen: only the blank page skipped by default",
+          app._prescreen_pages(dup_path, None, range(5)) == {1: None})
+    check("pre-screen dupes: blank page and rescan skipped, near-miss kept",
+          app._prescreen_pages(dup_path, None, range(5), dupes=True) == {1: None, 2: 0})
+
+    # Two invoice pages differing only in the amount look alike at 48 DPI;
+    # the high-DPI confirmation keeps both, and still drops a rescan.
+    from PIL import ImageFont
+    font = ImageFont.load_default(size=28)
+
+    def invoice_page(amount, noise_seed):
+        img = Image.new("L", (1240, 1754), 235)
+        d = ImageDraw.Draw(img)
+        for r in range(24):
+            d.text((120, 150 + r * 48), f"Item {r + 1:02d}  Consulting services, March"
+                                        f"  qty 1  unit 120.00", fill=30, font=font)
+        d.text((120, 150 + 25 * 48), f"Total due: {amount}", fill=30, font=font)
+        noise = np.random.default_rng(noise_seed).normal(0, 8, (1754, 1240))
+        img = Image.fromarray(np.clip(np.asarray(img) + noise, 0, 255).astype("uint8"))
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=75)
+        return out.getvalue()
+
+    invoice_path = tempfile.mktemp(suffix=".pdf")
+    with fitz.open() as doc:
+        for amount, noise_seed in (("2,880.00", 1), ("2,830.00", 2), ("2,880.00", 3)):
+            pg = doc.new_page()
+            pg.insert_image(pg.rect, stream=invoice_page(amount, noise_seed))
+        doc.save(invoice_path)
+    check("pre-screen dupes: pages differing only in a number both read",
+          app._prescreen_pages(invoice_path, None, range(3), dupes=True) == {2: 0})
+    os.remove(invoice_path)
+    read = _Result("", [])
+    read.pages = []
+    for n in (1, 4, 5):
+        p = _Page(f"Text of page {n}")
+        p.page_number = n
+        read.pages.append(p)
+    analyze = MagicMock(return_value=_Poller(read))
+    with patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "PDF_PRESCREEN", "dupes"), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        screened = app.extract_text(dup_path, "pdf", pinned_lang="en")
+    check("pre-screen: only the distinct pages go to Azure Read",
+          analyze.call_args.kwargs.get("pages") == "1,4-5")
+    check("pre-screen: skipped pages counted as saved, page count kept",
+          screened.ocr_pages_saved == 2 and screened.ocr_pages == 5)
+    check("pre-screen: duplicate read once, in page order",
+          screened.text.count("Text of page 1") == 1
+          and screened.text.index("page 1") < screened.text.index("page 4"))
+    with patch.object(app, "PDF_PRESCREEN", "off"), patch.object(app, "PAGE_CACHE", "off"), \
+         patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        analyze.reset_mock()
+        app.extract_text(dup_path, "pdf", pinned_lang="en")
+    check("pre-screen off: the whole file goes to Azure Read",
+          "pages" not in analyze.call_args.kwargs)
+
+    # The same scans as a multi-page TIFF are read page by page like the PDF:
+    # every frame pre-screened and ink-scanned, not just the first.
+    tiff_path = tempfile.mktemp(suffix=".tif")
+    frames = [Image.open(io.BytesIO(scan_page(seed, noise_seed, changed)))
+              for seed, noise_seed, changed in ((1, 1, None), (None, 2, None), (1, 3, None),
+                                                (2, 4, None), (1, 5, 12))]
+    frames[0].save(tiff_path, save_all=True, append_images=frames[1:],
+                   dpi=(150, 150), compression="tiff_deflate")
+    check("multi-page TIFF read as a paged document",
+          app._paged_type(tiff_path, "image") == "pdf"
+          and app._paged_type(png_path, "image") == "image")
+    analyze.reset_mock()
+    with patch.object(app, "_page_cache", app._PageCache(100)), \
+         patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "PDF_PRESCREEN", "dupes"), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        framed = app.extract_text(tiff_path, "image", pinned_lang="en")
+    check("multi-page TIFF: frames pre-screened, the rest sent by page",
+          analyze.call_args.kwargs.get("pages") == "1,4-5"
+          and framed.ocr_pages == 5 and framed.ocr_pages_saved == 2)
+    check("multi-page TIFF: every frame ink-scanned",
+          [idx for _, idx in app._prepare_ink_pages(tiff_path, "pdf")] == [0, 1, 2, 3, 4])
+    os.remove(tiff_path)
+
+    # Other multi-frame images aren't paged: an MPO camera JPEG (photo plus
+    # preview) and an animated GIF are read as one picture, priced as one page.
+    for fmt, suffix in (("MPO", ".jpg"), ("GIF", ".gif")):
+        multi_path = tempfile.mktemp(suffix=suffix)
+        frames[0].convert("RGB").save(multi_path, fmt, save_all=True,
+                                      append_images=[frames[1].convert("RGB")])
+        analyze.reset_mock()
+        with patch.object(app, "_page_cache", app._PageCache(100)), \
+             patch.object(app.doc_client, "begin_analyze_document", analyze), \
+             patch.object(app, "_azure_openai_configured", return_value=False):
+            app.extract_text(multi_path, "image", pinned_lang="en")
+        check(f"{fmt} with two frames read as one image",
+              app._paged_type(multi_path, "image") == "image"
+              and "pages" not in analyze.call_args.kwargs
+              and app.inspect_document(multi_path, "image").pages == 1)
+        os.remove(multi_path)
+
+    # Page cache: a second PDF sharing two scanned pages with the first only
+    # sends its new page; the cached ones are stitched back in order with
+    # their languages, and count as saved.
+    def read_of(texts, numbers):
+        res, pos = _Result("", []), 0
+        res.pages = []
+        for text, n in zip(texts, numbers):
+            pg = _Page(text)
+            pg.lines = [_Line(text, [0, 0, 100, 0, 100, 20, 0, 20], pos)]
+            pg.page_number = n
+            res.pages.append(pg)
+            locale = "de-DE" if text.startswith("Seite") else "en-US"
+            res.languages.append(_Lang(locale, 0.95, [(pos, len(text))]))
+            pos += len(text) + 1
+        res.content = "\n".join(texts)
+        return res
+
+    first_path, second_path = tempfile.mktemp(suffix=".pdf"), tempfile.mktemp(suffix=".pdf")
+    for path, seeds in ((first_path, (11, 12, 13)), (second_path, (12, 14, 13))):
+        with fitz.open() as doc:
+            for seed in seeds:
+                pg = doc.new_page()
+                pg.insert_image(pg.rect, stream=scan_page(seed, seed, None))
+            doc.save(path)
+    analyze = MagicMock(side_effect=[
+        _Poller(read_of(["Page one here", "Seite zwei hier", "Page three here"], (1, 2, 3))),
+        _Poller(read_of(["A brand new page"], (2,)))])
+    with patch.object(app, "_page_cache", app._PageCache(100)) as cache, \
+         patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        app.extract_text(first_path, "pdf")
+        overlap = app.extract_text(second_path, "pdf")
+    check("page cache: only the uncached page goes to Azure Read",
+          analyze.call_args.kwargs.get("pages") == "2" and cache.hits == 2)
+    t = overlap.text
+    check("page cache: cached pages stitched in page order",
+          t.index("Seite zwei") < t.index("A brand new") < t.index("Page three")
+          and "Page one" not in t)
+    check("page cache: cached pages' languages kept, pages counted as saved",
+          [loc for loc, _ in overlap.segments or []] == ["de", "en"]
+          and overlap.ocr_pages_saved == 2 and overlap.ocr_pages == 3)
+    os.remove(first_path)
+    os.remove(second_path)
+
+    # Pre-flight inspection prices by pages, not bytes: five scanned pages
+    # cost one credit; a 200-page text PDF is read without OCR but still
+    # costs the most, and goes to the slow lane.
+    info = app.inspect_document(dup_path, "pdf")
+    check("pre-flight: scanned PDF's pages and scan DPI",
+          info is not None and (info.pages, info.text_pages, info.dpi) == (5, 0, 150)
+          and app._estimate_request_cost("pdf", 9000, info) == 1)
+    long_path = tempfile.mktemp(suffix=".pdf")
+    with fitz.open() as doc:
+        for k in range(200):
+            doc.new_page().insert_text((72, 72), f"Chapter text {k}")
+        doc.save(long_path)
+    info = app.inspect_document(long_path, "pdf")
+    check("pre-flight: long text PDF costs the most and takes the slow lane",
+          (info.pages, info.ocr_pages) == (200, 0)
+          and app._estimate_request_cost("pdf", 300, info) == app._COST_MAX_CREDITS
+          and app._doc_load(info) > app.FAST_LANE_MAX_LOAD)
+    info = app.inspect_document(png_path, "image")
+    check("pre-flight: image size read from its header",
+          (info.pages, info.width, info.height) == (1, 200, 100)
+          and app._estimate_request_cost("image", 6000, info) == 1)
+    os.remove(long_path)
+    os.remove(dup_path)
+
+    # An oversized image goes to Azure Read scaled to ~READ_TARGET_LINE_PX
+    # text lines and re-encoded; a small one goes byte for byte.
+    big = Image.new("L", (2000, 2600), 235)
+    d = ImageDraw.Draw(big)
+    for r in range(20):
+        d.rectangle([150, 150 + r * 120, 1850, 229 + r * 120], fill=30)  # 80 px lines
+        for x in range(170, 1850, 30):
+            d.line([x, 150 + r * 120, x, 229 + r * 120], fill=235, width=6)
+    noise = np.random.default_rng(0).normal(0, 6, (2600, 2000))
+    big = Image.fromarray(np.clip(np.asarray(big) + noise, 0, 255).astype("uint8"))
+    big_path = tempfile.mktemp(suffix=".png")
+    big.save(big_path)
+    sent = []
+
+    def spy_analyze(model, body, **kw):
+        sent.append(body.read())
+        return _Poller(_Result("E" * 60, [_Lang("en-US", 0.98, [(0, 60)])]))
+
+    with patch.object(app, "READ_UPLOAD_MIN_KB", 0), \
+         patch.object(app.doc_client, "begin_analyze_document", side_effect=spy_analyze), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        app.extract_text(big_path, "image")
+        app.extract_text(png_path, "image")
+    upload = Image.open(io.BytesIO(sent[0]))
+    check("oversized image re-encoded for Azure Read, lines ~READ_TARGET_LINE_PX",
+          sent[0][:3] == b"\xff\xd8\xff" and len(sent[0]) < os.path.getsize(big_path)
+          and upload.size == (1000, 1300))
+    check("image the re-encode can't shrink goes byte for byte",
+          sent[1] == Path(png_path).read_bytes())
+
+    # Local OCR fast path: a clean scan in a pinned language is read by
+    # Tesseract and never billed; a blurred one, or a reading Tesseract isn't
+    # confident in, goes to Azure Read.
+    from concurrent.futures import ThreadPoolExecutor
+    from PIL import ImageFilter
+    blurred_path = tempfile.mktemp(suffix=".png")
+    big.filter(ImageFilter.GaussianBlur(5)).save(blurred_path)
+    reads = []
+
+    def fake_tesseract(path, lang, conf=93.0):
+        reads.append((path, lang))
+        return "Clean scanned text read\nlocally by the engine", conf, 8
+
+    analyze = MagicMock(return_value=_Poller(_Result("E" * 60, [_Lang("en-US", 0.98, [(0, 60)])])))
+    with ThreadPoolExecutor(1) as pool, \
+         patch.object(app, "LOCAL_OCR", "on"), \
+         patch.object(app, "_local_ocr_pool", return_value=pool), \
+         patch.object(app, "_tesseract_read", side_effect=fake_tesseract), \
+         patch.object(app.doc_client, "begin_analyze_document", analyze), \
+         patch.object(app, "_azure_openai_configured", return_value=False):
+        local = app.extract_text(big_path, "image", pinned_lang="ru")
+        check("clean pinned scan read locally, Azure Read not called",
+              analyze.call_count == 0 and reads == [(big_path, "rus+eng")]
+              and local.locale2 == "ru" and local.ocr_pages_saved == 1
+              and local.text.startswith("Clean scanned text"))
+        reads.clear()
+        app.extract_text(blurred_path, "image", pinned_lang="ru")
+        check("blurred scan fails the quality gate and goes to Azure Read",
+              reads == [] and analyze.call_count == 1)
+        with patch.object(app, "_tesseract_read",
+                          side_effect=lambda p, l: fake_tesseract(p, l, conf=60.0)):
+            app.extract_text(big_path, "image", pinned_lang="ru")
+        check("unsure local reading falls back to Azure Read", analyze.call_count == 2)
+        app.extract_text(big_path, "image")
+        check("no pinned language: straight to Azure Read", analyze.call_count == 3)
+    os.remove(blurred_path)
+    os.remove(big_path)
+
+    # Photo reuse: a re-shot of a printed page (tilted, zoomed, moved)
+    # matches; another page with the same line grid, the same page with a
+    # line cut short, or the same form made out to someone else doesn't; a
+    # read with figures in it isn't kept, as a changed digit can pass.
+    words = ("the of and to in is was that for on with as by at from this which but not "
+             "are contract payment section agreement parties shall within days notice "
+             "written terms service provider customer invoice amount period").split()
+
+    font = ImageFont.load_default(size=26)
+
+    def text_page(seed, short_row=None):
+        rnd = random.Random(seed)
+        img = Image.new("L", (1240, 1754), 235)
+        d = ImageDraw.Draw(img)
+        for r in range(36):
+            limit = 1000 - (rnd.randint(0, 400) if rnd.random() < 0.2 else 0)
+            if r == short_row:
+                limit //= 2
+            line = ""
+            while d.textlength(line + " x", font=font) < limit:
+                line = (line + " " + rnd.choice(words)).strip()
+            d.text((120, 150 + r * 40), line, fill=30, font=font)
+        return img
+
+    def invoice(name):
+        rnd = random.Random(7)
+        img = Image.new("L", (1240, 1754), 235)
+        d = ImageDraw.Draw(img)
+        d.text((120, 160), f"Bill to: {name}", fill=30, font=font)
+        for r in range(14):
+            d.text((120, 220 + r * 44), " ".join(rnd.choice(words) for _ in range(3)),
+                   fill=30, font=font)
+            d.text((900, 220 + r * 44), f"{rnd.randint(10, 999)}.{rnd.randint(0, 99):02d}",
+                   fill=30, font=font)
+        d.text((120, 886), "Total due", fill=30, font=font)
+        d.text((900, 886), "1,250.00", fill=30, font=font)
+        return img
+
+    def photo_of(page, noise_seed, scale=1.0, angle=0.0, at=(180, 170)):
+        shot = Image.new("L", (1600, 2100), 90)
+        page = page.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=90)
+        shot.paste(page.resize((int(page.width * scale), int(page.height * scale))), at)
+        noise = np.random.default_rng(noise_seed).normal(0, 6, (2100, 1600))
+        shot = Image.fromarray(np.clip(np.asarray(shot.filter(ImageFilter.GaussianBlur(1.2)))
+                                       + noise, 0, 255).astype("uint8"))
+        path = tempfile.mktemp(suffix=".jpg")
+        shot.resize((1200, 1575)).save(path, quality=85)
+        prints = app._photo_print(path)
+        os.remove(path)
+        return prints
+
+    first = photo_of(text_page(1), 1)
+    reshots = [photo_of(text_page(1), 2, 1.03, -0.8, (160, 185)),
+               photo_of(text_page(1), 3, 0.95, 1.5, (210, 200))]
+    check("photo reuse: re-shots of the page match",
+          all(app._photo_match(first, r)[0] for r in reshots))
+    check("photo reuse: shifted 1-20 px, or tilted 0.8° and zoomed 5%, still matches",
+          all(app._photo_match(first, photo_of(text_page(1), 10 + d, at=(180 + d, 170 + d)))[0]
+              for d in (1, 2, 3, 10, 20))
+          and app._photo_match(first, photo_of(text_page(1), 6, 1.05, 0.8))[0])
+    check("photo reuse: another page with the same line grid doesn't",
+          not app._photo_match(first, photo_of(text_page(2), 4, 1.01, 0.3))[0])
+    same, rows, diff = app._photo_match(first, photo_of(text_page(1, short_row=30), 5))
+    check("photo reuse: one line cut short fails the ink check",
+          not same and rows >= app._PHOTO_MIN_ROWS_CORR and diff > app._PHOTO_BLOCK_MAX_DIFF)
+    bill = photo_of(invoice("Anna Berger"), 7)
+    check("photo reuse: the same invoice re-shot matches",
+          app._photo_match(bill, photo_of(invoice("Anna Berger"), 8, 1.02, -0.6, (186, 176)))[0])
+    check("photo reuse: the same form made out to another name doesn't",
+          not any(app._photo_match(bill, photo_of(invoice(name), 9, 1.02, 0.5))[0]
+                  for name in ("Anna Burger", "Hans Berger")))
+    user_data = {}
+    for unsure in (app.OcrResult("", 1, None, 0.0, 0.0, None, False),
+                   app.OcrResult("Page text", 1, "en", 0.4, 1.0, None, False)):
+        app._remember_photo(user_data, None, first, unsure)
+    check("photo reuse: an empty or unsure read isn't remembered",
+          not user_data.get("recent_photos"))
+    app._remember_photo(user_data, None, bill,
+                        app.OcrResult("Total due 1,250.00", 1, "en", 0.98, 1.0, None, False))
+    check("photo reuse: a read with figures isn't remembered", not user_data.get("recent_photos"))
+    earlier = app.OcrResult("Page text", 1, "en", 0.98, 1.0, None, False)
+    app._remember_photo(user_data, None, first, earlier)
+    reused = app._reused_photo(user_data, None, reshots[0])
+    check("photo reuse: the earlier result comes back, counted as saved",
+          reused is not None and reused.text == "Page text" and reused.ocr_pages_saved == 1)
+    check("photo reuse: not across OCR hints or past the window",
+          app._reused_photo(user_data, "ru", reshots[0]) is None
+          and app._reused_photo({"recent_photos": [(time.monotonic() - 10**6, None, first, earlier)]},
+                                None, reshots[0]) is None)
+
+    # Running header, footer and page number on every page are stripped; the
+    # body (even a line repeated mid-page) and its language spans are kept.
+    def box(y):
+        return [1.0, y, 7.0, y, 7.0, y + 0.2, 1.0, y + 0.2]
+
+    report = _Result("", [])
+    report.pages, parts, body_spans = [], [], []
+    for n in range(1, 5):
+        page = _Page("")
+        page.width, page.height = 8.5, 11.0
+        page.lines = []
+        for text, y in (("ACME Corp — Annual report 2024", 0.5), (f"Body text of page {n}.", 3.0),
+                        ("Continued on the next page", 5.0), (f"Page {n} of 4", 10.4)):
+            offset = sum(len(p) + 1 for p in parts)
+            page.lines.append(_Line(text, box(y), offset))
+            if text.startswith("Body"):
+                body_spans.append((offset, len(text)))
+            parts.append(text)
+        report.pages.append(page)
+    report.content = "\n".join(parts)
+    report.languages = [_Lang("en-US", 0.95, body_spans)]
+    stripped, removed = app._strip_boilerplate(report)
+    texts = [l.content for p in stripped.pages for l in p.lines]
+    check("boilerplate: header and page numbers gone, body kept",
+          not any("ACME" in t or t.startswith("Page ") for t in texts)
+          and texts.count("Continued on the next page") == 4 and len(texts) == 8)
+    check("boilerplate: removed characters counted",
+          removed == 4 * (len("ACME Corp — Annual report 2024") + 1)
+          + 4 * (len("Page 1 of 4") + 1))
+    check("boilerplate: language spans follow the kept body lines",
+          [stripped.content[s.offset:s.offset + s.length]
+           for s in stripped.languages[0].spans]
+          == [f"Body text of page {n}." for n in range(1, 5)])
+    report.pages = report.pages[:2]
+    check("boilerplate: two-page document left alone",
+          app._strip_boilerplate(report) == (report, 0))
+
+    # In-flight coalescing: identical jobs share the leader's result; a slow
+    # or failed leader doesn't strand its followers. Only a call that runs
+    # the job takes a lane slot.
+    async def flights(delay, fail=False, keys=("a", "a")):
+        runs, slots = [], []
+
+        async def job(tag):
+            runs.append(tag)
+            await asyncio.sleep(delay)
+            if fail and tag == "first":
+                raise RuntimeError("leader failed")
+            return tag
+
+        f = app._Flights("test")
+
+        def slot(tag):
+            async def take():
+                slots.append(tag)
+            return take
+
+        async def second():
+            await asyncio.sleep(0.01)
+            return await f.run((keys[1],), lambda: job("second"), slot=slot("second"))
+
+        first = asyncio.create_task(f.run((keys[0],), lambda: job("first"), slot=slot("first")))
+        out2 = await second()
+        out1 = await asyncio.gather(first, return_exceptions=True)
+        return runs, out1[0], out2, slots
+
+    runs, out1, out2, slots = asyncio.run(flights(0.05))
+    check("coalesce: the follower gets the leader's result, job run once",
+          runs == ["first"] and out1 == ("first", False) and out2 == ("first", True))
+    check("coalesce: a follower that joins takes no lane slot", slots == ["first"])
+    runs, out1, out2, _ = asyncio.run(flights(0.05, keys=("a", "b")))
+    check("coalesce: different keys both run", runs == ["first", "second"]
+          and out2 == ("second", False))
+    runs, out1, out2, _ = asyncio.run(flights(0.05, fail=True))
+    check("coalesce: a failed leader's follower runs its own copy",
+          isinstance(out1, RuntimeError) and out2 == ("second", False))
+    with patch.object(app, "COALESCE_WAIT_S", 0.05):
+        runs, out1, out2, slots = asyncio.run(flights(0.2))
+    check("coalesce: a follower stops waiting after COALESCE_WAIT_S",
+          runs == ["first", "second"] and out2 == ("second", False) and out1 == ("first", False))
+    check("coalesce: a copy run after the wait takes a lane slot", slots == ["first", "second"])
+    with patch.object(app, "COALESCE", "off"):
+        runs, _, out2, _ = asyncio.run(flights(0.05))
+    check("coalesce: off runs every job", runs == ["first", "second"] and out2 == ("second", False))
+
+    async def shared_ocr():
+        calls = []
+
+        async def fake_extract(file_path, file_type, pinned_lang=None, speculate=False):
+            calls.append(file_path)
+            await asyncio.sleep(0.05)
+            return app.OcrResult("text", 3, "en", 1.0, 1.0, None, False)
+
+        with patch.object(app, "extract_text_async", side_effect=fake_extract):
+            a, b = await asyncio.gather(
+                app._coalesced_ocr("d", "copy1", "pdf", "en"),
+                app._coalesced_ocr("d", "copy2", "pdf", "en"))
+        return calls, a, b
+
+    calls, a, b = asyncio.run(shared_ocr())
+    check("coalesce: one OCR for two copies of a file, the copy's pages saved",
+          calls == ["copy1"] and a.ocr_pages_saved != 3 and b.ocr_pages_saved == 3
+          and b.text == a.text)
+
+    # Read-ahead behind the pre-cost prompt: a confirmation takes the
+    # read over; cancel, changed settings or the TTL drop it, counted as waste.
+    async def read_ahead(steps, ttl=300.0, delay=0.05, path=pdf_path):
+        async def fake_extract(file_path, file_type, pinned_lang=None, speculate=False):
+            app._meter_azure_pages(3)  # as _azure_read does before its call
+            await asyncio.sleep(delay)
+            return app.OcrResult("text", 4, "en", 1.0, 1.0, None, False, ocr_pages_saved=1)
+
+        with patch.object(app, "extract_text_async", side_effect=fake_extract), \
+             patch.object(app, "PRECOST_READ_AHEAD_TTL_S", ttl), \
+             patch.object(app, "_load_quota", return_value={"free_left": 5, "bonus_credits": 0}), \
+             patch.object(app.user_store, "get_user", return_value={"default_lang": "de"}):
+            spec = app._start_precost_read(1, path, "pdf", None, 3)
+            return spec, await steps(spec)
+
+    def stats_delta(before):
+        return {k: app._precost_read_stats[k] - before[k] for k in before}
+
+    async def confirm_after(spec, wait=0.1, args=("de", False)):
+        await asyncio.sleep(wait)
+        return await app._claim_precost_read(spec, args)
+
+    before = dict(app._precost_read_stats)
+    spec, ocr = asyncio.run(read_ahead(confirm_after))
+    delta = stats_delta(before)
+    check("read-ahead: reads with the user's hint, confirmation takes the result",
+          spec.args == ("de", False) and ocr is not None and ocr.ocr_pages == 4
+          and delta["used"] == 1 and delta["saved_ms"] >= 40 and delta["wasted"] == 0)
+    before = dict(app._precost_read_stats)
+    spec, ocr = asyncio.run(read_ahead(lambda s: confirm_after(s, wait=0)))
+    check("read-ahead: a confirmation mid-read awaits the read under way",
+          ocr is not None and stats_delta(before)["used"] == 1)
+    before = dict(app._precost_read_stats)
+    spec, ocr = asyncio.run(read_ahead(lambda s: confirm_after(s, args=("fr", False))))
+    check("read-ahead: changed settings read again, the read counted as waste",
+          ocr is None and stats_delta(before)["wasted"] == 1
+          and stats_delta(before)["pages_wasted"] == 3)
+
+    # Cancel mid-read: the Azure call can't be stopped in its thread, so the
+    # pages already sent to it are counted as waste.
+    async def cancel_mid_read():
+        sent = threading.Event()
+
+        def slow_analyze(*a, **kw):
+            sent.set()
+            time.sleep(0.1)
+            return _Poller(clean_en_pdf)
+
+        with patch.object(app.doc_client, "begin_analyze_document", side_effect=slow_analyze), \
+             patch.object(app, "_page_cache", app._PageCache(10)), \
+             patch.object(app, "_azure_openai_configured", return_value=False), \
+             patch.object(app, "_load_quota", return_value={"free_left": 5, "bonus_credits": 0}), \
+             patch.object(app.user_store, "get_user", return_value={"default_lang": "de"}):
+            spec = app._start_precost_read(1, pdf_path, "pdf", None, 3)
+            await asyncio.to_thread(sent.wait, 5)
+            app._drop_precost_read(spec, "cancelled")
+            await asyncio.sleep(0)
+            return spec.task.cancelled()
+
+    before = dict(app._precost_read_stats)
+    cancelled = asyncio.run(cancel_mid_read())
+    check("read-ahead: cancel stops the read in flight, the pages sent counted",
+          cancelled and stats_delta(before)["wasted"] == 1
+          and stats_delta(before)["pages_wasted"] == 3)
+    before = dict(app._precost_read_stats)
+    download = tempfile.mktemp(suffix=".pdf")
+    Path(download).write_bytes(Path(pdf_path).read_bytes())
+    spec, ocr = asyncio.run(read_ahead(confirm_after, ttl=0.02, path=download))
+    check("read-ahead: expired after the TTL, its download deleted",
+          ocr is None and spec.dropped and not os.path.exists(download)
+          and stats_delta(before)["used"] == 0 and stats_delta(before)["wasted"] == 1)
+    app._drop_precost_read(spec, "expired")
+    spec.dropped = False
+    app._drop_precost_read(spec, "expired")
+    check("read-ahead: a file already gone is no error", spec.dropped)
+
+    with patch.object(app, "_load_quota", return_value={"free_left": 1, "bonus_credits": 1}):
+        check("read-ahead: not for a user who can't afford the file",
+              app._start_precost_read(1, pdf_path, "pdf", None, 3) is None)
+
+    async def lane_busy():
+        lane = asyncio.Semaphore(1)
+        async with lane:
+            with patch.object(app, "_lane_semaphore", return_value=lane):
+                return app._start_precost_read(1, pdf_path, "pdf", None, 3)
+
+    with patch.object(app, "_load_quota", return_value={"free_left": 5, "bonus_credits": 0}), \
+         patch.object(app.user_store, "get_user", return_value={"default_lang": "de"}):
+        check("read-ahead: not while the file's lane is busy", asyncio.run(lane_busy()) is None)
+    check("read-ahead: not without a downloaded file",
+          app._start_precost_read(1, None, "pdf", None, 3) is None)
+    with patch.object(app, "_azure_openai_configured", return_value=True):
+        check("read-ahead: not for a streamed read",
+              app._precost_ocr_args({"default_lang": "ka"}) is None)
+
+    # Pre-cost prompts are per job: a double tap on Continue charges and
+    # reads the file once, and it reads the prompt's own file.
+    async def double_tap():
+        user_data = {}
+        for name in ("first.pdf", "second.pdf"):
+            app._put_user_job(user_data, "pending_precost", name,
+                              {"file_id": name, "file_type": "pdf", "cost": 2})
+
+        def tap(job_id):
+            query = SimpleNamespace(data=f"pre:ok:{job_id}", answer=AsyncMock(),
+                                    message=None)
+            update = SimpleNamespace(
+                callback_query=query, effective_chat=SimpleNamespace(id=1),
+                effective_user=SimpleNamespace(id=1, language_code="en"))
+            return app.on_precost_callback(update, SimpleNamespace(
+                user_data=user_data, bot=SimpleNamespace(send_message=AsyncMock())))
+
+        await asyncio.gather(tap("first.pdf"), tap("first.pdf"))
+        return user_data
+
+    with patch.object(app, "_consume_quota", return_value=(True, {})) as charge, \
+         patch.object(app, "_process_file_payload", new_callable=AsyncMock) as run, \
+         patch.object(app, "log_growth_event"):
+        user_data = asyncio.run(double_tap())
+    check("pre-cost: a double tap charges and reads once",
+          charge.call_count == 1 and run.call_count == 1
+          and run.call_args.kwargs["file_id"] == "first.pdf"
+          and list(user_data["pending_precost"]) == ["second.pdf"])
+
+    # A prompt nobody answers doesn't keep its download: it's deleted after
+    # PRECOST_FILE_TTL_S, and a late "Continue" downloads the file again.
+    async def unanswered():
+        download = tempfile.mktemp()
+        Path(download).write_bytes(b"%PDF")
+        user_data = {}
+        bot = SimpleNamespace(send_message=AsyncMock())
+        doc = SimpleNamespace(file_id="late.pdf", mime_type="application/pdf",
+                              file_size=9 << 20, file_name="late.pdf")
+        update = SimpleNamespace(
+            message=SimpleNamespace(document=doc, reply_text=AsyncMock()),
+            effective_chat=SimpleNamespace(id=1),
+            effective_user=SimpleNamespace(id=1, language_code="en"))
+        context = SimpleNamespace(user_data=user_data, bot=bot)
+        with patch.object(app, "_download_and_inspect",
+                          AsyncMock(return_value=(download, None))), \
+             patch.object(app, "_start_precost_read", return_value=None), \
+             patch.object(app, "is_supported_file", return_value=True), \
+             patch.object(app, "PRECOST_FILE_TTL_S", 0.02):
+            await app.handle_file(update, context)
+            (job_id,) = user_data["pending_precost"]
+            kept = os.path.exists(download)
+            await asyncio.sleep(0.1)
+        update.callback_query = SimpleNamespace(data=f"pre:ok:{job_id}", answer=AsyncMock())
+        await app.on_precost_callback(update, context)
+        return kept, os.path.exists(download)
+
+    with patch.object(app, "_consume_quota", return_value=(True, {})), \
+         patch.object(app, "_process_file_payload", new_callable=AsyncMock) as run, \
+         patch.object(app, "log_growth_event"):
+        kept, left = asyncio.run(unanswered())
+    check("pre-cost: an unanswered prompt's download is deleted, read again on Continue",
+          kept and not left and run.call_count == 1
+          and run.call_args.kwargs["file_path"] is None)
+
+    os.remove(region_path)
+    os.remove(pdf_path)
+    os.remove(png_path)
     os.remove(fake_path)
     print()
     if failures:
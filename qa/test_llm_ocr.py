@@ -6,9 +6,13 @@ only exercise the deterministic parsing/segment-building logic.
 
 Run:  python qa/test_llm_ocr.py
 """
+import asyncio
 import os
 import sys
+import tempfile
 from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 os.environ.setdefault("TELEGRAM_API_TOKEN", "qa-dummy-token")
@@ -21,6 +25,7 @@ for _stream in (sys.stdout, sys.stderr):
     except (AttributeError, ValueError):
         pass
 
+import app  # noqa: E402
 from app import _parse_llm_segments, _segments_from_raw, _img_mime  # noqa: E402
 
 
@@ -68,6 +73,260 @@ def run():
     check("png magic", _img_mime(b"\x89PNG\r\n\x1a\n....") == "image/png")
     check("webp magic", _img_mime(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp")
 
+    # _vision_image: resolution capped, gray pages sent gray, color kept when
+    # it carries text, and a small original is sent untouched.
+    import io
+    from PIL import Image, ImageDraw
+    big = Image.new("RGB", (4000, 3000), "white")
+    draw = ImageDraw.Draw(big)
+    for y in range(100, 2900, 60):
+        draw.rectangle([100, y, 3900, y + 30], fill=(20, 20, 20))
+    data, mime = app._vision_image(big)
+    out = Image.open(io.BytesIO(data))
+    check("vision image: pixels capped", out.size[0] * out.size[1] <= app.VISION_MAX_PIXELS)
+    check("vision image: near-gray page sent as grayscale",
+          out.mode == "L" or app._is_near_gray(out))
+    check("vision image: encoded as VISION_IMAGE_FORMAT",
+          mime == app._VISION_MIMES[app.VISION_IMAGE_FORMAT])
+    red = Image.new("RGB", (400, 300), "white")
+    ImageDraw.Draw(red).rectangle([20, 20, 380, 280], fill=(220, 30, 30))
+    check("vision image: colored page keeps color",
+          Image.open(io.BytesIO(app._vision_image(red)[0])).mode == "RGB")
+    small = Image.effect_noise((64, 64), 80)
+    buf = io.BytesIO()
+    small.save(buf, format="JPEG", quality=20)
+    check("vision image: smaller original passed through",
+          app._vision_image(small, buf.getvalue()) == (buf.getvalue(), "image/jpeg"))
+
+    # _llm_client: built lazily, once per event loop, with the configured
+    # timeouts/retries (constructing it makes no network call).
+    async def two_clients():
+        return app._llm_client(), app._llm_client()
+
+    with patch.object(app, "AZURE_OPENAI_ENDPOINT", "https://qa.example"), \
+         patch.object(app, "AZURE_OPENAI_API_KEY", "qa-key"):
+        c1, c2 = asyncio.run(two_clients())
+        c3, _ = asyncio.run(two_clients())
+    check("one client per loop", c1 is c2)
+    check("new loop gets its own client", c3 is not c1)
+    check("client timeouts/retries configured",
+          c1.max_retries == app.AZURE_OPENAI_MAX_RETRIES
+          and c1.timeout.read == app.AZURE_OPENAI_TIMEOUT_S
+          and c1.timeout.connect == app.AZURE_OPENAI_CONNECT_TIMEOUT_S)
+
+    # _merge_page_segments: page order kept; a language running across a page
+    # break continues the previous segment; a blank page doesn't break it.
+    merged = app._merge_page_segments([
+        [("ka", "first page"), ("en", "ends in English")],
+        [("en", "continues"), ("ka", "then Georgian")],
+        [],
+        [("ka", "still Georgian")],
+    ])
+    check("page segments merged across breaks", merged == [
+        ("ka", "first page"), ("en", "ends in English\ncontinues"),
+        ("ka", "then Georgian\nstill Georgian")])
+
+    # run_llm_ocr on a PDF: one request per page, at most LLM_OCR_CONCURRENCY
+    # in flight, merged back in page order even when replies arrive reversed.
+    import fitz
+    pdf_path = tempfile.mktemp(suffix=".pdf")
+    with fitz.open() as doc:
+        for _ in range(5):
+            doc.new_page(width=100, height=100)
+        doc.save(pdf_path)
+    state = {"active": 0, "peak": 0}
+
+    def fake_content(file_path, file_type, renders=None, pages=(0,)):
+        return pages
+
+    class _FakeCompletions:
+        async def create(self, messages, **kw):
+            page = messages[0]["content"][0]
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01 * (5 - page))
+            state["active"] -= 1
+            reply = '{"segments":[{"lang":"ka","text":"page %d"}]}' % page
+            return SimpleNamespace(choices=[SimpleNamespace(
+                finish_reason="stop", message=SimpleNamespace(content=reply))])
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+    with patch.object(app, "_llm_client", return_value=fake_client), \
+         patch.object(app, "_llm_ocr_content", side_effect=fake_content), \
+         patch.object(app, "_azure_openai_configured", return_value=True), \
+         patch.object(app, "LLM_OCR_PAGES_PER_REQUEST", 1), \
+         patch.object(app, "LLM_OCR_CONCURRENCY", 2):
+        text, segs = asyncio.run(app.run_llm_ocr(pdf_path, "pdf", "ka"))
+    os.remove(pdf_path)
+    check("per-page requests merged in page order",
+          segs == [("ka", "\n".join(f"page {i}" for i in range(5)))])
+    check("concurrency capped at LLM_OCR_CONCURRENCY", state["peak"] == 2)
+
+    # _SegmentStream: the reply fed in arbitrary deltas (escapes split across
+    # them) yields the same text as the batch parse, and hands text on before
+    # its segment closes.
+    import json
+    ka = " ".join(f"წინადადება ნომერი {i}, \"ციტატა\" და ტექსტი." for i in range(12))
+    reply = json.dumps({"segments": [{"lang": "ka", "text": ka},
+                                     {"lang": "EN", "text": "Tail line.\nSecond line"}]})
+    for step in (1, 7, len(reply)):
+        parser, pieces = app._SegmentStream(), []
+        for i in range(0, len(reply), step):
+            pieces += parser.feed(reply[i:i + step])
+        pieces += parser.finish()
+        joined = []
+        for loc, txt in pieces:
+            if joined and joined[-1][0] == loc:
+                joined[-1] = (loc, joined[-1][1] + txt)
+            else:
+                joined.append((loc, txt))
+        check(f"stream parse == batch parse (deltas of {step})",
+              joined == _parse_llm_segments(reply))
+    parser = app._SegmentStream(sep="\n\n")
+    pieces = [p for i in range(0, len(reply), 7) for p in parser.feed(reply[i:i + 7])]
+    pieces += parser.finish()
+    check("sep joins streamed segments like run_llm_ocr",
+          "".join(txt for _, txt in pieces)
+          == "\n\n".join(txt for _, txt in _parse_llm_segments(reply)))
+    parser = app._SegmentStream()
+    early = [p for i in range(0, len(reply) // 2, 7) for p in parser.feed(reply[i:i + 7])]
+    check("sentences handed on before the segment closes",
+          len(early) >= 2 and all(loc == "ka" and len(txt) >= app._STREAM_PIECE_MIN_CHARS
+                                  for loc, txt in early))
+    parser = app._SegmentStream()
+    late = parser.feed('```json\n{"segments":[{"text":"' + "Word. " * 40 + '","lang":"hy"}')
+    check("text held until a late lang key arrives",
+          late == [("hy", "Word. " * 40)])
+    parser = app._SegmentStream()
+    parser.feed('{"segments":[{"lang":"ka","text":"cut off mid')
+    check("truncated reply flushed by finish()", parser.finish() == [("ka", "cut off mid")])
+
+    # stream_llm_ocr: page streams run concurrently but come out in page order.
+    pdf_path = tempfile.mktemp(suffix=".pdf")
+    with fitz.open() as doc:
+        for _ in range(3):
+            doc.new_page(width=100, height=100)
+        doc.save(pdf_path)
+
+    class _FakeStream:
+        def __init__(self, page):
+            self.page = page
+
+        async def __aiter__(self):
+            body = json.dumps({"segments": [{"lang": "ka", "text": f"Page {self.page} says hi."}]})
+            yield SimpleNamespace(choices=[])
+            for i in range(0, len(body), 5):
+                await asyncio.sleep(0.002 * (3 - self.page))
+                yield SimpleNamespace(choices=[SimpleNamespace(
+                    finish_reason=None, delta=SimpleNamespace(content=body[i:i + 5]))])
+            yield SimpleNamespace(choices=[SimpleNamespace(
+                finish_reason="stop", delta=SimpleNamespace(content=None))])
+
+    class _FakeStreamCompletions:
+        async def create(self, messages, stream=False, **kw):
+            return _FakeStream(messages[0]["content"][0])
+
+    async def collect():
+        return [p async for p in app.stream_llm_ocr(pdf_path, "pdf", "ka")]
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeStreamCompletions()))
+    with patch.object(app, "_llm_client", return_value=fake_client), \
+         patch.object(app, "_llm_ocr_content", side_effect=fake_content), \
+         patch.object(app, "LLM_OCR_PAGES_PER_REQUEST", 1):
+        streamed = asyncio.run(collect())
+    os.remove(pdf_path)
+    check("streamed pages in page order",
+          [loc for loc, _ in streamed] == ["ka"] * 3
+          and "".join(txt for _, txt in streamed)
+          == "\n".join(f"Page {i} says hi." for i in range(3)))
+
+    # Model cascade: a cheap tier's reply is kept when it passes the check and
+    # escalated when the script contradicts its tags or it's far shorter than
+    # the ink on the image.
+    from PIL import Image, ImageDraw
+    page = Image.new("L", (800, 600), 255)
+    draw = ImageDraw.Draw(page)
+    for row in range(10):
+        for k in range(8):
+            x0, y0 = 40 + k * 90, 40 + row * 50
+            draw.rectangle([x0, y0, x0 + 70, y0 + 22], fill=30)
+            for sx in range(x0 + 4, x0 + 70, 7):
+                draw.line([(sx, y0), (sx, y0 + 22)], fill=255, width=2)
+    content = app._vision_content([app._vision_image(page)])
+    expected = app._expected_letters(content)
+    check("ink estimate is in the right range", expected and 300 < expected < 3000)
+    full = "ქართული ტექსტი " * int(expected / 13)
+    check("full Georgian reply accepted", app._llm_reply_accepted([("ka", full)], expected))
+    check("short reply rejected", not app._llm_reply_accepted([("ka", full[:80])], expected))
+    check("Georgian tagged en rejected", not app._llm_reply_accepted([("en", full)], expected))
+    check("Latin tagged ka rejected",
+          not app._llm_reply_accepted([("ka", "Latin letters " * 100)], None))
+    check("digits-only span doesn't fail the check",
+          app._llm_reply_accepted([("ka", full), ("ka", "2024")], expected))
+
+    asked = []
+
+    class _TierCompletions:
+        async def create(self, model, messages, **kw):
+            asked.append(model)
+            text = full if model == "big" else full[:80]
+            reply = json.dumps({"segments": [{"lang": "ka", "text": text}]})
+            return SimpleNamespace(
+                choices=[SimpleNamespace(finish_reason="stop",
+                                         message=SimpleNamespace(content=reply))],
+                usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=200))
+
+    tier_client = SimpleNamespace(chat=SimpleNamespace(completions=_TierCompletions()))
+    with patch.object(app, "_llm_client", return_value=tier_client), \
+         patch.object(app, "AZURE_OPENAI_CASCADE", "small@0.1/0.4, big@0.4/1.6"):
+        segs = asyncio.run(app._llm_ocr_request("qa", lambda: content))
+        check("short cheap reply escalated to the next tier",
+              asked == ["small", "big"] and segs == [("ka", full)])
+        asked.clear()
+        with patch.object(app, "_llm_reply_accepted", return_value=True):
+            segs = asyncio.run(app._llm_ocr_request("qa", lambda: content))
+        check("accepted cheap reply stops the cascade", asked == ["small"])
+    check("tier stats count acceptance and cost",
+          app._llm_tier_stats["small"]["requests"] == 2
+          and app._llm_tier_stats["small"]["accepted"] == 1
+          and abs(app._llm_tier_stats["big"]["usd"] - (1000 * 0.4 + 200 * 1.6) / 1e6) < 1e-9)
+
+    # A tier whose call fails hands on to the next; the last tier's failure
+    # is raised.
+    import httpx
+    import openai
+
+    class _FailingCompletions(_TierCompletions):
+        def __init__(self, failing):
+            self.failing = failing
+
+        async def create(self, model, messages, **kw):
+            if model in self.failing:
+                asked.append(model)
+                raise openai.APIError("DeploymentNotFound",
+                                      httpx.Request("POST", "https://x.example"), body=None)
+            return await super().create(model, messages, **kw)
+
+    asked.clear()
+    failing = _FailingCompletions({"small"})
+    with patch.object(app, "_llm_client", return_value=SimpleNamespace(
+            chat=SimpleNamespace(completions=failing))), \
+         patch.object(app, "AZURE_OPENAI_CASCADE", "small@0.1/0.4, big@0.4/1.6"):
+        segs = asyncio.run(app._llm_ocr_request("qa", lambda: content))
+        check("failed cheap tier falls through to the next",
+              asked == ["small", "big"] and segs == [("ka", full)])
+        check("failed tier counted", app._llm_tier_stats["small"]["failed"] == 1)
+        failing.failing = {"small", "big"}
+        try:
+            asyncio.run(app._llm_ocr_request("qa", lambda: content))
+            raised = False
+        except openai.APIError:
+            raised = True
+        check("last tier's failure raised", raised)
+    with patch.object(app, "AZURE_OPENAI_CASCADE", ""):
+        check("no cascade -> AZURE_OPENAI_DEPLOYMENT alone",
+              app._llm_tiers() == [app._LlmTier(app.AZURE_OPENAI_DEPLOYMENT)])
+
     print()
     if failures:
         print(f"FAILED: {len(failures)} — {', '.join(failures)}")
@@ -8,6 +8,7 @@ builds clients, so we inject a dummy Telegram token first (Azure keys come from
 import os
 import sys
 from pathlib import Path
+from unittest.mock import patch
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 os.environ.setdefault("TELEGRAM_API_TOKEN", "qa-dummy-token")
@@ -20,11 +21,14 @@ for _stream in (sys.stdout, sys.stderr):
     except (AttributeError, ValueError):
         pass
 
+import app  # noqa: E402
 from app import normalize_ocr_text, prepare_tts_text  # noqa: E402
 
 # (description, input, substring that MUST be present, substring that MUST be absent)
 CASES = [
     ("word hyphenation joins", "hyphen-\nation works", "hyphenation", "hyphen ation"),
+    ("hyphenation across blank lines joins", "hyphen- \n \n ation", "hyphenation",
+     "hyphen ation"),
     ("cyrillic word hyphenation joins", "сло-\nво тут", "слово", "сло во"),
     ("numeric code not merged", "норматив СН 2.02.05-\n2020 утверждён",
      "2.02.05-2020", "2.02.052020"),
@@ -43,11 +47,40 @@ TTS_CASES = [
     ("uk spells grouped millions", "uk", "ціна 1 250 000 грн",
      "мільйон", "1 250 000"),
     ("uk spells plain large number", "uk", "ціна 1250000 грн", "мільйон", "1250000"),
+    ("uk spells grouped millions with kopecks", "uk", "сума 1 250 000,00 грн",
+     "тисяч грн", "1 250 000"),
+    ("uk spells a non-zero decimal tail", "uk", "сума 1 250 000,25 грн",
+     "кома двадцять п'ять", ",25"),
+    ("uk keeps a comma-separated digit list", "uk", "коди 1 250 000,123", "1 250 000,123",
+     "мільйон"),
     ("uk keeps phone groups", "uk", "тел +380 67 123-45-67", "123-45-67", "мільйон"),
     ("uk leaves 4-digit year alone", "uk", "у 2025 році", "2025", "тисячі"),
     ("uk leaves time/decimals alone", "uk", "о 14:30, площа 106.4", "14:30", "сто"),
-    ("ru is left unchanged", "ru", "площа 106.4 м2, 1 250 000", "1 250 000", "квадратних"),
-    ("en is left unchanged", "en", "area 106.4 m2", "m2", "квадратних"),
+    ("uk leaves leading-zero postcode alone", "uk", "м. Київ, 01001", "01001", "тисяч"),
+    ("ru leaves numbers (not opted in), keeps units", "ru", "площа 106.4 м2, 1 250 000",
+     "1 250 000", "квадратних"),
+    ("en keeps units", "en", "area 106.4 m2", "m2", "квадратних"),
+    ("en leaves numbers (not opted in)", "en", "total 1250000 items", "1250000", "million"),
+    ("de leaves postcode (not opted in)", "de", "10115 Berlin", "10115", "zehn"),
+]
+
+# The same, for languages opted in to number spelling (TTS_SPELL_NUMBERS).
+SPELL_CASES = [
+    ("en spells plain large number", "en", "total 1250000 items", "million", "1250000"),
+    ("en spells grouped millions", "en", "costs 1 250 000 USD.", "million", "1 250 000"),
+    ("en keeps phone", "en", "Call +1 212 555-0100 today", "+1 212 555-0100", "million"),
+    ("en keeps phone groups", "en", "tel 0171 1234567", "0171 1234567", "million"),
+    ("en keeps #order number", "en", "Order #1234567 shipped", "#1234567", "million"),
+    ("en keeps No. account number", "en", "Account No. 12345678", "12345678", "million"),
+    ("en keeps negative-looking code", "en", "ref A-123456", "A-123456", "thousand"),
+    ("en keeps ID run", "en", "ID 12345-678-90", "12345-678-90", "thousand"),
+    ("en keeps letter-glued code", "en", "part AB12345", "AB12345", "thousand"),
+    ("de spells plain large number", "de", "Preis 1250000 Euro", "Million", "1250000"),
+    ("de keeps phone", "de", "Tel. +49 30 1234567", "+49 30 1234567", "Million"),
+    ("de keeps Nr. invoice number", "de", "Rechnung Nr. 4711234", "4711234", "Million"),
+    ("de keeps dashed phone", "de", "Tel. 030-1234567", "030-1234567", "Million"),
+    ("kk spells via kz alias", "kk", "барлығы 1250000", "миллион", "1250000"),
+    ("no num2words lang is left unchanged", "ka", "ფასი 1250000", "1250000", "million"),
 ]
 
 
@@ -67,7 +100,17 @@ def main():
         if not ok:
             failures += 1
             print(f"      input : {raw!r}\n      output: {out!r}")
-    total = len(CASES) + len(TTS_CASES)
+    with patch.object(app, "TTS_SPELL_NUMBERS", {"uk", "en", "de", "kk", "ka"}):
+        app._tts_prep.cache_clear()
+        for desc, loc, raw, must_have, must_not in SPELL_CASES:
+            out = prepare_tts_text(raw, loc)
+            ok = (must_have in out) and (must_not not in out)
+            print(f"  {'✓' if ok else '✗'} {desc} (opted in)")
+            if not ok:
+                failures += 1
+                print(f"      input : {raw!r}\n      output: {out!r}")
+    app._tts_prep.cache_clear()
+    total = len(CASES) + len(TTS_CASES) + len(SPELL_CASES)
     print(f"\n{total - failures}/{total} passed")
     sys.exit(1 if failures else 0)
 
@@ -0,0 +1,141 @@
+"""Worst-case (ReDoS) benchmark for the regexes that run over user OCR text.
+
+normalize_ocr_text, prepare_tts_text, _spell_large_numbers and the log
+SensitiveDataFilter all apply regexes to text the user controls, and a
+multi-page scan can be megabytes long. A pattern that backtracks
+super-linearly (e.g. `\\s*\\n\\s*` over thousands of blank lines) turns one
+upload into seconds or minutes of CPU on the event loop.
+
+For every (function, adversarial input) pair we time the call at two sizes and
+check that:
+  - the larger run stays under a time budget per MB of input, and
+  - 4x the input costs at most ~MAX_GROWTH x the time (linear is 4x, quadratic
+    16x). Runs too short to measure reliably skip the growth check.
+A seeded fuzz pass mixes the same "dangerous" characters at random.
+
+Pure-function tests (no Azure calls), but importing app.py validates env and
+builds clients, so we inject a dummy Telegram token first (Azure keys come from
+.env). Run:  python qa/test_regex_perf.py [--size-kb 128]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+os.environ.setdefault("TELEGRAM_API_TOKEN", "qa-dummy-token")
+os.environ.setdefault("BOT_ENV", "qa")
+sys.path.insert(0, str(REPO_ROOT))
+
+for _stream in (sys.stdout, sys.stderr):
+    try:
+        _stream.reconfigure(encoding="utf-8", errors="replace")
+    except (AttributeError, ValueError):
+        pass
+
+import app  # noqa: E402
+
+BUDGET_S_PER_MB = 2.0   # generous: linear regex passes take ~0.01-0.2 s/MB
+MAX_GROWTH = 8.0        # time(4n) / time(n); 4 is linear, 16 is quadratic
+MIN_TIMED_S = 0.005     # below this, timer noise dominates the growth ratio
+REPEATS = 3             # best-of-N to damp scheduler noise
+
+
+def _fill(unit, n):
+    """Repeat `unit` until the string is ~n characters long."""
+    return unit * max(1, n // len(unit))
+
+
+# name -> builder(n) producing an adversarial string of ~n characters.
+INPUTS = {
+    "hyphen + blank-line run": lambda n: "a-" + "\n" * n + ".",
+    "hyphen + mixed whitespace run": lambda n: "слово-" + _fill(" \n\t", n) + "1",
+    "hyphen/newline pairs": lambda n: _fill("ab-\n", n),
+    "hyphen run": lambda n: "-" * n + "\n",
+    "newline flood": lambda n: "\n" * n,
+    "space flood": lambda n: " " * n,
+    "digit run + dot": lambda n: "1" * n + ".",
+    "digit run": lambda n: "7" * n,
+    "grouped digits": lambda n: "1" + _fill(" 234", n) + "5",
+    "4-digit groups": lambda n: _fill("1234 ", n),
+    "digit + unit gap": lambda n: "1" + " " * n + "м",
+    "unit gap repeated": lambda n: _fill("1 м    ", n),
+    "telegram token prefix": lambda n: "https://api.telegram.org/bot" + "1" * n,
+    "telegram url repeated": lambda n: _fill("https://api.telegram.org/bot12:", n),
+}
+
+_redact = app.SensitiveDataFilter()._redact
+
+FUNCS = {
+    "normalize_ocr_text": app.normalize_ocr_text,
+    "prepare_tts_text[uk]": lambda s: app.prepare_tts_text(s, "uk"),
+    "_spell_large_numbers[uk]": lambda s: app._spell_large_numbers(s, "uk"),
+    "SensitiveDataFilter": _redact,
+}
+
+
+def _fuzz_input(n, seed):
+    rnd = random.Random(seed)
+    alphabet = ["-", "\n", " ", "\t", "1", "23", ".", ":", "м", "²", "a", "я", "+"]
+    parts = []
+    size = 0
+    while size < n:
+        tok = rnd.choice(alphabet) * rnd.choice((1, 1, 2, 5, 40))
+        parts.append(tok)
+        size += len(tok)
+    return "".join(parts)
+
+
+def _best_time(fn, s):
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(s)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=128,
+                        help="small input size; the large run is 4x this")
+    parser.add_argument("--fuzz", type=int, default=8, help="number of fuzz inputs")
+    args = parser.parse_args()
+    small = args.size_kb * 1024
+    large = small * 4
+
+    failures = []
+
+    def check(name, t_small, t_large, n_large):
+        per_mb = t_large / (n_large / (1024 * 1024))
+        growth = t_large / t_small if t_small >= MIN_TIMED_S else None
+        ok = per_mb <= BUDGET_S_PER_MB and (growth is None or growth <= MAX_GROWTH)
+        g = f"x{growth:.1f}" if growth is not None else "  n/a"
+        print(f"  {'✓' if ok else '✗'} {name:<56} {per_mb * 1000:8.1f} ms/MB  {g}")
+        if not ok:
+            failures.append(name)
+
+    for iname, build in INPUTS.items():
+        s_small, s_large = build(small), build(large)
+        for fname, fn in FUNCS.items():
+            check(f"{fname} · {iname}", _best_time(fn, s_small),
+                  _best_time(fn, s_large), len(s_large.encode("utf-8")))
+
+    for seed in range(args.fuzz):
+        s_small, s_large = _fuzz_input(small, seed), _fuzz_input(large, seed)
+        for fname, fn in FUNCS.items():
+            check(f"{fname} · fuzz seed={seed}", _best_time(fn, s_small),
+                  _best_time(fn, s_large), len(s_large.encode("utf-8")))
+
+    print()
+    if failures:
+        print(f"FAILED: {len(failures)} — {', '.join(failures)}")
+        return 1
+    print("All regex worst-case checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -1,4 +1,5 @@
-"""Unit checks for app.build_language_segments and the multi-voice SSML path.
+"""Unit checks for app.build_language_segments, the multi-voice SSML path and
+near-duplicate audio reuse (app.synthesize_reusing, against a fake synthesizer).
 
 Pure-function tests (no Azure calls): we fake an Azure AnalyzeResult with a
 `content` string and per-language `spans`, the same shape the Read model returns.
@@ -8,6 +9,7 @@ token first (Azure keys come from .env). Run:  python qa/test_segment.py
 import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 os.environ.setdefault("TELEGRAM_API_TOKEN", "qa-dummy-token")
@@ -92,6 +94,93 @@ def run():
     check("fr voice block uses fr voice", VOICE_MAP["fr"]["voice"] in blk_fr)
     check("ru/fr voices differ", VOICE_MAP["ru"]["voice"] != VOICE_MAP["fr"]["voice"])
 
+    # 6. Near-duplicate audio reuse: only changed sentences are synthesized.
+    # A fake synthesizer voices each bookmarked sentence as PCM derived from
+    # its text, so a spliced file can be compared with a fresh synthesis.
+    import re
+    import tempfile
+    import wave
+    from unittest.mock import patch
+    from azure.cognitiveservices.speech import ResultReason
+
+    spoken = []
+
+    def pcm(s):
+        return (s.encode() * 40)[: 2 * 40 * len(s)]
+
+    class _Signal:
+        def __init__(self):
+            self.callbacks = []
+
+        def connect(self, cb):
+            self.callbacks.append(cb)
+
+    class _FakeSynth:
+        def __init__(self, speech_config, audio_config):
+            self.path = audio_config.path
+            self.bookmark_reached = _Signal()
+
+        def speak_ssml_async(self, ssml):
+            pieces = re.findall(r'<bookmark mark="(\d+)"/>(.*?)\s*(?=<bookmark|</voice>)', ssml, re.S)
+            data = b""
+            for mark, s in pieces:
+                for cb in self.bookmark_reached.callbacks:
+                    cb(SimpleNamespace(text=mark, audio_offset=len(data) // 2 * 10_000_000 // 16000))
+                spoken.append(s)
+                data += pcm(s)
+            with wave.open(self.path, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(16000)
+                w.writeframes(data)
+            return SimpleNamespace(get=lambda: SimpleNamespace(reason=ResultReason.SynthesizingAudioCompleted))
+
+    class _FakeAudioConfig:
+        def __init__(self, filename):
+            self.path = filename
+
+    def frames(path):
+        with wave.open(path, "rb") as w:
+            return w.readframes(w.getnframes())
+
+    letter = ("Dear Mrs. Novak, thank you for your letter of the 3rd of March. "
+              "We have reviewed the claim you submitted. The repair costs will be covered in full.\n\n"
+              "Please send us the original invoice by the end of the month. "
+              "If you have any questions, call our office between nine and five.")
+    reshot = letter.replace("claim you", "c1aim you").replace("full.\n\n", "full. ")
+    units = _app._tts_units(letter, "en")
+    check("abbreviation stays with its sentence", units[0][1].startswith("Dear Mrs. Novak,"))
+    out = tempfile.mktemp(suffix=".wav")
+    with patch.object(_app, "SpeechSynthesizer", _FakeSynth), \
+         patch.object(_app, "AudioConfig", _FakeAudioConfig), \
+         patch.object(_app, "_tts_audio_cache", _app._TtsAudioCache(1 << 24)):
+        _, saved = _app.synthesize_reusing(letter, "en", out)
+        check("first text fully synthesized", saved == 0 and len(spoken) == len(units))
+        spoken.clear()
+        res, saved = _app.synthesize_reusing(reshot, "en", out)
+        changed = "We have reviewed the c1aim you submitted."
+        check("re-shot: only the changed sentence synthesized", spoken == [changed])
+        check("re-shot: other sentences' characters saved",
+              saved == sum(len(s) for _, s in _app._tts_units(reshot, "en") if s != changed))
+        check("re-shot: synthesis completed", res.reason == ResultReason.SynthesizingAudioCompleted)
+        check("re-shot: spliced audio equals a fresh synthesis",
+              frames(out) == b"".join(pcm(_app.escape_ssml(s)) for _, s in _app._tts_units(reshot, "en")))
+        spoken.clear()
+        res, saved = _app.synthesize_reusing(reshot, "en", out)
+        check("same text: nothing synthesized", spoken == [] and isinstance(res, _app._ReusedAudio))
+        res, saved = _app.synthesize_reusing(reshot, "de", out)
+        check("another voice: no reuse", saved == 0 and len(spoken) == len(units))
+        spoken.clear()
+        other = "The weather turned cold overnight. Snow closed the pass and the hikers waited."
+        _, saved = _app.synthesize_reusing(other, "en", out)
+        check("unrelated text: no reuse", saved == 0 and len(spoken) == 2)
+        spoken.clear()
+        with patch.object(_app, "TTS_REUSE", "off"), \
+             patch.object(_app, "synthesize_to_file", return_value="plain") as plain:
+            check("TTS_REUSE off: plain synthesis",
+                  _app.synthesize_reusing(letter, "en", out) == ("plain", 0) and plain.called)
+    os.remove(out)
+
     print()
     if failures:
         print(f"FAILED: {len(failures)} — {', '.join(failures)}")
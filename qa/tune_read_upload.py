@@ -0,0 +1,114 @@
+"""Tune the Azure Read upload re-encode (app.READ_TARGET_LINE_PX /
+READ_UPLOAD_QUALITY) against OCR accuracy.
+
+Runs every image case that has a ground-truth text through the bot's real
+extract_text once per candidate setting, and reports mean CER and mean KB sent
+to Azure Read per case. "off" (the file byte for byte) is the baseline. The
+recommendation is the smallest upload whose mean CER stays within --tolerance
+of it; set it via READ_TARGET_LINE_PX / READ_UPLOAD_QUALITY (or change the
+defaults in app.py).
+
+Cost note: every case x setting is a real, billed Azure Read call. The
+re-encode only applies past READ_UPLOAD_MIN_KB, so the corpus' small images are
+forced through it with --min-kb 0. Use --limit / --filter while iterating.
+
+Usage:
+    python qa/tune_read_upload.py --limit 10
+    python qa/tune_read_upload.py --settings off,48:85,40:85,32:80
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+QA_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(QA_DIR))
+
+from run_ocr import _file_type_for, _quiet_sdk_logs, load_cases, resolve_case  # noqa: E402
+
+DEFAULT_SETTINGS = "off,60:85,48:85,40:85,40:75,32:85"
+
+
+def _parse_settings(spec):
+    out = []
+    for item in spec.split(","):
+        line, _, q = item.strip().partition(":")
+        out.append(None if line.lower() == "off" else (int(line), int(q) if q else 85))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--settings", default=DEFAULT_SETTINGS,
+                        help="comma-separated line_px[:quality], or off; the first is the baseline")
+    parser.add_argument("--limit", type=int, help="only the first N cases")
+    parser.add_argument("--filter", help="only cases whose id contains this")
+    parser.add_argument("--min-kb", type=int, default=0,
+                        help="READ_UPLOAD_MIN_KB while tuning (0 = re-encode every image)")
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="max mean-CER increase over the baseline")
+    args = parser.parse_args()
+
+    import metrics  # local module
+    import app  # bot module — triggers env validation + Azure client setup
+    _quiet_sdk_logs()
+
+    cases = []
+    for case in load_cases():
+        if args.filter and args.filter not in case.get("id", ""):
+            continue
+        try:
+            src, expected = resolve_case(case)
+        except ValueError as ex:
+            print(f"  ✗ {case.get('id')}: {ex}")
+            continue
+        if expected and _file_type_for(src) == "image":
+            cases.append((case.get("id"), src, expected))
+    cases = cases[:args.limit] if args.limit else cases
+    if not cases:
+        sys.exit("No image cases with ground truth matched.")
+
+    sent = []
+    real_read_upload = app._read_upload
+
+    def spy_read_upload(file_path):
+        data = real_read_upload(file_path)
+        sent.append(len(data) if data is not None else os.path.getsize(file_path))
+        return data
+
+    rows = []
+    for setting in _parse_settings(args.settings):
+        line, quality = setting or (app.READ_TARGET_LINE_PX, app.READ_UPLOAD_QUALITY)
+        cers, kbs = [], []
+        # OCR_FALLBACK off: the score is Azure Read's, not an LLM rescue's.
+        with patch.object(app, "OCR_FALLBACK", "off"), \
+             patch.object(app, "READ_UPLOAD_OPTIMIZE", "off" if setting is None else "on"), \
+             patch.object(app, "READ_UPLOAD_MIN_KB", args.min_kb), \
+             patch.object(app, "READ_TARGET_LINE_PX", line), \
+             patch.object(app, "READ_UPLOAD_QUALITY", quality), \
+             patch.object(app, "_read_upload", side_effect=spy_read_upload):
+            for cid, src, expected in cases:
+                sent.clear()
+                ocr = app.extract_text(str(src), "image")
+                rate = metrics.cer(expected, ocr.text)
+                if rate is not None:
+                    cers.append(rate)
+                kbs.append((sent[0] if sent else os.path.getsize(src)) / 1024)
+        name = "off" if setting is None else f"{line}px:{quality}"
+        mean_cer = sum(cers) / len(cers) if cers else float("nan")
+        mean_kb = sum(kbs) / len(kbs)
+        rows.append((name, mean_cer, mean_kb))
+        print(f"  {name:<10} CER {mean_cer:7.4f}   {mean_kb:8.1f} KB/case")
+
+    base_cer = rows[0][1]
+    ok = [r for r in rows if r[1] <= base_cer + args.tolerance]
+    best = min(ok, key=lambda r: r[2]) if ok else rows[0]
+    print(f"\n{len(cases)} cases. Baseline {rows[0][0]}: CER {base_cer:.4f}, {rows[0][2]:.1f} KB.")
+    print(f"Recommended: {best[0]} (CER {best[1]:.4f}, {best[2]:.1f} KB, "
+          f"{1 - best[2] / rows[0][2]:.0%} smaller than baseline).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Tune the vision-upload image settings (app.VISION_IMAGE_FORMAT / _QUALITY)
+against OCR accuracy.
+
+Runs every corpus case that has a ground-truth text through the bot's real LLM
+OCR (app.run_llm_ocr) once per candidate setting, and reports mean CER and
+mean KB uploaded per case. The recommendation is the smallest upload whose
+mean CER stays within --tolerance of the lossless PNG baseline; set it via
+VISION_IMAGE_FORMAT / VISION_IMAGE_QUALITY (or change the defaults in app.py).
+
+Cost note: every case x setting is a real, billed Azure OpenAI vision call
+(needs AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_API_KEY in .env). Use --limit /
+--filter while iterating.
+
+Usage:
+    python qa/tune_vision_image.py --limit 10
+    python qa/tune_vision_image.py --filter ka --settings png,webp:80,jpeg:75
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+QA_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(QA_DIR))
+
+from run_ocr import _file_type_for, _quiet_sdk_logs, load_cases, resolve_case  # noqa: E402
+
+DEFAULT_SETTINGS = "png,webp:90,webp:80,webp:70,webp:60,jpeg:90,jpeg:80,jpeg:70"
+
+
+def _parse_settings(spec):
+    out = []
+    for item in spec.split(","):
+        fmt, _, q = item.strip().partition(":")
+        out.append((fmt.lower(), int(q) if q else 100))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--settings", default=DEFAULT_SETTINGS,
+                        help="comma-separated format[:quality]; the first is the baseline")
+    parser.add_argument("--limit", type=int, help="only the first N cases")
+    parser.add_argument("--filter", help="only cases whose id contains this")
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="max mean-CER increase over the baseline")
+    args = parser.parse_args()
+
+    import metrics  # local module
+    import app  # bot module — triggers env validation + Azure client setup
+    _quiet_sdk_logs()
+    if not app._azure_openai_configured():
+        sys.exit("Azure OpenAI is not configured (AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_API_KEY).")
+
+    cases = []
+    for case in load_cases():
+        if args.filter and args.filter not in case.get("id", ""):
+            continue
+        try:
+            src, expected = resolve_case(case)
+        except ValueError as ex:
+            print(f"  ✗ {case.get('id')}: {ex}")
+            continue
+        if expected:
+            cases.append((case.get("id"), src, expected, case.get("expected_lang")))
+    cases = cases[:args.limit] if args.limit else cases
+    if not cases:
+        sys.exit("No cases with ground truth matched.")
+
+    sent = []
+    real_vision_image = app._vision_image
+
+    def spy_vision_image(img, original=None):
+        data, mime = real_vision_image(img, original)
+        sent.append(len(data))
+        return data, mime
+
+    rows = []
+    for fmt, quality in _parse_settings(args.settings):
+        cers, kbs = [], []
+        with patch.object(app, "VISION_IMAGE_FORMAT", fmt), \
+             patch.object(app, "VISION_IMAGE_QUALITY", quality), \
+             patch.object(app, "_vision_image", side_effect=spy_vision_image):
+            for cid, src, expected, lang in cases:
+                sent.clear()
+                raw, _ = asyncio.run(app.run_llm_ocr(str(src), _file_type_for(src), lang))
+                rate = metrics.cer(expected, app.normalize_ocr_text(raw or ""))
+                if rate is not None:
+                    cers.append(rate)
+                kbs.append(sum(sent) / 1024)
+        name = fmt if fmt == "png" else f"{fmt}:{quality}"
+        mean_cer = sum(cers) / len(cers) if cers else float("nan")
+        mean_kb = sum(kbs) / len(kbs)
+        rows.append((name, mean_cer, mean_kb))
+        print(f"  {name:<10} CER {mean_cer:7.4f}   {mean_kb:8.1f} KB/case")
+
+    base_cer = rows[0][1]
+    ok = [r for r in rows if r[1] <= base_cer + args.tolerance]
+    best = min(ok, key=lambda r: r[2]) if ok else rows[0]
+    print(f"\n{len(cases)} cases. Baseline {rows[0][0]}: CER {base_cer:.4f}, {rows[0][2]:.1f} KB.")
+    print(f"Recommended: {best[0]} (CER {best[1]:.4f}, {best[2]:.1f} KB, "
+          f"{1 - best[2] / rows[0][2]:.0%} smaller than baseline).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())